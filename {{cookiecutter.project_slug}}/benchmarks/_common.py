@@ -0,0 +1,135 @@
+"""
+Shared helpers for the micro-benchmarks in this directory.
+
+Benchmarks run in-process against the ASGI application with an in-memory
+repository, so they measure the Python overhead of the service rather than
+network or Redis latency. Run them with ``nox -s bench`` or directly with
+``python benchmarks/<name>.py``.
+"""
+
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterable, Sequence
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("APP_APP_ENV", "test")
+os.environ.setdefault("LOG_LOKI_ENDPOINT", "")
+os.environ.setdefault("LOG_CONSOLE_LEVEL", "WARNING")
+
+from {{cookiecutter.python_package_name}}.utils import statsd_client, tracer  # noqa: E402
+
+ASGIApp = Callable[..., Awaitable[None]]
+
+
+class MemoryRepo:
+    """In-memory stand-in for ``RedisRepository``."""
+
+    def __init__(self) -> None:
+        self.streams: dict[str, list[dict[str, Any]]] = defaultdict(list)
+
+    async def add_to_stream(
+        self, stream_name: str, message: dict[str, Any], status: Any = None
+    ) -> str:
+        entries = self.streams[stream_name]
+        entries.append(message)
+        return f"{len(entries)}-0"
+
+    async def add_many_to_stream(
+        self, stream_name: str, messages: Sequence[dict[str, Any]], statuses: Any = None
+    ) -> list[str | Exception]:
+        return [await self.add_to_stream(stream_name, m) for m in messages]
+
+    async def length(self, stream_name: str) -> int:
+        return len(self.streams[stream_name])
+
+    async def ping(self) -> bool:
+        return True
+
+
+def silence_side_effects() -> None:
+    """Disable StatsD sends so metrics do not hit the network."""
+
+    async def noop(_: bytes) -> None:
+        return None
+
+    statsd_client._send = noop  # type: ignore[method-assign]
+
+
+def reset_spans() -> None:
+    """Drop spans accumulated by the in-memory tracer."""
+    tracer.spans.clear()
+
+
+async def call_asgi(
+    app: ASGIApp,
+    method: str,
+    path: str,
+    body: bytes = b"",
+    headers: Iterable[tuple[bytes, bytes]] = (),
+) -> tuple[int, bytes]:
+    """Send one HTTP request straight to an ASGI app and return status and body."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-length", str(len(body)).encode()), *headers],
+        "client": ("127.0.0.1", 12345),
+        "server": ("testserver", 80),
+    }
+    sent = False
+    status = 0
+    chunks: list[bytes] = []
+
+    async def receive() -> dict[str, Any]:
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def timed(count: int, elapsed: float) -> float:
+    """Return operations per second."""
+    return count / elapsed if elapsed else float("inf")
+
+
+def report(
+    name: str, count: int, elapsed: float, baseline: float | None = None
+) -> float:
+    """Print a result line and return the measured rate."""
+    rate = timed(count, elapsed)
+    suffix = f"  x{rate / baseline:.2f}" if baseline else ""
+    print(f"{name:<40} {rate:>14,.0f} ops/s{suffix}")
+    return rate
+
+
+now = time.perf_counter
+
+__all__ = [
+    "MemoryRepo",
+    "call_asgi",
+    "now",
+    "report",
+    "reset_spans",
+    "silence_side_effects",
+    "timed",
+]
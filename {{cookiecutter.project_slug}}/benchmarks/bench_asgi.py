@@ -0,0 +1,104 @@
+"""
+Request overhead of the routing and middleware stack.
+
+Compares the previous layout, where requests walk the Starlette router and
+``BaseHTTPMiddleware`` wraps every response stream, with plain ASGI
+middleware and the fast path that dispatches ``POST /tasks`` and
+``GET /health`` straight to their handlers.
+"""
+
+import asyncio
+import json
+import time
+
+from _common import (
+    MemoryRepo,
+    call_asgi,
+    now,
+    report,
+    reset_spans,
+    silence_side_effects,
+)
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from {{cookiecutter.python_package_name}}.api import health, tasks
+from {{cookiecutter.python_package_name}}.middleware import FastPathMiddleware, MetricsMiddleware
+from {{cookiecutter.python_package_name}}.services.ingest_queue import IngestQueue
+from {{cookiecutter.python_package_name}}.services.tasks_service import TasksService
+from {{cookiecutter.python_package_name}}.utils import (
+    TASKS_ENDPOINT_PATH,
+    TASKS_STREAM_NAME,
+    statsd_client,
+)
+
+REQUESTS = 20_000
+BODY = json.dumps({"data": {"id": 1, "name": "item"}, "metadata": {}}).encode()
+HEADERS = [(b"content-type", b"application/json")]
+
+
+class LegacyMetricsMiddleware(BaseHTTPMiddleware):
+    """The metrics middleware as it was before the plain ASGI rewrite."""
+
+    def __init__(self, app, repo) -> None:
+        super().__init__(app)
+        self.repo = repo
+
+    async def dispatch(self, request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        duration_ms = (time.perf_counter() - start) * 1000
+        await statsd_client.gauge("request_duration", duration_ms)
+        size = await self.repo.length(TASKS_STREAM_NAME)
+        await statsd_client.gauge("task_queue_size", float(size))
+        return response
+
+
+def build(repo: MemoryRepo, queue: IngestQueue, layout: str) -> Starlette:
+    routes = [
+        *health.get_router(repo).routes,  # type: ignore[arg-type]
+        *tasks.get_router(queue.service, queue).routes,
+    ]
+    app = Starlette(routes=routes)
+    if layout == "fast":
+        app.add_middleware(FastPathMiddleware, router=app.router)
+    if layout == "legacy":
+        app.add_middleware(LegacyMetricsMiddleware, repo=repo)
+    else:
+        app.add_middleware(MetricsMiddleware, repo=repo)
+    return app
+
+
+async def run(layout: str, path: str) -> float:
+    repo = MemoryRepo()
+    service = TasksService(repo)  # type: ignore[arg-type]
+    queue = IngestQueue(service, maxsize=REQUESTS + 1000, workers=16)
+    app = build(repo, queue, layout)
+    method, body = ("POST", BODY) if path == TASKS_ENDPOINT_PATH else ("GET", b"")
+    start = now()
+    for i in range(REQUESTS):
+        await call_asgi(app, method, path, body, HEADERS)
+        if i % 1000 == 0:
+            await asyncio.sleep(0)
+            reset_spans()
+    elapsed = now() - start
+    await queue.stop(60)
+    reset_spans()
+    return elapsed
+
+
+async def main() -> None:
+    silence_side_effects()
+    print(f"{REQUESTS} requests per row, in-process ASGI calls")
+    for path in (TASKS_ENDPOINT_PATH, "/health"):
+        name = f"POST {path}" if path == TASKS_ENDPOINT_PATH else f"GET {path}"
+        baseline = report(
+            f"{name} BaseHTTPMiddleware", REQUESTS, await run("legacy", path)
+        )
+        report(f"{name} ASGI middleware", REQUESTS, await run("asgi", path), baseline)
+        report(f"{name} ASGI + fast path", REQUESTS, await run("fast", path), baseline)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""
+Requests/sec on ``POST /tasks`` for every installed JSON backend.
+
+The end-to-end numbers include validation, sanitization and enqueueing, so the
+isolated encode/decode rates of the same body are printed as well to show how
+much of the request cost the codec itself accounts for.
+"""
+
+import asyncio
+import importlib.util
+import json
+from typing import List
+
+from _common import (
+    MemoryRepo,
+    call_asgi,
+    now,
+    report,
+    reset_spans,
+    silence_side_effects,
+)
+
+from starlette.applications import Starlette
+
+from {{cookiecutter.python_package_name}}.api import tasks
+from {{cookiecutter.python_package_name}}.core import codec
+from {{cookiecutter.python_package_name}}.services.ingest_queue import IngestQueue
+from {{cookiecutter.python_package_name}}.services.tasks_service import TasksService
+from {{cookiecutter.python_package_name}}.utils import TASKS_ENDPOINT_PATH
+
+REQUESTS = 20_000
+BODY = json.dumps(
+    {
+        "data": {
+            "items": [
+                {"id": i, "name": f"item-{i}", "tags": ["a", "b"]} for i in range(20)
+            ]
+        },
+        "metadata": {"source": "bench", "attempt": 1},
+    }
+).encode()
+
+
+async def run_backend(backend: str) -> float:
+    codec.use_backend(backend)  # type: ignore[arg-type]
+    service = TasksService(MemoryRepo())  # type: ignore[arg-type]
+    queue = IngestQueue(service, maxsize=REQUESTS + 1000, workers=16)
+    app = Starlette(routes=tasks.get_router(service, queue).routes)
+    headers = [(b"content-type", b"application/json")]
+    for _ in range(500):
+        await call_asgi(app, "POST", TASKS_ENDPOINT_PATH, BODY, headers)
+    await asyncio.sleep(0)
+    reset_spans()
+
+    start = now()
+    for i in range(REQUESTS):
+        await call_asgi(app, "POST", TASKS_ENDPOINT_PATH, BODY, headers)
+        if i % 1000 == 0:
+            await asyncio.sleep(0)
+            reset_spans()
+    await queue.stop(60)
+    elapsed = now() - start
+    reset_spans()
+    return elapsed
+
+
+def run_codec_only(backend: str, rounds: int = 50_000) -> float:
+    codec.use_backend(backend)  # type: ignore[arg-type]
+    value = codec.loads(BODY)
+    start = now()
+    for _ in range(rounds):
+        codec.dumps(codec.loads(BODY))
+    elapsed = now() - start
+    assert codec.loads(codec.dumps(value)) == value
+    return elapsed
+
+
+async def main() -> None:
+    silence_side_effects()
+    backends: List[str] = ["json"] + [
+        name for name in ("msgspec", "orjson") if importlib.util.find_spec(name)
+    ]
+    print(f"POST {TASKS_ENDPOINT_PATH}, {len(BODY)} byte body, {REQUESTS} requests")
+    baseline = None
+    for backend in backends:
+        elapsed = await run_backend(backend)
+        rate = report(f"POST /tasks codec={backend}", REQUESTS, elapsed, baseline)
+        baseline = baseline or rate
+
+    print("decode + encode of the same body")
+    baseline = None
+    for backend in backends:
+        rate = report(f"codec={backend}", 50_000, run_codec_only(backend), baseline)
+        baseline = baseline or rate
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
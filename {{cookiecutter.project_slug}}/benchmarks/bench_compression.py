@@ -0,0 +1,74 @@
+"""
+Stored payload size and encode/decode rate for each stream payload codec.
+
+Payloads are generated to look like typical task bodies: many small records
+with repeated keys, which is where a trained zstd dictionary pays off.
+"""
+
+import json
+import random
+from typing import List, Tuple
+
+from _common import now, report
+
+from {{cookiecutter.python_package_name}}.core.compression import (
+    ZSTD_AVAILABLE,
+    PayloadCodec,
+    train_zstd_dictionary,
+)
+
+ROUNDS = 5_000
+
+
+def make_payload(seed: int) -> str:
+    rnd = random.Random(seed)
+    return json.dumps(
+        {
+            "data": {
+                "user_id": rnd.randint(1, 10**6),
+                "events": [
+                    {
+                        "type": rnd.choice(["click", "view", "purchase"]),
+                        "page": f"/catalog/{rnd.randint(1, 500)}",
+                        "ts": 1_700_000_000 + rnd.randint(0, 10**6),
+                        "attributes": {"device": "mobile", "locale": "ru-RU"},
+                    }
+                    for _ in range(rnd.randint(5, 15))
+                ],
+            },
+            "metadata": {"source": "web", "schema": "events.v3"},
+        }
+    )
+
+
+def measure(name: str, codec: PayloadCodec, payloads: List[str]) -> Tuple[float, float]:
+    stored = [codec.encode(p) for p in payloads]
+    size = sum(len(s) for s, _ in stored) / len(stored)
+    start = now()
+    for i in range(ROUNDS):
+        value, encoding = codec.encode(payloads[i % len(payloads)])
+        codec.decode(value, encoding)
+    rate = report(f"{name} encode+decode", ROUNDS, now() - start)
+    return size, rate
+
+
+def main() -> None:
+    payloads = [make_payload(i) for i in range(1000)]
+    raw = sum(len(p) for p in payloads) / len(payloads)
+    codecs = [("none", PayloadCodec()), ("zlib", PayloadCodec("zlib", min_size=0))]
+    if ZSTD_AVAILABLE:
+        dictionary = train_zstd_dictionary(
+            [make_payload(-i).encode() for i in range(1, 2000)]
+        )
+        codecs += [
+            ("zstd", PayloadCodec("zstd", min_size=0)),
+            ("zstd+dict", PayloadCodec("zstd", min_size=0, dictionary=dictionary)),
+        ]
+    sizes = [(name, measure(name, codec, payloads)[0]) for name, codec in codecs]
+    print(f"average JSON payload {raw:,.0f} bytes")
+    for name, size in sizes:
+        print(f"{name:<40} {size:>10,.0f} bytes stored  {size / raw:.0%}")
+
+
+if __name__ == "__main__":
+    main()
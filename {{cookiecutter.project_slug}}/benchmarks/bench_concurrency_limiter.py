@@ -0,0 +1,80 @@
+"""
+Fixed and adaptive concurrency limits in front of a simulated downstream.
+
+The downstream serves ``CAPACITY`` calls at once in ``BASE_LATENCY``
+seconds. Beyond that, contention makes every call slower with the square
+of the overload, so pushing more calls at it lowers its throughput. The
+fixed ``MAX_CONCURRENT_TASKS`` limit keeps it deep in that regime, while
+:class:`AdaptiveLimiter` backs off to about its capacity.
+"""
+
+import asyncio
+
+from _common import now, report, silence_side_effects
+
+from {{cookiecutter.python_package_name}}.core.config import settings
+from {{cookiecutter.python_package_name}}.services.concurrency_limiter import AdaptiveLimiter
+
+TASKS = 5_000
+CAPACITY = 50
+BASE_LATENCY = 0.002
+
+
+class Downstream:
+    """Service whose latency grows once more than ``CAPACITY`` calls overlap."""
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+
+    async def call(self) -> None:
+        self.in_flight += 1
+        overload = max(1.0, self.in_flight / CAPACITY)
+        try:
+            await asyncio.sleep(BASE_LATENCY * overload**2)
+        finally:
+            self.in_flight -= 1
+
+
+async def run(limiter: AdaptiveLimiter) -> tuple[float, float, int]:
+    downstream = Downstream()
+    latencies: list[float] = []
+    tasks: set[asyncio.Task[None]] = set()
+
+    async def handle() -> None:
+        started = now()
+        try:
+            await downstream.call()
+        finally:
+            latency = now() - started
+            latencies.append(latency)
+            limiter.release(latency)
+
+    start = now()
+    for _ in range(TASKS):
+        await limiter.acquire()
+        task = asyncio.create_task(handle())
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+    elapsed = now() - start
+    latencies.sort()
+    return elapsed, latencies[int(len(latencies) * 0.99)], int(limiter.limit)
+
+
+async def main() -> None:
+    silence_side_effects()
+    ceiling = settings.performance.max_concurrent_tasks
+    print(
+        f"{TASKS} tasks, downstream capacity {CAPACITY}, "
+        f"{BASE_LATENCY * 1000:.0f} ms base latency"
+    )
+    elapsed, p99, limit = await run(AdaptiveLimiter(max_limit=ceiling, adaptive=False))
+    baseline = report(f"fixed limit of {limit}", TASKS, elapsed)
+    print(f"  p99 {p99 * 1000:.0f} ms")
+    elapsed, p99, limit = await run(AdaptiveLimiter(max_limit=ceiling))
+    report("adaptive limit", TASKS, elapsed, baseline)
+    print(f"  p99 {p99 * 1000:.0f} ms, final limit {limit}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""
+Enqueue throughput with and without the coalescing batch writer.
+
+Repository calls go through one lock and sleep for ``RTT`` seconds, standing
+in for a single Redis connection, so the numbers show how many messages one
+connection can push when each XADD pays the round-trip versus when concurrent
+writes share it.
+"""
+
+import asyncio
+from functools import partial
+from typing import Any, Dict, List, Sequence
+
+from _common import MemoryRepo, now, report, reset_spans, silence_side_effects
+
+from {{cookiecutter.python_package_name}}.services.batch_writer import BatchWriter
+from {{cookiecutter.python_package_name}}.services.tasks_service import TasksService
+from {{cookiecutter.python_package_name}}.utils import TASKS_STREAM_NAME
+
+RTT = 0.0005
+CONCURRENCY = 256
+MESSAGES = 20_000
+PAYLOAD = {"data": {"id": 1, "name": "item"}, "metadata": {"source": "bench"}}
+
+
+class SlowRepo(MemoryRepo):
+    """Memory repository that pays one simulated round-trip per call."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.connection = asyncio.Lock()
+
+    async def round_trip(self) -> None:
+        async with self.connection:
+            await asyncio.sleep(RTT)
+
+    async def add_to_stream(
+        self, stream_name: str, message: Dict[str, Any], status: Any = None
+    ) -> str:
+        await self.round_trip()
+        entries = self.streams[stream_name]
+        entries.append(message)
+        return f"{len(entries)}-0"
+
+    async def add_many_to_stream(
+        self, stream_name: str, messages: Sequence[Dict[str, Any]], statuses: Any = None
+    ) -> List[str | Exception]:
+        await self.round_trip()
+        entries = self.streams[stream_name]
+        entries.extend(messages)
+        return [f"{len(entries) - i}-0" for i in range(len(messages), 0, -1)]
+
+
+async def run(batching: bool) -> float:
+    service = TasksService(SlowRepo())  # type: ignore[arg-type]
+    service.writers = (
+        {
+            TASKS_STREAM_NAME: BatchWriter(
+                partial(service._write_batch, TASKS_STREAM_NAME),
+                max_batch=256,
+                max_delay=0.001,
+                target_rtt=0.005,
+            )
+        }
+        if batching
+        else {}
+    )
+
+    async def worker(count: int) -> None:
+        for _ in range(count):
+            await service.enqueue_task(PAYLOAD)
+
+    start = now()
+    await asyncio.gather(*(worker(MESSAGES // CONCURRENCY) for _ in range(CONCURRENCY)))
+    elapsed = now() - start
+    reset_spans()
+    return elapsed
+
+
+async def main() -> None:
+    silence_side_effects()
+    count = MESSAGES // CONCURRENCY * CONCURRENCY
+    print(
+        f"{count} enqueues, {CONCURRENCY} concurrent callers, {RTT * 1000:.1f} ms RTT"
+    )
+    baseline = report("one XADD per task", count, await run(False))
+    report("coalesced batches", count, await run(True), baseline)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
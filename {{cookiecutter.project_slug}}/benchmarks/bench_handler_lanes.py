@@ -0,0 +1,76 @@
+"""
+Blocking and CPU-bound handlers on the event loop, in threads and in processes.
+
+Each workload runs ``TASKS`` calls through every lane the task processor
+offers while a ticker coroutine measures how late the loop wakes it up.
+Blocking calls belong in the thread pool. CPU-bound calls belong in the
+process pool, or in the thread pool on a free-threaded build where threads
+run Python code in parallel.
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable
+
+from _common import report, silence_side_effects
+from bench_process_pool import burn, measure
+
+from {{cookiecutter.python_package_name}}.services.process_pool import TaskProcessPool
+from {{cookiecutter.python_package_name}}.services.thread_pool import TaskThreadPool, gil_enabled
+
+TASKS = 32
+WAIT = 0.02
+WORK = 1_000_000
+
+
+def wait(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+async def lanes(
+    name: str, func: Callable[..., object], arg: object, pools: dict
+) -> None:
+    async def on_loop() -> None:
+        for _ in range(TASKS):
+            func(arg)
+            await asyncio.sleep(0)
+
+    def pooled(pool: TaskThreadPool | TaskProcessPool) -> Callable[[], Awaitable[None]]:
+        async def run() -> None:
+            await asyncio.gather(*(pool.run(func, arg) for _ in range(TASKS)))
+
+        return run
+
+    print(name)
+    baseline = None
+    for lane, run in (
+        ("loop", on_loop),
+        ("threads", pooled(pools["threads"])),
+        ("processes", pooled(pools["processes"])),
+    ):
+        elapsed, lag = await measure(run)
+        label = f"  {lane} (worst lag {lag * 1000:.0f} ms)"
+        rate = report(label, TASKS, elapsed, baseline)
+        baseline = baseline or rate
+
+
+async def main() -> None:
+    silence_side_effects()
+    gil = "with" if gil_enabled() else "without"
+    print(f"{TASKS} calls per lane, {os.cpu_count()} CPUs, {gil} GIL")
+    threads = TaskThreadPool()
+    processes = TaskProcessPool()
+    threads.start()
+    await processes.start(["bench_process_pool", __name__])
+    pools = {"threads": threads, "processes": processes}
+    try:
+        await lanes(f"blocking call of {WAIT * 1000:.0f} ms", wait, WAIT, pools)
+        await lanes(f"CPU work of {WORK:,} iterations", burn, WORK, pools)
+    finally:
+        await threads.stop()
+        await processes.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""
+Event-loop responsiveness with CPU-bound handlers on the loop and in the pool.
+
+``TASKS`` handlers each burn ``WORK`` iterations of pure Python arithmetic
+while a ticker coroutine measures how late the loop wakes it up. On the loop
+every handler blocks the ticker, and with it ingest, health checks and
+stream reads; in the process pool the loop stays free and the handlers run
+on every core.
+"""
+
+import asyncio
+import os
+from typing import Awaitable, Callable, List
+
+from _common import now, report, silence_side_effects
+
+from {{cookiecutter.python_package_name}}.services.process_pool import TaskProcessPool
+
+TASKS = 64
+WORK = 2_000_000
+TICK = 0.005
+
+
+def burn(n: int) -> int:
+    total = 0
+    for i in range(n):
+        total += i * i % 7
+    return total
+
+
+async def measure(run: Callable[[], Awaitable[None]]) -> tuple[float, float]:
+    lags: List[float] = []
+    done = False
+
+    async def ticker() -> None:
+        while not done:
+            started = now()
+            await asyncio.sleep(TICK)
+            lags.append(now() - started - TICK)
+
+    probe = asyncio.create_task(ticker())
+    start = now()
+    await run()
+    elapsed = now() - start
+    done = True
+    await probe
+    return elapsed, max(lags, default=0.0)
+
+
+async def main() -> None:
+    silence_side_effects()
+    print(f"{TASKS} handlers x {WORK:,} iterations, {os.cpu_count()} CPUs")
+
+    async def on_loop() -> None:
+        for _ in range(TASKS):
+            burn(WORK)
+            await asyncio.sleep(0)
+
+    elapsed, lag = await measure(on_loop)
+    baseline = report("handlers on the event loop", TASKS, elapsed)
+    print(f"  worst loop lag {lag * 1000:.0f} ms")
+
+    pool = TaskProcessPool()
+    await pool.start([__name__])
+    try:
+
+        async def in_pool() -> None:
+            await asyncio.gather(*(pool.run(burn, WORK) for _ in range(TASKS)))
+
+        elapsed, lag = await measure(in_pool)
+    finally:
+        await pool.stop()
+    report("handlers in the process pool", TASKS, elapsed, baseline)
+    print(f"  worst loop lag {lag * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
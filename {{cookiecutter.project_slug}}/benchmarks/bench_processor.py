@@ -0,0 +1,107 @@
+"""
+Consumer throughput with per-message and batched reads and acks.
+
+The repository sleeps for ``RTT`` seconds under one lock on every call,
+standing in for a single Redis connection, so the numbers show what one
+``XREADGROUP`` and one ``XACK`` per task cost compared with batched reads
+and pipelined acknowledgements.
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, List, Sequence, Tuple
+
+from _common import MemoryRepo, now, report, reset_spans, silence_side_effects
+
+from {{cookiecutter.python_package_name}}.services.batch_writer import BatchWriter
+from {{cookiecutter.python_package_name}}.services.task_processor import TaskProcessor
+from {{cookiecutter.python_package_name}}.utils import TASKS_STREAM_NAME
+
+RTT = 0.0005
+TASKS = 5_000
+
+
+class SlowRepo(MemoryRepo):
+    """Stream consumer side of the repository with a simulated round-trip."""
+
+    def __init__(self, count: int) -> None:
+        super().__init__()
+        self.connection = asyncio.Lock()
+        self.backlog: Deque[Tuple[str, Dict[str, Any]]] = deque(
+            (f"{i + 1}-0", {"payload": "{}"}) for i in range(count)
+        )
+        self.acked = 0
+        self.round_trips = 0
+
+    async def round_trip(self) -> None:
+        async with self.connection:
+            self.round_trips += 1
+            await asyncio.sleep(RTT)
+
+    async def create_group(self, stream_name: str) -> None:
+        return None
+
+    async def fetch_lanes(
+        self,
+        stream_names: Sequence[str],
+        count: int = 1,
+        block_ms: int | None = 1000,
+        consumer: str | None = None,
+    ) -> List[Tuple[str, str, Dict[str, Any]]]:
+        await self.round_trip()
+        if TASKS_STREAM_NAME not in stream_names:
+            return []
+        taken = min(count, len(self.backlog))
+        return [(TASKS_STREAM_NAME, *self.backlog.popleft()) for _ in range(taken)]
+
+    async def promote_due(self, set_name: str, limit: int) -> Tuple[int, None]:
+        return 0, None
+
+    async def delete_idle_consumers(
+        self, stream_name: str, idle_ms: int, names: Any = None
+    ) -> List[str]:
+        return []
+
+    async def ack_many(self, acks: Sequence[Any]) -> List[int | Exception]:
+        await self.round_trip()
+        self.acked += len(acks)
+        return [1] * len(acks)
+
+
+async def run(batched: bool) -> Tuple[float, int]:
+    repo = SlowRepo(TASKS)
+    processor = TaskProcessor(repo)  # type: ignore[arg-type]
+    processor.reclaimer = None
+
+    async def handle(_: Dict[str, Any]) -> None:
+        return None
+
+    processor.handle = handle  # type: ignore[assignment]
+    if not batched:
+        processor.fetch_batch_max = processor.prefetch_count = 1
+        processor.acks = BatchWriter(
+            processor._send_acks, max_batch=1, max_delay=0, target_rtt=float("inf")
+        )
+    start = now()
+    await processor.start()
+    while repo.acked < TASKS:
+        await asyncio.sleep(0.001)
+    elapsed = now() - start
+    await processor.stop()
+    reset_spans()
+    return elapsed, repo.round_trips
+
+
+async def main() -> None:
+    silence_side_effects()
+    print(f"{TASKS} tasks, {RTT * 1000:.1f} ms RTT")
+    elapsed, trips = await run(False)
+    baseline = report("one read and one ack per task", TASKS, elapsed)
+    print(f"  {trips} round trips")
+    elapsed, trips = await run(True)
+    report("batched reads, pipelined acks", TASKS, elapsed, baseline)
+    print(f"  {trips} round trips")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
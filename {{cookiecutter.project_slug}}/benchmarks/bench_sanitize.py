@@ -0,0 +1,72 @@
+"""
+Compare the legacy recursive sanitizer with the iterative one.
+
+The legacy version opens a tracer span per node, which is what the ingest
+path did before; it is reproduced here so both can be measured side by side.
+"""
+
+from collections.abc import Mapping, Sequence
+from html import escape
+from typing import Any, Callable
+
+from _common import now, report, reset_spans
+
+from {{cookiecutter.python_package_name}}.utils import tracer
+from {{cookiecutter.python_package_name}}.utils.sanitize import sanitize
+
+
+def legacy_sanitize(value: Any) -> Any:
+    with tracer.start_as_current_span("очистка"):
+        if isinstance(value, str):
+            return escape(value)
+        if isinstance(value, Sequence) and not isinstance(value, bytes | bytearray):
+            return [legacy_sanitize(v) for v in value]
+        if isinstance(value, Mapping):
+            return {str(k): legacy_sanitize(v) for k, v in value.items()}
+        return value
+
+
+def wide_payload(leaves: int) -> dict:
+    return {"items": [{"id": i, "name": f"<item {i}>"} for i in range(leaves // 2)]}
+
+
+def deep_payload(depth: int) -> dict:
+    data: dict = {"leaf": "<x>"}
+    for i in range(depth):
+        data = {"level": i, "child": data}
+    return data
+
+
+def measure(func: Callable[[Any], Any], payload: Any, rounds: int) -> float:
+    func(payload)
+    reset_spans()
+    start = now()
+    for _ in range(rounds):
+        func(payload)
+        reset_spans()
+    return now() - start
+
+
+def main() -> None:
+    cases = [
+        ("wide, 10k leaves", wide_payload(10_000), 50),
+        ("wide, 100 leaves", wide_payload(100), 5_000),
+        ("deep, 500 levels", deep_payload(500), 500),
+    ]
+    for name, payload, rounds in cases:
+        assert legacy_sanitize(payload) == sanitize(payload, max_depth=10_000)
+        baseline = report(
+            f"{name}: recursive+spans",
+            rounds,
+            measure(legacy_sanitize, payload, rounds),
+        )
+        report(
+            f"{name}: iterative",
+            rounds,
+            measure(lambda p: sanitize(p, max_depth=10_000), payload, rounds),
+            baseline,
+        )
+
+
+if __name__ == "__main__":
+    main()
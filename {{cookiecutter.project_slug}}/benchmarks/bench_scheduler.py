@@ -0,0 +1,100 @@
+"""
+Due-time precision and promotion throughput of the delayed-task set.
+
+Unlike the other benchmarks this one needs a running Redis (``REDIS_URL``),
+because the cost being measured is the Lua promotion script working on a
+large sorted set. ``BACKLOG`` tasks due in the far future are loaded first,
+so every measurement runs against a set of that size. Precision is the
+difference between a task's due time and the time its stream entry was
+created, as recorded in the entry id.
+"""
+
+import asyncio
+import statistics
+import time
+from typing import List
+
+from _common import now, report, reset_spans, silence_side_effects
+
+from {{cookiecutter.python_package_name}}.core.config import settings
+from {{cookiecutter.python_package_name}}.repository.redis_repo import RedisRepository, ScheduledEntry
+from {{cookiecutter.python_package_name}}.services.delayed_tasks import DelayedTaskScheduler
+
+BACKLOG = 1_000_000
+CHUNK = 10_000
+DUE_NOW = 200_000
+PRECISION_TASKS = 2_000
+PRECISION_WINDOW = 2.0
+SET_NAME = "bench:scheduled"
+STREAM = "bench:scheduled:stream"
+
+
+async def load(repo: RedisRepository, count: int, due: float, spread: float) -> float:
+    start = now()
+    for offset in range(0, count, CHUNK):
+        entries: List[ScheduledEntry] = []
+        for i in range(offset, min(count, offset + CHUNK)):
+            at = due + spread * i / count
+            entries.append((STREAM, {"n": str(i), "due": str(at)}, at))
+        await repo.add_to_schedule(SET_NAME, entries)
+        reset_spans()
+    return now() - start
+
+
+async def drain(repo: RedisRepository, batch_size: int) -> float:
+    start = now()
+    while True:
+        moved, _ = await repo.promote_due(SET_NAME, batch_size, [STREAM])
+        reset_spans()
+        if moved < batch_size:
+            return now() - start
+
+
+async def precision(repo: RedisRepository) -> List[float]:
+    await repo.redis.delete(STREAM)
+    await load(repo, PRECISION_TASKS, time.time() + 0.5, PRECISION_WINDOW)
+    scheduler = DelayedTaskScheduler(repo, set_name=SET_NAME)
+    await scheduler.start()
+    await asyncio.sleep(0.5 + PRECISION_WINDOW + 2 * scheduler.poll_interval)
+    await scheduler.stop()
+    lateness = []
+    for msg_id, fields in await repo.redis.xrange(STREAM):
+        created_ms = int(msg_id.split("-", 1)[0])
+        lateness.append(created_ms - float(fields["due"]) * 1000)
+    return lateness
+
+
+async def main() -> None:
+    silence_side_effects()
+    repo = RedisRepository(url=settings.redis.url)
+    try:
+        await repo.ping()
+    except Exception as exc:
+        print(f"Redis is not reachable at {settings.redis.url}: {exc}")
+        return
+    await repo.redis.delete(SET_NAME, STREAM)
+    try:
+        far = time.time() + 86_400
+        print(
+            f"{BACKLOG:,} tasks in the set, batch size {settings.scheduler.batch_size}"
+        )
+        report("ZADD (pipelined chunks)", BACKLOG, await load(repo, BACKLOG, far, 3600))
+        await load(repo, DUE_NOW, time.time() - 60, 0)
+        report(
+            "promote due tasks",
+            DUE_NOW,
+            await drain(repo, settings.scheduler.batch_size),
+        )
+        lateness = await precision(repo)
+        quantiles = statistics.quantiles(lateness, n=100)
+        print(
+            f"lateness over {len(lateness)} tasks: p50 {quantiles[49]:.1f} ms, "
+            f"p99 {quantiles[98]:.1f} ms, max {max(lateness):.1f} ms"
+        )
+    finally:
+        await repo.redis.delete(SET_NAME, STREAM)
+        await repo.redis.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
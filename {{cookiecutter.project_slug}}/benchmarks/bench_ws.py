@@ -0,0 +1,120 @@
+"""
+Tasks/sec over ``POST /tasks`` versus the WebSocket ingest channel.
+
+The WebSocket producer keeps the full credit window in flight, sending
+frames of ``FRAME`` tasks and topping the window up as acks arrive, so the
+server coalesces everything received during one pipeline write into the
+next batch.
+"""
+
+import asyncio
+import json
+from typing import Any, Dict
+
+from _common import (
+    MemoryRepo,
+    call_asgi,
+    now,
+    report,
+    reset_spans,
+    silence_side_effects,
+)
+
+from starlette.applications import Starlette
+
+from {{cookiecutter.python_package_name}}.api import tasks
+from {{cookiecutter.python_package_name}}.services.ingest_queue import IngestQueue
+from {{cookiecutter.python_package_name}}.services.tasks_service import TasksService
+from {{cookiecutter.python_package_name}}.utils import TASKS_ENDPOINT_PATH
+
+TASKS = 50_000
+FRAME = 100
+TASK = {
+    "data": {"id": 1, "name": "item", "tags": ["a", "b"]},
+    "metadata": {"source": "bench"},
+}
+BODY = json.dumps(TASK).encode()
+
+
+async def run_http(app: Starlette, queue: IngestQueue) -> float:
+    headers = [(b"content-type", b"application/json")]
+    start = now()
+    for i in range(TASKS):
+        await call_asgi(app, "POST", TASKS_ENDPOINT_PATH, BODY, headers)
+        if i % 1000 == 0:
+            await asyncio.sleep(0)
+            reset_spans()
+    await queue.stop(60)
+    return now() - start
+
+
+async def run_ws(app: Starlette) -> float:
+    inbox: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+    acked = 0
+    credit = 0
+    credit_changed = asyncio.Event()
+    done = asyncio.Event()
+
+    async def receive() -> Dict[str, Any]:
+        return await inbox.get()
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal acked, credit
+        if message["type"] != "websocket.send":
+            return
+        frame = json.loads(message["text"])
+        credit += frame["credit"]
+        if frame["type"] == "ack":
+            acked += len(frame["acks"])
+            if acked >= TASKS:
+                done.set()
+        credit_changed.set()
+
+    scope = {
+        "type": "websocket",
+        "asgi": {"version": "3.0"},
+        "scheme": "ws",
+        "path": tasks.WS_ENDPOINT_PATH,
+        "raw_path": tasks.WS_ENDPOINT_PATH.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "client": ("127.0.0.1", 12345),
+        "server": ("testserver", 80),
+        "subprotocols": [],
+    }
+    await inbox.put({"type": "websocket.connect"})
+    server = asyncio.create_task(app(scope, receive, send))
+    frame = json.dumps([TASK] * FRAME)
+
+    start = now()
+    sent = 0
+    while sent < TASKS:
+        while credit < FRAME:
+            credit_changed.clear()
+            await credit_changed.wait()
+        credit -= FRAME
+        sent += FRAME
+        await inbox.put({"type": "websocket.receive", "text": frame})
+        if sent % 5000 == 0:
+            reset_spans()
+    await done.wait()
+    elapsed = now() - start
+    await inbox.put({"type": "websocket.disconnect", "code": 1000})
+    await server
+    return elapsed
+
+
+async def main() -> None:
+    silence_side_effects()
+    print(f"{TASKS} tasks of {len(BODY)} bytes, WebSocket frames of {FRAME} tasks")
+    service = TasksService(MemoryRepo())  # type: ignore[arg-type]
+    queue = IngestQueue(service, maxsize=TASKS + 1000, workers=16)
+    app = Starlette(routes=tasks.get_router(service, queue).routes)
+    baseline = report("POST /tasks", TASKS, await run_http(app, queue))
+    reset_spans()
+    report("WebSocket /tasks/ws", TASKS, await run_ws(app), baseline)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
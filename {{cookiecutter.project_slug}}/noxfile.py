@@ -169,6 +169,20 @@ def profile(session: Session) -> None:
         )
 
 
+@nox.session(python=PYTHON_VERSIONS[-1])
+def bench(session: Session) -> None:
+    """Запускает микробенчмарки из каталога benchmarks."""
+    session.log("Установка зависимостей для бенчмарков...")
+    install_project_with_deps(session, "speed")
+
+    scripts: List[str] = session.posargs or sorted(
+        str(path) for path in Path("benchmarks").glob("bench_*.py")
+    )
+    for script in scripts:
+        session.log(f"Запуск {script}...")
+        session.run("python", script, env={"PYTHONPATH": SRC_DIR})
+
+
 @nox.session(python=False)
 def build(session: Session) -> None:
     """Сборка Docker-образа."""
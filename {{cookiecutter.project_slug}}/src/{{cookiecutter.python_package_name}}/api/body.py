@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+"""Streaming request body reader shared by the ingest routes."""
+
+from starlette.requests import Request  # pyright: ignore[reportMissingImports]
+
+from ..core.compression import DecompressedSizeError, decompress
+from ..core.config import settings
+
+
+class PayloadTooLargeError(Exception):
+    """Raised when a request body exceeds the configured size limit."""
+
+
+class InvalidContentLengthError(ValueError):
+    """Raised when the ``Content-Length`` header is not a valid integer."""
+
+
+async def read_body(
+    request: Request, limit: int = settings.performance.max_payload_size
+) -> bytes:
+    """
+    Read and decode the request body without buffering more than ``limit`` bytes.
+
+    The declared ``Content-Length`` is checked before anything is read, and
+    the stream is abandoned as soon as the received byte count passes the
+    limit, so oversized uploads are rejected without being buffered. Bodies
+    sent with ``Content-Encoding`` are decompressed and the same limit
+    applies to the decompressed size.
+
+    Args:
+        request: Incoming HTTP request.
+        limit: Maximum accepted body size in bytes.
+
+    Returns:
+        The complete body.
+
+    Raises:
+        PayloadTooLargeError: If the body is, or claims to be, larger than
+            ``limit``.
+        InvalidContentLengthError: If ``Content-Length`` is malformed.
+        UnsupportedEncodingError: If ``Content-Encoding`` is not supported.
+        ValueError: If a compressed body is corrupt.
+    """
+    declared = request.headers.get("content-length")
+    if declared is not None:
+        try:
+            size = int(declared)
+        except ValueError as exc:
+            raise InvalidContentLengthError("Invalid Content-Length") from exc
+        if size > limit:
+            raise PayloadTooLargeError(f"Declared body of {size} bytes")
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise PayloadTooLargeError(f"Body exceeds {limit} bytes")
+
+    encoding = request.headers.get("content-encoding")
+    if encoding:
+        try:
+            return decompress(bytes(body), encoding, limit)
+        except DecompressedSizeError as exc:
+            raise PayloadTooLargeError(str(exc)) from exc
+    return bytes(body)
+
+
+__all__ = ["InvalidContentLengthError", "PayloadTooLargeError", "read_body"]
@@ -7,13 +7,22 @@ from typing import Any
 from ..repository.redis_repo import RedisRepository
 
 from ..core.logging_config import get_logger
-from ..utils import statsd_client, tracer
-from ..middleware import MetricsMiddleware
+from ..utils import TASKS_ENDPOINT_PATH, statsd_client, tracer
+from ..core.config import settings
+from ..middleware import FastPathMiddleware, MetricsMiddleware, RateLimitMiddleware
 from ..utils.tracing import shutdown_tracer
 from . import health, tasks
 
 from .health import router as health_router
-from .tasks import router as tasks_router, start_task_processor, stop_task_processor
+from .tasks import (
+    router as tasks_router,
+    start_completion_hub,
+    start_ingest_queue,
+    start_task_processor,
+    stop_completion_hub,
+    stop_ingest_queue,
+    stop_task_processor,
+)
 
 router = Router()
 router.routes.extend(health_router.routes)
@@ -22,7 +31,16 @@ router.routes.extend(tasks_router.routes)
 log = get_logger(__name__)
 
 app = Starlette(routes=router.routes)
+if settings.performance.asgi_fast_path:
+    app.add_middleware(FastPathMiddleware, router=app.router)
 app.add_middleware(MetricsMiddleware, repo=tasks.tasks_service.repo)
+if settings.rate_limit.enabled:
+    app.add_middleware(
+        RateLimitMiddleware,
+        repo=tasks.tasks_service.repo,
+        paths=(TASKS_ENDPOINT_PATH, tasks.BATCH_ENDPOINT_PATH),
+        ws_paths=(tasks.WS_ENDPOINT_PATH,),
+    )
 
 
 @app.on_event("startup")  # pyright: ignore[reportUnknownMemberType,reportUntypedFunctionDecorator]
@@ -30,6 +48,8 @@ async def on_startup() -> None:
     """Log startup message."""
     with tracer.start_as_current_span("запуск"):
         log.info("Application startup")
+    await start_ingest_queue()
+    await start_completion_hub()
     await start_task_processor()
 
 
@@ -38,6 +58,8 @@ async def on_shutdown() -> None:
     """Clean up resources on shutdown."""
     with tracer.start_as_current_span("остановка"):
         log.info("Application shutdown")
+    await stop_ingest_queue()
+    await stop_completion_hub()
     await _close_repo(health.redis_repo)
     await _close_repo(tasks.tasks_service.repo)
     await stop_task_processor()
@@ -2,28 +2,53 @@ from __future__ import annotations
 
 """Task creation endpoint definitions."""
 
-import json
-from html import escape
-from typing import Any, Dict, Mapping, Sequence, cast
+from datetime import UTC, datetime
+from typing import Any, AsyncIterator, Dict, List, Mapping, Tuple, cast
+from uuid import uuid4
+import asyncio
 import sys
+import time
 
-import asyncio
-from pydantic import BaseModel, Field, ValidationError  # pyright: ignore[reportMissingImports]
+from pydantic import (  # pyright: ignore[reportMissingImports]
+    BaseModel,
+    Field,
+    PrivateAttr,
+    TypeAdapter,
+    ValidationError,
+    model_validator,
+)
 from starlette.requests import Request  # pyright: ignore[reportMissingImports]
-from starlette.responses import JSONResponse  # pyright: ignore[reportMissingImports]
-from starlette.routing import Route, Router  # pyright: ignore[reportMissingImports]
+from starlette.responses import JSONResponse, Response, StreamingResponse  # pyright: ignore[reportMissingImports]
+from starlette.routing import Route, Router, WebSocketRoute  # pyright: ignore[reportMissingImports]
+from starlette.websockets import WebSocket, WebSocketDisconnect  # pyright: ignore[reportMissingImports]
 from starlette.status import (
+    HTTP_200_OK,
     HTTP_202_ACCEPTED,
     HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND,
     HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+    HTTP_503_SERVICE_UNAVAILABLE,
+    WS_1003_UNSUPPORTED_DATA,
+    WS_1008_POLICY_VIOLATION,
+    WS_1009_MESSAGE_TOO_BIG,
 )
 
+from .body import PayloadTooLargeError, read_body
 from .deps import get_tasks_service
+from ..services.completion_hub import CompletionHub
+from ..services.ingest_queue import IngestQueue, IngestQueueFullError
+from ..services.task_handlers import task_handlers
+from ..services.task_status import FINAL_STATES
+from ..services.task_types import UnknownTaskTypeError, task_types
 from ..services.tasks_service import TasksService
 from ..services.task_processor import TaskProcessor
 from ..utils.metrics import statsd_client
+from ..utils.sanitize import SanitizationError, sanitize
 from ..utils.tracing import tracer
-from ..utils import TASKS_ENDPOINT_PATH
+from ..utils import TASKS_ENDPOINT_PATH, Priority
+from ..core import codec
+from ..core.compression import ZSTD_AVAILABLE, UnsupportedEncodingError
 from ..core.config import settings
 from ..core.logging_config import get_logger
 
@@ -32,18 +57,60 @@ log = get_logger(__name__)
 
 tasks_service: TasksService = get_tasks_service()
 task_processor: TaskProcessor | None = None
+ingest_queue: IngestQueue = IngestQueue(
+    tasks_service,
+    maxsize=settings.performance.ingest_queue_size,
+    workers=settings.performance.ingest_workers,
+)
+completion_hub: CompletionHub = CompletionHub(tasks_service)
 
-background_tasks: set[asyncio.Task[Any]] = set()
 
+MAX_BODY_SIZE = settings.performance.max_payload_size
+MAX_BATCH_SIZE = settings.performance.max_batch_size
+SANITIZE_MODE = settings.performance.sanitize_mode
+INGEST_SYNC = settings.performance.ingest_sync
+RETRY_AFTER = str(settings.performance.ingest_retry_after)
+BATCH_ENDPOINT_PATH = f"{TASKS_ENDPOINT_PATH}/batch"
+WAIT_ENDPOINT_PATH = f"{TASKS_ENDPOINT_PATH}/wait"
+WS_ENDPOINT_PATH = f"{TASKS_ENDPOINT_PATH}/ws"
+WS_CREDIT = settings.performance.ws_ingest_credit
+TASK_STATUS_PATH = TASKS_ENDPOINT_PATH + "/{task_id}"
+ACCEPT_ENCODING = "gzip, deflate, zstd" if ZSTD_AVAILABLE else "gzip, deflate"
+IDEMPOTENCY_HEADER = "idempotency-key"
+IDEMPOTENCY_FIELD = "idempotency_key"
+MAX_IDEMPOTENCY_KEY_LENGTH = 256
+MAX_STATUS_LOOKUP = settings.task_status.max_lookup
+MAX_DELAY = settings.scheduler.max_delay
+SCHEDULED_IDEMPOTENCY_ERROR = "Idempotency keys cannot be used with run_at or delay"
+DEADLINE_HEADER = "task-deadline"
+DEADLINE_FIELD = "deadline"
+_DEADLINE_ADAPTER: TypeAdapter[datetime] = TypeAdapter(datetime)
+MAX_WAIT = settings.task_status.max_wait
+SSE_HEARTBEAT = settings.task_status.heartbeat
+ACCEPTED_BODY = b'{"status":"accepted","task_id":"%s"}'
+JSON_CONTENT_TYPE = (b"content-type", b"application/json")
+NDJSON_CONTENT_TYPES = frozenset(
+    {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+)
 
-def _log_task_result(task: asyncio.Task[Any]) -> None:
-    try:
-        task.result()
-    except Exception as exc:  # pragma: no cover - background task errors
-        log.error("Background task failed", exc_info=exc)
 
+class EncodedResponse(Response):
+    """
+    JSON response whose body is already encoded.
 
-MAX_BODY_SIZE = settings.performance.max_payload_size
+    It skips the header rendering of :class:`Response`. Every request still
+    gets its own instance and header list, since middleware may edit the
+    headers of the response it sends in place.
+    """
+
+    def __init__(self, body: bytes, status_code: int = HTTP_202_ACCEPTED) -> None:
+        self.body = body
+        self.status_code = status_code
+        self.background = None
+        self.raw_headers = [
+            (b"content-length", str(len(body)).encode()),
+            JSON_CONTENT_TYPE,
+        ]
 
 
 async def start_task_processor() -> None:
@@ -63,53 +130,746 @@ async def stop_task_processor() -> None:
         setattr(sys.modules[__name__], "task_processor", None)
 
 
+async def start_ingest_queue() -> None:
+    """Start the ingest queue flushers."""
+    await ingest_queue.start()
+
+
+async def stop_ingest_queue() -> None:
+    """Flush buffered tasks to Redis and stop the ingest queue."""
+    await ingest_queue.stop(settings.performance.shutdown_timeout)
+    await tasks_service.close()
+
+
+async def start_completion_hub() -> None:
+    """Subscribe to task completions if task statuses are recorded."""
+    if settings.task_status.enabled:
+        await completion_hub.start()
+
+
+async def stop_completion_hub() -> None:
+    """Close the completion subscription and release waiting requests."""
+    await completion_hub.stop()
+
+
 def _sanitize(value: Any) -> Any:
     """
-    Escape potentially unsafe strings in payloads.
+    Sanitize a decoded payload when ``SANITIZE_MODE`` is ``ingest``.
+
+    In ``lazy`` mode the processor sanitizes instead, and ``off`` disables
+    sanitization entirely.
 
     Args:
-        value: Arbitrary value to sanitize.
+        value: Decoded request payload.
 
     Returns:
-        The sanitized value.
-    """
-    with tracer.start_as_current_span("очистка"):
-        if isinstance(value, str):
-            return escape(value)
-        if isinstance(value, Sequence) and not isinstance(
-            value, str | bytes | bytearray
-        ):
-            seq = cast(Sequence[Any], value)
-            return [_sanitize(v) for v in seq]
-        if isinstance(value, Mapping):
-            mapping = cast(Mapping[Any, Any], value)
-            return {str(k): _sanitize(v) for k, v in mapping.items()}
+        The sanitized value, or ``value`` unchanged outside ``ingest`` mode.
+
+    Raises:
+        SanitizationError: If the payload exceeds the configured limits.
+    """
+    if SANITIZE_MODE != "ingest":
         return value
+    return sanitize(value)
+
+
+def _parse_deadline(value: Any) -> float:
+    """
+    Return a task deadline as a Unix timestamp.
+
+    Args:
+        value: Unix timestamp or ISO 8601 time; naive times are UTC.
+
+    Raises:
+        ValueError: If the value is malformed or already in the past.
+    """
+    try:
+        moment = _DEADLINE_ADAPTER.validate_python(value)
+    except ValidationError:
+        raise ValueError(
+            "Deadline must be a Unix timestamp or an ISO 8601 time"
+        ) from None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    deadline = moment.timestamp()
+    if deadline <= time.time():
+        raise ValueError("Deadline has already passed")
+    return deadline
 
 
 class TaskPayload(BaseModel):
-    """Payload for a single task request."""
+    """
+    Payload for a single task request.
+
+    When ``type`` is set, ``data`` is validated against the schema registered
+    for it in :data:`task_types` and replaced by its normalized form. A type
+    with a handler in :data:`task_handlers` but no schema keeps its data as
+    sent; any other type is rejected.
+    ``run_at`` (naive times are UTC) or ``delay`` in seconds postpone the
+    task by at most ``SCHEDULER_MAX_DELAY`` seconds. ``metadata.deadline``
+    sets the time after which the task is dropped instead of processed.
+    """
 
     data: Any
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    priority: Priority = "normal"
+    type: str | None = None
+    run_at: datetime | None = None
+    delay: float | None = Field(default=None, ge=0)
+    _due: float | None = PrivateAttr(default=None)
+    _deadline: float | None = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def _validate_data(self) -> TaskPayload:
+        if self.type is not None:
+            if self.type in task_types:
+                self.data = task_types.normalize(self.type, self.data)
+            elif self.type not in task_handlers:
+                raise UnknownTaskTypeError(f"Unknown task type {self.type!r}")
+        if self.metadata.get(DEADLINE_FIELD) is not None:
+            self._deadline = _parse_deadline(self.metadata[DEADLINE_FIELD])
+        if self.run_at is not None and self.delay is not None:
+            raise ValueError("Set either run_at or delay, not both")
+        now = time.time()
+        if self.delay is not None:
+            due = now + self.delay
+        elif self.run_at is not None:
+            run_at = self.run_at
+            if run_at.tzinfo is None:
+                run_at = run_at.replace(tzinfo=UTC)
+            due = run_at.timestamp()
+        else:
+            return self
+        if due - now > MAX_DELAY:
+            raise ValueError(f"Tasks can be delayed by at most {MAX_DELAY} seconds")
+        self._due = due if due > now else None
+        return self
+
+    @property
+    def due(self) -> float | None:
+        """Unix time the task is scheduled for, or ``None`` to run it now."""
+        return self._due
+
+    @property
+    def deadline(self) -> float | None:
+        """Unix time after which the task is no longer processed."""
+        return self._deadline
+
+    def set_deadline(self, value: str) -> None:
+        """
+        Override the deadline with the ``Task-Deadline`` header value.
+
+        Raises:
+            ValueError: If the value is malformed or already in the past.
+        """
+        self._deadline = _parse_deadline(value)
+
+    def to_message(self) -> Dict[str, Any]:
+        """Return the stored task body; ``priority`` only selects the lane."""
+        exclude = {"priority", "run_at", "delay"}
+        if self.type is None:
+            exclude.add("type")
+        return self.model_dump(exclude=exclude)
+
+
+class InvalidJSONError(ValueError):
+    """Raised when a request body is not valid JSON."""
+
+
+class InvalidTaskError(ValueError):
+    """Raised when one task of a batch or stream fails validation."""
+
+    def __init__(self, detail: Any) -> None:
+        super().__init__(str(detail))
+        self.detail = detail
+
+
+def _idempotency_key(header: str | None, metadata: Mapping[str, Any]) -> str | None:
+    """
+    Return the idempotency key from the header or ``metadata``, if any.
+
+    The ``Idempotency-Key`` header takes precedence over the
+    ``metadata.idempotency_key`` field.
+
+    Raises:
+        ValueError: If the key is empty, not a string or too long.
+    """
+    key = header if header is not None else metadata.get(IDEMPOTENCY_FIELD)
+    if key is None:
+        return None
+    if not isinstance(key, str) or not key or len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise ValueError(
+            f"Idempotency key must be a string of 1-{MAX_IDEMPOTENCY_KEY_LENGTH} characters"
+        )
+    return key
+
+
+def _validate_item(item: Any) -> Tuple[TaskPayload, str | None]:
+    """
+    Validate one decoded task of a batch or stream.
 
+    Args:
+        item: Decoded task, or the decoding error for a malformed one.
+
+    Returns:
+        The payload and its idempotency key, if any.
+
+    Raises:
+        InvalidTaskError: With the detail reported to the client.
+    """
+    if isinstance(item, ValueError):
+        raise InvalidTaskError("Invalid JSON")
+    try:
+        payload = TaskPayload.model_validate(_sanitize(item))
+    except SanitizationError as exc:
+        raise InvalidTaskError(str(exc)) from exc
+    except ValidationError as exc:
+        raise InvalidTaskError(
+            exc.errors(include_url=False, include_context=False)
+        ) from exc
+    try:
+        key = _idempotency_key(None, payload.metadata)
+    except ValueError as exc:
+        raise InvalidTaskError(str(exc)) from exc
+    if key is not None and payload.due is not None:
+        raise InvalidTaskError(SCHEDULED_IDEMPOTENCY_ERROR)
+    return payload, key
 
-def get_router(service: TasksService | None = None) -> Router:
+
+async def _enqueue_validated(
+    service: TasksService, entries: List[Tuple[TaskPayload, str | None]]
+) -> List[Dict[str, Any]]:
+    """
+    Enqueue validated tasks, pipelining those without an idempotency key.
+
+    Args:
+        service: Service used to enqueue the tasks.
+        entries: Payloads with their optional idempotency keys.
+
+    Returns:
+        ``status`` (``accepted``, ``scheduled``, ``duplicate`` or ``failed``)
+        and ``task_id`` for every entry, in input order.
+    """
+    outcomes: List[Dict[str, Any]] = [{} for _ in entries]
+    plain = [i for i, (p, key) in enumerate(entries) if key is None and p.due is None]
+    delayed = [i for i, (p, _) in enumerate(entries) if p.due is not None]
+    keyed = [i for i, (_, key) in enumerate(entries) if key is not None]
+
+    if delayed:
+        task_ids = await service.schedule_tasks(
+            [entries[i][0].to_message() for i in delayed],
+            [cast(float, entries[i][0].due) for i in delayed],
+            [entries[i][0].priority for i in delayed],
+            [entries[i][0].deadline for i in delayed],
+        )
+        for index, task_id in zip(delayed, task_ids, strict=True):
+            if task_id:
+                outcomes[index].update(status="scheduled", task_id=task_id)
+            else:
+                outcomes[index].update(status="failed", detail="Enqueue failed")
+
+    if plain:
+        enqueued = await service.enqueue_tasks(
+            [entries[i][0].to_message() for i in plain],
+            [entries[i][0].priority for i in plain],
+            [entries[i][0].deadline for i in plain],
+        )
+        for index, (task_id, stream_id) in zip(plain, enqueued, strict=True):
+            if stream_id:
+                outcomes[index].update(status="accepted", task_id=task_id)
+            else:
+                outcomes[index].update(
+                    status="failed", task_id=task_id, detail="Enqueue failed"
+                )
+
+    if keyed:
+        results = await asyncio.gather(
+            *(
+                service.enqueue_task_once(
+                    entries[i][0].to_message(),
+                    cast(str, entries[i][1]),
+                    entries[i][0].priority,
+                    entries[i][0].deadline,
+                )
+                for i in keyed
+            )
+        )
+        for index, (task_id, _, created) in zip(keyed, results, strict=True):
+            if not task_id:
+                outcomes[index].update(status="failed", detail="Enqueue failed")
+            else:
+                outcomes[index].update(
+                    status="accepted" if created else "duplicate", task_id=task_id
+                )
+    return outcomes
+
+
+def _unavailable(detail: str) -> JSONResponse:
+    """Return a 503 response asking the client to retry later."""
+    return JSONResponse(
+        {"detail": detail},
+        status_code=HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": RETRY_AFTER},
+    )
+
+
+def _unsupported_encoding(exc: UnsupportedEncodingError) -> JSONResponse:
+    """Return a 415 response listing the accepted content encodings."""
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        headers={"Accept-Encoding": ACCEPT_ENCODING},
+    )
+
+
+def _bad_request(detail: Any) -> JSONResponse:
+    """Return a 400 response with ``detail``."""
+    return JSONResponse({"detail": detail}, status_code=HTTP_400_BAD_REQUEST)
+
+
+def _payload_too_large() -> JSONResponse:
+    """Return the standard 413 response for oversized bodies."""
+    return JSONResponse(
+        {"detail": "Payload too large"}, status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    )
+
+
+async def _parse_task(request: Request) -> TaskPayload:
+    """
+    Read, decode and validate the body of a single-task request.
+
+    Raises:
+        PayloadTooLargeError: If the body exceeds ``MAX_BODY_SIZE``.
+        UnsupportedEncodingError: If the content encoding is not supported.
+        InvalidTaskError: With the detail reported to the client.
+    """
+    try:
+        body = await read_body(request, MAX_BODY_SIZE)
+    except UnsupportedEncodingError:
+        raise
+    except ValueError as exc:
+        raise InvalidTaskError(str(exc)) from exc
+    try:
+        raw = codec.loads(body)
+    except ValueError as exc:
+        raise InvalidTaskError("Invalid JSON") from exc
+    try:
+        return TaskPayload(**_sanitize(raw))
+    except SanitizationError as exc:
+        raise InvalidTaskError(str(exc)) from exc
+    except ValidationError as exc:
+        raise InvalidTaskError(
+            exc.errors(include_url=False, include_context=False)
+        ) from exc
+
+
+def _apply_headers(request: Request, payload: TaskPayload) -> str | None:
+    """
+    Apply the ``Task-Deadline`` header and return the idempotency key.
+
+    Raises:
+        InvalidTaskError: If the key or the deadline is invalid.
+    """
+    try:
+        key = _idempotency_key(
+            request.headers.get(IDEMPOTENCY_HEADER), payload.metadata
+        )
+        deadline = request.headers.get(DEADLINE_HEADER)
+        if deadline is not None:
+            payload.set_deadline(deadline)
+    except ValueError as exc:
+        raise InvalidTaskError(str(exc)) from exc
+    return key
+
+
+async def _schedule_task(service: TasksService, payload: TaskPayload) -> Response:
+    """Store a postponed task until it is due."""
+    due = cast(float, payload.due)
+    (task_id,) = await service.schedule_tasks(
+        [payload.to_message()], [due], [payload.priority], [payload.deadline]
+    )
+    if not task_id:
+        return _unavailable("Enqueue failed")
+    return JSONResponse(
+        {
+            "status": "scheduled",
+            "task_id": task_id,
+            "run_at": datetime.fromtimestamp(due, UTC).isoformat(),
+        },
+        status_code=HTTP_202_ACCEPTED,
+    )
+
+
+async def _enqueue_once(
+    service: TasksService, payload: TaskPayload, key: str
+) -> Response:
+    """Enqueue a task unless one with the same idempotency key exists."""
+    task_id, stream_id, created = await service.enqueue_task_once(
+        payload.to_message(), key, payload.priority, payload.deadline
+    )
+    if not task_id:
+        return _unavailable("Enqueue failed")
+    if not created:
+        return JSONResponse(
+            {"status": "duplicate", "task_id": task_id}, status_code=HTTP_200_OK
+        )
+    return JSONResponse(
+        {"status": "accepted", "task_id": task_id, "stream_id": stream_id},
+        status_code=HTTP_202_ACCEPTED,
+    )
+
+
+async def _enqueue_now(service: TasksService, payload: TaskPayload) -> Response:
+    """Write a task to its stream before responding (``INGEST_SYNC``)."""
+    task_id = str(uuid4())
+    stream_id = await service.enqueue_task(
+        payload.to_message(), task_id, payload.priority, payload.deadline
+    )
+    if not stream_id:
+        return _unavailable("Enqueue failed")
+    return JSONResponse(
+        {"status": "accepted", "task_id": task_id, "stream_id": stream_id},
+        status_code=HTTP_202_ACCEPTED,
+    )
+
+
+async def _enqueue_task(
+    service: TasksService, queue: IngestQueue, payload: TaskPayload, key: str | None
+) -> Response:
+    """
+    Schedule or enqueue a validated task and build the response.
+
+    Postponed tasks go to the scheduler and keyed tasks are deduplicated.
+    Other tasks are written directly in ``INGEST_SYNC`` mode, or handed to
+    the ingest queue and answered without waiting for Redis. The task id is
+    generated here so the client can poll the status of a queued task.
+    """
+    if payload.due is not None:
+        if key is not None:
+            return _bad_request(SCHEDULED_IDEMPOTENCY_ERROR)
+        return await _schedule_task(service, payload)
+    if key is not None:
+        return await _enqueue_once(service, payload, key)
+    if INGEST_SYNC:
+        return await _enqueue_now(service, payload)
+    task_id = str(uuid4())
+    try:
+        queue.submit(
+            payload.to_message(),
+            task_id=task_id,
+            priority=payload.priority,
+            deadline=payload.deadline,
+        )
+    except IngestQueueFullError:
+        await statsd_client.incr("ingest.rejected")
+        return _unavailable("Ingest queue is full")
+    return EncodedResponse(ACCEPTED_BODY % task_id.encode())
+
+
+def _decode_batch(body: bytes, content_type: str) -> List[Any]:
+    """
+    Decode a batch body into raw items.
+
+    NDJSON bodies are decoded line by line so that a malformed line only
+    rejects that item; such lines are returned as the decoding exception.
+
+    Args:
+        body: Raw request body.
+        content_type: Value of the ``Content-Type`` header.
+
+    Returns:
+        Decoded items in request order.
+
+    Raises:
+        InvalidJSONError: If a JSON body is malformed.
+        ValueError: If a JSON body is not an array.
+    """
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type in NDJSON_CONTENT_TYPES:
+        items: List[Any] = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(codec.loads(line))
+            except ValueError as exc:
+                items.append(exc)
+        return items
+    try:
+        raw = codec.loads(body)
+    except ValueError as exc:
+        raise InvalidJSONError("Invalid JSON") from exc
+    if not isinstance(raw, list):
+        raise ValueError("Expected a JSON array")
+    return cast(List[Any], raw)
+
+
+def _task_ids(request: Request) -> List[str]:
+    """
+    Return the unique task ids from repeated or comma-separated ``ids``.
+
+    Raises:
+        ValueError: If no ids or more than ``MAX_STATUS_LOOKUP`` are given.
+    """
+    task_ids = list(
+        dict.fromkeys(
+            part
+            for value in request.query_params.getlist("ids")
+            for part in value.split(",")
+            if part
+        )
+    )
+    if not task_ids:
+        raise ValueError("No task ids given")
+    if len(task_ids) > MAX_STATUS_LOOKUP:
+        raise ValueError(f"At most {MAX_STATUS_LOOKUP} task ids per request")
+    return task_ids
+
+
+def _wait_timeout(request: Request) -> float:
+    """
+    Return the ``timeout`` query parameter clamped to ``MAX_WAIT`` seconds.
+
+    Raises:
+        ValueError: If the value is not a number.
+    """
+    raw = request.query_params.get("timeout")
+    if raw is None:
+        return float(MAX_WAIT)
+    try:
+        timeout = float(raw)
+    except ValueError as exc:
+        raise ValueError("Timeout must be a number of seconds") from exc
+    return min(max(timeout, 0.0), float(MAX_WAIT))
+
+
+def _is_final(status: Dict[str, Any] | None) -> bool:
+    return status is not None and status.get("state") in FINAL_STATES
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {codec.dumps(data)}\n\n"
+
+
+async def _late_events(
+    service: TasksService, task_ids: List[str]
+) -> AsyncIterator[str]:
+    """Stream ``status`` events for tasks that finished unseen, then ``timeout``."""
+    latest = await service.get_task_statuses(task_ids)
+    unresolved: List[str] = []
+    for task_id, status in zip(task_ids, latest, strict=True):
+        if _is_final(status):
+            yield _sse("status", status)
+        else:
+            unresolved.append(task_id)
+    if unresolved:
+        yield _sse("timeout", {"pending": unresolved})
+
+
+async def _completion_events(
+    service: TasksService,
+    hub: CompletionHub,
+    futures: Dict[str, asyncio.Future[Dict[str, Any]]],
+    statuses: Dict[str, Dict[str, Any] | None],
+    timeout: float,
+) -> AsyncIterator[str]:
+    """
+    Stream a ``status`` event per finished task, then ``timeout`` if any remain.
+
+    Comment lines are sent every ``SSE_HEARTBEAT`` seconds to keep proxies
+    from closing an idle connection.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        pending: Dict[asyncio.Future[Dict[str, Any]], str] = {}
+        for task_id, status in statuses.items():
+            if _is_final(status):
+                yield _sse("status", status)
+            else:
+                pending[futures[task_id]] = task_id
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=min(SSE_HEARTBEAT, remaining),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                yield ": keep-alive\n\n"
+                continue
+            for future in done:
+                del pending[future]
+                yield _sse("status", future.result())
+        if pending:
+            # completions published while the subscription was down are
+            # only visible in the status store
+            async for event in _late_events(service, list(pending.values())):
+                yield event
+    finally:
+        hub.release(futures)
+
+
+async def _ws_ingest(websocket: WebSocket, service: TasksService) -> None:
+    """
+    Accept task frames over a WebSocket and acknowledge them in batches.
+
+    Protocol, all frames JSON text (binary frames close the connection):
+
+    * server → ``{"type": "credit", "credit": N}`` once after the handshake;
+    * client → one task object or an array of them, each optionally with an
+      ``id`` echoed back in its ack; every task consumes one credit;
+    * server → ``{"type": "ack", "acks": [...], "credit": k}`` per enqueued
+      batch and ``{"type": "nack", ...}`` for rejected tasks and for batches
+      that could not be enqueued, returning ``k`` credits to the client.
+
+    Tasks received while a batch is being written are grouped into the next
+    batch, so the number of Redis round trips drops as the rate rises. A
+    client sending more tasks than it has credit for is disconnected.
+    """
+    await websocket.accept()
+    await websocket.send_text(codec.dumps({"type": "credit", "credit": WS_CREDIT}))
+    buffered: List[Tuple[Any, TaskPayload, str | None]] = []
+    wake = asyncio.Event()
+    in_flight = 0
+    receiving = True
+
+    async def send(frame: Dict[str, Any]) -> None:
+        try:
+            await websocket.send_text(codec.dumps(frame))
+        except Exception:  # client gone; the tasks are still enqueued
+            pass
+
+    async def flush() -> None:
+        nonlocal in_flight
+        while receiving or buffered:
+            await wake.wait()
+            wake.clear()
+            while buffered:
+                batch = buffered[:MAX_BATCH_SIZE]
+                del buffered[: len(batch)]
+                try:
+                    outcomes = await _enqueue_validated(
+                        service, [(payload, key) for _, payload, key in batch]
+                    )
+                except Exception as exc:
+                    # keep flushing: the client gets its credit back either way
+                    log.error("Failed to enqueue WebSocket batch", exc_info=exc)
+                    await send(
+                        {
+                            "type": "nack",
+                            "nacks": [
+                                {"id": frame_id, "detail": "Enqueue failed"}
+                                for frame_id, _, _ in batch
+                            ],
+                            "credit": len(batch),
+                        }
+                    )
+                    continue
+                finally:
+                    in_flight -= len(batch)
+                accepted = sum(
+                    1 for o in outcomes if o["status"] in ("accepted", "scheduled")
+                )
+                await statsd_client.incr("tasks.ws.accepted", accepted)
+                await send(
+                    {
+                        "type": "ack",
+                        "acks": [
+                            {"id": frame_id, **outcome}
+                            for (frame_id, _, _), outcome in zip(
+                                batch, outcomes, strict=True
+                            )
+                        ],
+                        "credit": len(batch),
+                    }
+                )
+
+    flusher = asyncio.create_task(flush())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            text = message.get("text")
+            if text is None:
+                await websocket.close(WS_1003_UNSUPPORTED_DATA, "Expected text frames")
+                break
+            if len(text.encode()) > MAX_BODY_SIZE:
+                await websocket.close(WS_1009_MESSAGE_TOO_BIG)
+                break
+            try:
+                frame = codec.loads(text)
+            except ValueError:
+                await websocket.close(WS_1003_UNSUPPORTED_DATA, "Invalid JSON")
+                break
+            items = cast(List[Any], frame if isinstance(frame, list) else [frame])
+            if in_flight + len(items) > WS_CREDIT:
+                await websocket.close(WS_1008_POLICY_VIOLATION, "Credit exceeded")
+                break
+            await statsd_client.incr("requests.tasks.ws")
+            nacks: List[Dict[str, Any]] = []
+            for item in items:
+                fields = cast(Dict[str, Any], item) if isinstance(item, dict) else {}
+                frame_id = fields.get("id")
+                try:
+                    payload, key = _validate_item(item)
+                except InvalidTaskError as exc:
+                    nacks.append({"id": frame_id, "detail": exc.detail})
+                    continue
+                buffered.append((frame_id, payload, key))
+                in_flight += 1
+            if nacks:
+                await send({"type": "nack", "nacks": nacks, "credit": len(nacks)})
+            wake.set()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # tasks already received are enqueued even if the client went away
+        receiving = False
+        wake.set()
+        await flusher
+
+
+def get_router(
+    service: TasksService | None = None,
+    queue: IngestQueue | None = None,
+    hub: CompletionHub | None = None,
+) -> Router:
     """
     Create router for task creation endpoint.
 
     Args:
         service: Service instance used to enqueue tasks. Defaults to
             the global ``tasks_service``.
+        queue: Ingest queue feeding ``service``. Defaults to the global
+            ``ingest_queue`` for the global service and to a new queue
+            otherwise.
+        hub: Completion hub for wait requests, chosen like ``queue``.
 
     Returns:
         Router with the ``TASKS_ENDPOINT_PATH`` route registered.
     """
     service = service or tasks_service
+    if queue is None:
+        queue = (
+            ingest_queue
+            if service is tasks_service
+            else IngestQueue(
+                service,
+                maxsize=settings.performance.ingest_queue_size,
+                workers=settings.performance.ingest_workers,
+            )
+        )
+    if hub is None:
+        hub = completion_hub if service is tasks_service else CompletionHub(service)
     with tracer.start_as_current_span("получение_роутера"):
         router = Router()
 
-    async def create_task(request: Request) -> JSONResponse:
+    async def create_task(request: Request) -> Response:
         """
         Validate payload and enqueue task asynchronously.
 
@@ -117,52 +877,247 @@ def get_router(service: TasksService | None = None) -> Router:
             request: Incoming HTTP request.
 
         Returns:
-            JSONResponse indicating acceptance or validation error.
+            Response indicating acceptance or validation error.
         """
         with tracer.start_as_current_span("создание_задачи"):
-            body = await request.body()
-            if len(body) > MAX_BODY_SIZE:
+            try:
+                payload = await _parse_task(request)
+                key = _apply_headers(request, payload)
+            except PayloadTooLargeError:
+                return _payload_too_large()
+            except UnsupportedEncodingError as exc:
+                return _unsupported_encoding(exc)
+            except InvalidTaskError as exc:
+                return _bad_request(exc.detail)
+            await statsd_client.incr("requests.tasks")
+            return await _enqueue_task(service, queue, payload, key)
+
+    async def create_tasks_batch(request: Request) -> JSONResponse:
+        """
+        Validate a batch of tasks and enqueue the valid ones in one pipeline.
+
+        The body is either a JSON array of task payloads or NDJSON with one
+        payload per line. Every item is validated independently.
+
+        Args:
+            request: Incoming HTTP request.
+
+        Returns:
+            JSONResponse with per-item task ids or errors.
+        """
+        with tracer.start_as_current_span("пакетное_создание_задач"):
+            try:
+                body = await read_body(request, MAX_BODY_SIZE)
+                items = _decode_batch(body, request.headers.get("content-type", ""))
+            except PayloadTooLargeError:
+                return _payload_too_large()
+            except UnsupportedEncodingError as exc:
+                return _unsupported_encoding(exc)
+            except ValueError as exc:
+                return JSONResponse(
+                    {"detail": str(exc)}, status_code=HTTP_400_BAD_REQUEST
+                )
+            if not items:
                 return JSONResponse(
-                    {"detail": "Payload too large"},
+                    {"detail": "Empty batch"}, status_code=HTTP_400_BAD_REQUEST
+                )
+            if len(items) > MAX_BATCH_SIZE:
+                return JSONResponse(
+                    {"detail": f"Batch exceeds {MAX_BATCH_SIZE} tasks"},
                     status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                 )
+
+            results: List[Dict[str, Any]] = [{"index": i} for i in range(len(items))]
+            entries: List[Tuple[TaskPayload, str | None]] = []
+            positions: List[int] = []
+            for index, item in enumerate(items):
+                try:
+                    entries.append(_validate_item(item))
+                except InvalidTaskError as exc:
+                    results[index].update(status="rejected", detail=exc.detail)
+                    continue
+                positions.append(index)
+
+            if entries:
+                outcomes = await _enqueue_validated(service, entries)
+                for index, outcome in zip(positions, outcomes, strict=True):
+                    results[index].update(outcome)
+
+            accepted = sum(1 for r in results if r["status"] == "accepted")
+            scheduled = sum(1 for r in results if r["status"] == "scheduled")
+            duplicate = sum(1 for r in results if r["status"] == "duplicate")
+            await statsd_client.incr("requests.tasks.batch")
+            await statsd_client.incr("tasks.batch.accepted", accepted + scheduled)
+            return JSONResponse(
+                {
+                    "accepted": accepted,
+                    "scheduled": scheduled,
+                    "duplicate": duplicate,
+                    "rejected": len(results) - accepted - scheduled - duplicate,
+                    "results": results,
+                },
+                status_code=(
+                    HTTP_202_ACCEPTED
+                    if accepted or scheduled or duplicate
+                    else HTTP_400_BAD_REQUEST
+                ),
+            )
+
+    async def get_task_status(request: Request) -> JSONResponse:
+        """
+        Return the recorded state of one task.
+
+        Args:
+            request: Incoming HTTP request with the ``task_id`` path parameter.
+
+        Returns:
+            JSONResponse with the task status or ``404`` if it is unknown.
+        """
+        with tracer.start_as_current_span("получение_статуса_задачи"):
+            task_id = request.path_params["task_id"]
+            try:
+                (status,) = await service.get_task_statuses([task_id])
+            except Exception as exc:  # pragma: no cover - network errors
+                log.error("Status lookup failed", exc_info=exc)
+                return _unavailable("Status lookup failed")
+            if status is None:
+                return JSONResponse(
+                    {"detail": "Task not found"}, status_code=HTTP_404_NOT_FOUND
+                )
+            return JSONResponse(status, status_code=HTTP_200_OK)
+
+    async def get_task_statuses(request: Request) -> JSONResponse:
+        """
+        Return the recorded state of several tasks.
+
+        Ids are passed as repeated or comma-separated ``ids`` query
+        parameters and are looked up in one Redis round trip.
+
+        Args:
+            request: Incoming HTTP request.
+
+        Returns:
+            JSONResponse mapping every requested id to its status or ``null``.
+        """
+        with tracer.start_as_current_span("получение_статусов_задач"):
             try:
-                raw = json.loads(body.decode())
-                sanitized = _sanitize(raw)
-                payload = TaskPayload(**sanitized)
-            except json.JSONDecodeError:
+                task_ids = _task_ids(request)
+            except ValueError as exc:
                 return JSONResponse(
-                    {"detail": "Invalid JSON"}, status_code=HTTP_400_BAD_REQUEST
+                    {"detail": str(exc)}, status_code=HTTP_400_BAD_REQUEST
                 )
-            except ValidationError as exc:  # pragma: no cover - Pydantic ensures detail
+            try:
+                statuses = await service.get_task_statuses(task_ids)
+            except Exception as exc:  # pragma: no cover - network errors
+                log.error("Status lookup failed", exc_info=exc)
+                return _unavailable("Status lookup failed")
+            return JSONResponse(
+                {"tasks": dict(zip(task_ids, statuses, strict=True))},
+                status_code=HTTP_200_OK,
+            )
+
+    async def wait_for_tasks(request: Request) -> JSONResponse | StreamingResponse:
+        """
+        Wait until the given tasks finish or ``timeout`` seconds pass.
+
+        Clients accepting ``text/event-stream`` get one server-sent event per
+        finished task as it completes. Other clients get a single JSON
+        response once every task has finished or the timeout expires.
+
+        Args:
+            request: Incoming HTTP request with ``ids`` and ``timeout``.
+
+        Returns:
+            Streaming or JSON response with the final task statuses.
+        """
+        with tracer.start_as_current_span("ожидание_задач"):
+            try:
+                task_ids = _task_ids(request)
+                timeout = _wait_timeout(request)
+            except ValueError as exc:
                 return JSONResponse(
-                    {"detail": exc.errors()}, status_code=HTTP_400_BAD_REQUEST
+                    {"detail": str(exc)}, status_code=HTTP_400_BAD_REQUEST
                 )
+            futures = hub.register(task_ids)
+            try:
+                current = await service.get_task_statuses(task_ids)
+            except Exception as exc:  # pragma: no cover - network errors
+                hub.release(futures)
+                log.error("Status lookup failed", exc_info=exc)
+                return _unavailable("Status lookup failed")
+            statuses = dict(zip(task_ids, current, strict=True))
 
-            task_enqueue = asyncio.create_task(
-                service.enqueue_task(payload.model_dump())
-            )
-            background_tasks.add(task_enqueue)
-            task_enqueue.add_done_callback(background_tasks.discard)
-            task_enqueue.add_done_callback(_log_task_result)
+            if "text/event-stream" in request.headers.get("accept", ""):
+                return StreamingResponse(
+                    _completion_events(service, hub, futures, statuses, timeout),
+                    media_type="text/event-stream",
+                    headers={"Cache-Control": "no-cache"},
+                )
 
-            task_metric = asyncio.create_task(statsd_client.incr("requests.tasks"))
-            background_tasks.add(task_metric)
-            task_metric.add_done_callback(background_tasks.discard)
-            task_metric.add_done_callback(_log_task_result)
-            return JSONResponse({"status": "accepted"}, status_code=HTTP_202_ACCEPTED)
+            try:
+                waiting = [
+                    futures[task_id]
+                    for task_id, status in statuses.items()
+                    if not _is_final(status)
+                ]
+                if waiting:
+                    await asyncio.wait(waiting, timeout=timeout)
+                for task_id, future in futures.items():
+                    if future.done() and not future.cancelled():
+                        statuses[task_id] = future.result()
+                missed = [t for t, status in statuses.items() if not _is_final(status)]
+                if missed and waiting:
+                    latest = await service.get_task_statuses(missed)
+                    statuses.update(zip(missed, latest, strict=True))
+            finally:
+                hub.release(futures)
+            return JSONResponse(
+                {
+                    "tasks": statuses,
+                    "pending": [
+                        t for t, status in statuses.items() if not _is_final(status)
+                    ],
+                },
+                status_code=HTTP_200_OK,
+            )
 
     router.routes.append(Route(TASKS_ENDPOINT_PATH, create_task, methods=["POST"]))
+    router.routes.append(Route(TASKS_ENDPOINT_PATH, get_task_statuses, methods=["GET"]))
+    router.routes.append(
+        Route(BATCH_ENDPOINT_PATH, create_tasks_batch, methods=["POST"])
+    )
+
+    async def ingest_websocket(websocket: WebSocket) -> None:
+        """Stream tasks from a persistent producer connection."""
+        with tracer.start_as_current_span("прием_задач_websocket"):
+            await _ws_ingest(websocket, service)
+
+    router.routes.append(Route(WAIT_ENDPOINT_PATH, wait_for_tasks, methods=["GET"]))
+    router.routes.append(WebSocketRoute(WS_ENDPOINT_PATH, ingest_websocket))
+    router.routes.append(Route(TASK_STATUS_PATH, get_task_status, methods=["GET"]))
     return router
 
 
 router = get_router()
 
 __all__ = [
+    "ACCEPTED_BODY",
+    "BATCH_ENDPOINT_PATH",
+    "IDEMPOTENCY_HEADER",
+    "TASK_STATUS_PATH",
+    "WAIT_ENDPOINT_PATH",
+    "WS_ENDPOINT_PATH",
+    "EncodedResponse",
     "TaskPayload",
+    "completion_hub",
     "get_router",
+    "ingest_queue",
     "router",
+    "start_completion_hub",
+    "start_ingest_queue",
     "start_task_processor",
+    "stop_completion_hub",
+    "stop_ingest_queue",
     "stop_task_processor",
     "task_processor",
     "tasks_service",
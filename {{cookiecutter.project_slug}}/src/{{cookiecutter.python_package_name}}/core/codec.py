@@ -0,0 +1,126 @@
+"""
+JSON codec that uses the fastest installed backend.
+
+``orjson`` is preferred, then ``msgspec``, and the standard library ``json``
+module is the fallback. The backend can be pinned with the ``JSON_BACKEND``
+environment variable. Every decoding failure is raised as ``ValueError`` so
+callers do not depend on the backend in use.
+"""
+
+import importlib
+import json
+from typing import Any, Callable, Literal, Tuple, cast
+
+from .config import settings
+
+JSONBackend = Literal["auto", "orjson", "msgspec", "json"]
+
+_Encoder = Callable[[Any], bytes]
+_Decoder = Callable[[str | bytes], Any]
+
+
+def _stdlib_dumpb(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _load_orjson() -> Tuple[_Encoder, _Decoder]:
+    orjson = importlib.import_module("orjson")
+    option: int = orjson.OPT_NON_STR_KEYS
+    orjson_dumps = cast(Callable[..., bytes], orjson.dumps)
+
+    def dumpb(obj: Any) -> bytes:
+        try:
+            return orjson_dumps(obj, option=option)
+        except TypeError:
+            # orjson rejects integers wider than 64 bits; stdlib does not.
+            return _stdlib_dumpb(obj)
+
+    return dumpb, cast(_Decoder, orjson.loads)
+
+
+def _load_msgspec() -> Tuple[_Encoder, _Decoder]:
+    msgspec_json = importlib.import_module("msgspec.json")
+    encoder: Any = msgspec_json.Encoder()
+    decoder: Any = msgspec_json.Decoder()
+    return cast(_Encoder, encoder.encode), cast(_Decoder, decoder.decode)
+
+
+def _load_stdlib() -> Tuple[_Encoder, _Decoder]:
+    return _stdlib_dumpb, cast(_Decoder, json.loads)
+
+
+_LOADERS: dict[str, Callable[[], Tuple[_Encoder, _Decoder]]] = {
+    "orjson": _load_orjson,
+    "msgspec": _load_msgspec,
+    "json": _load_stdlib,
+}
+
+
+class _Active:
+    """Backend currently used by the module-level functions."""
+
+    __slots__ = ("dumpb", "loads", "name")
+
+    def __init__(self) -> None:
+        self.name = "json"
+        self.dumpb, self.loads = _load_stdlib()
+
+
+_active = _Active()
+
+
+def use_backend(name: JSONBackend = "auto") -> str:
+    """
+    Select the JSON backend used by :func:`dumps`, :func:`dumpb` and :func:`loads`.
+
+    Args:
+        name: Backend to use. ``"auto"`` picks the first importable one of
+            ``orjson``, ``msgspec`` and ``json``.
+
+    Returns:
+        Name of the backend that is now active.
+
+    Raises:
+        ImportError: If a specific backend was requested but is not installed.
+    """
+    candidates = list(_LOADERS) if name == "auto" else [name]
+    for candidate in candidates:
+        try:
+            _active.dumpb, _active.loads = _LOADERS[candidate]()
+        except ImportError:
+            if name != "auto":
+                raise
+            continue
+        _active.name = candidate
+        break
+    return _active.name
+
+
+def backend() -> str:
+    """Return the name of the active JSON backend."""
+    return _active.name
+
+
+def dumpb(obj: Any) -> bytes:
+    """Serialize ``obj`` to compact UTF-8 JSON bytes."""
+    return _active.dumpb(obj)
+
+
+def dumps(obj: Any) -> str:
+    """Serialize ``obj`` to a compact JSON string."""
+    return _active.dumpb(obj).decode()
+
+
+def loads(data: str | bytes) -> Any:
+    """
+    Deserialize JSON from ``str`` or ``bytes``.
+
+    Raises:
+        ValueError: If ``data`` is not valid JSON or not valid UTF-8.
+    """
+    return _active.loads(data)
+
+
+use_backend(settings.performance.json_backend)
+
+__all__ = ["JSONBackend", "backend", "dumpb", "dumps", "loads", "use_backend"]
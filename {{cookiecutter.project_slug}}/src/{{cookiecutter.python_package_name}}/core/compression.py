@@ -0,0 +1,225 @@
+"""
+Compression helpers for request bodies and task payloads in the stream.
+
+Request bodies may arrive with ``Content-Encoding: gzip``, ``deflate`` or
+``zstd`` and are inflated with a hard limit on the decompressed size.
+
+Payloads written to the stream can optionally be compressed as well. Redis
+clients are created with ``decode_responses=True``, so compressed payloads
+are stored base64-encoded and tagged with a ``payload_encoding`` field that
+the consumer uses to decode them. Messages without the field are plain JSON.
+``zstd`` support needs the optional ``zstandard`` package.
+"""
+
+import base64
+import zlib
+from pathlib import Path
+from typing import Any, Literal, Sequence, Tuple
+
+from .config import settings
+
+try:
+    import zstandard  # type: ignore[import-not-found]  # pyright: ignore[reportMissingImports]
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+ZSTD_AVAILABLE: bool = zstandard is not None
+_DECODE_ERRORS: Tuple[type[Exception], ...] = (ValueError, zlib.error) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+PayloadCompression = Literal["none", "zlib", "zstd"]
+
+_CHUNK = 64 * 1024
+
+
+class UnsupportedEncodingError(ValueError):
+    """Raised for a ``Content-Encoding`` the service cannot decode."""
+
+
+class DecompressedSizeError(ValueError):
+    """Raised when decompressed data exceeds the allowed size."""
+
+
+def _inflate_zlib(data: bytes, wbits: int, limit: int) -> bytes:
+    decompressor = zlib.decompressobj(wbits)
+    try:
+        out = decompressor.decompress(data, limit + 1)
+    except zlib.error as exc:
+        raise ValueError("Invalid compressed body") from exc
+    if len(out) > limit:
+        raise DecompressedSizeError(f"Decompressed body exceeds {limit} bytes")
+    if not decompressor.eof:
+        raise ValueError("Truncated compressed body")
+    return out
+
+
+def _inflate_zstd(data: bytes, limit: int) -> bytes:
+    if zstandard is None:
+        raise UnsupportedEncodingError("zstd support is not installed")
+    decompressor = zstandard.ZstdDecompressor()
+    out = bytearray()
+    try:
+        with decompressor.stream_reader(data) as reader:
+            while chunk := reader.read(_CHUNK):
+                out += chunk
+                if len(out) > limit:
+                    raise DecompressedSizeError(
+                        f"Decompressed body exceeds {limit} bytes"
+                    )
+    except zstandard.ZstdError as exc:
+        raise ValueError("Invalid compressed body") from exc
+    return bytes(out)
+
+
+def decompress(data: bytes, encoding: str, limit: int) -> bytes:
+    """
+    Decode ``data`` according to a ``Content-Encoding`` value.
+
+    At most ``limit + 1`` bytes are ever produced, so a small compressed body
+    cannot expand into an arbitrarily large buffer.
+
+    Args:
+        data: Compressed bytes.
+        encoding: ``Content-Encoding`` header value.
+        limit: Maximum decompressed size in bytes.
+
+    Returns:
+        The decompressed bytes.
+
+    Raises:
+        UnsupportedEncodingError: If the encoding is not supported.
+        DecompressedSizeError: If the result exceeds ``limit``.
+        ValueError: If ``data`` is corrupt.
+    """
+    encoding = encoding.strip().lower()
+    if encoding in ("", "identity"):
+        return data
+    if encoding in ("gzip", "x-gzip"):
+        return _inflate_zlib(data, 16 + zlib.MAX_WBITS, limit)
+    if encoding == "deflate":
+        return _inflate_zlib(data, zlib.MAX_WBITS, limit)
+    if encoding == "zstd":
+        return _inflate_zstd(data, limit)
+    raise UnsupportedEncodingError(f"Unsupported Content-Encoding: {encoding}")
+
+
+def train_zstd_dictionary(samples: Sequence[bytes], size: int = 16 * 1024) -> bytes:
+    """
+    Train a zstd dictionary from sample payloads.
+
+    The result can be written to the file named by
+    ``PAYLOAD_ZSTD_DICTIONARY``.
+
+    Args:
+        samples: Representative serialized payloads.
+        size: Maximum dictionary size in bytes.
+
+    Returns:
+        The raw dictionary.
+    """
+    if zstandard is None:
+        raise ImportError("zstandard is not installed")
+    return zstandard.train_dictionary(size, list(samples)).as_bytes()
+
+
+class PayloadCodec:
+    """Compress serialized payloads for the stream and decode them back."""
+
+    def __init__(
+        self,
+        compression: PayloadCompression = "none",
+        min_size: int = 1024,
+        level: int = 3,
+        dictionary: bytes | None = None,
+    ) -> None:
+        """
+        Initialize the codec.
+
+        Args:
+            compression: Algorithm for new payloads.
+            min_size: Payloads shorter than this are stored uncompressed.
+            level: Compression level.
+            dictionary: Raw zstd dictionary shared by producers and consumers.
+
+        Raises:
+            ImportError: If ``zstd`` is requested without ``zstandard``.
+        """
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstandard is required for zstd payload compression")
+        self.compression = compression
+        self.min_size = min_size
+        self.level = level
+        self._zstd_compressor: Any = None
+        self._zstd_decompressor: Any = None
+        if zstandard is not None:
+            zdict = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            self._zstd_decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+            if compression == "zstd":
+                self._zstd_compressor = zstandard.ZstdCompressor(
+                    level=level, dict_data=zdict
+                )
+        self.encoding = f"{compression}+b64" if compression != "none" else ""
+
+    @classmethod
+    def from_settings(cls) -> "PayloadCodec":
+        """Build the codec configured by ``PAYLOAD_COMPRESSION*`` settings."""
+        perf = settings.performance
+        path = perf.payload_zstd_dictionary
+        return cls(
+            perf.payload_compression,
+            min_size=perf.payload_compression_min_size,
+            level=perf.payload_compression_level,
+            dictionary=Path(path).read_bytes() if path else None,
+        )
+
+    def encode(self, payload: str) -> Tuple[str, str]:
+        """
+        Return the stored form of a serialized payload and its encoding tag.
+
+        The tag is empty when the payload is kept as plain JSON.
+        """
+        if not self.encoding or len(payload) < self.min_size:
+            return payload, ""
+        raw = payload.encode()
+        if self._zstd_compressor is not None:
+            packed = self._zstd_compressor.compress(raw)
+        else:
+            packed = zlib.compress(raw, self.level)
+        stored = base64.b64encode(packed).decode("ascii")
+        if len(stored) >= len(payload):
+            return payload, ""
+        return stored, self.encoding
+
+    def decode(self, stored: str, encoding: str = "") -> str:
+        """
+        Return the serialized payload from its stored form.
+
+        Raises:
+            ValueError: If the encoding is unknown or the data is corrupt.
+        """
+        if not encoding:
+            return stored
+        try:
+            packed = base64.b64decode(stored, validate=True)
+            if encoding == "zlib+b64":
+                return zlib.decompress(packed).decode()
+            if encoding == "zstd+b64" and self._zstd_decompressor is not None:
+                return self._zstd_decompressor.decompress(packed).decode()
+        except _DECODE_ERRORS as exc:
+            raise ValueError("Invalid compressed payload") from exc
+        raise ValueError(f"Unknown payload encoding: {encoding}")
+
+
+payload_codec = PayloadCodec.from_settings()
+
+__all__ = [
+    "DecompressedSizeError",
+    "PayloadCodec",
+    "PayloadCompression",
+    "UnsupportedEncodingError",
+    "ZSTD_AVAILABLE",
+    "decompress",
+    "payload_codec",
+    "train_zstd_dictionary",
+]
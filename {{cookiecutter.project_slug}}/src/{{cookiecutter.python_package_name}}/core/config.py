@@ -32,9 +32,7 @@ def _init_log_dir(data_dir: Path) -> Path:
     try:
         log_dir.mkdir(parents=True, exist_ok=True)
     except PermissionError:
-        fallback_logs = (
-            Path(tempfile.gettempdir()) / "{{cookiecutter.project_slug}}_logs"
-        )
+        fallback_logs = Path(tempfile.gettempdir()) / "{{cookiecutter.project_slug}}_logs"
         fallback_logs.mkdir(parents=True, exist_ok=True)
         log_dir = fallback_logs
     return log_dir
@@ -85,8 +83,10 @@ class RedisSettings(BaseSettings):
     stream_name: str = "{{cookiecutter.redis_stream_name}}"
     consumer_group: str = "{{cookiecutter.redis_consumer_group}}"
     consumer_name: str = "{{cookiecutter.redis_consumer_name}}"
+    consumer_idle_timeout: int = 3600
     max_length: int = 100_000
     retention_ms: int = 3_600_000
+    idempotency_ttl: int = 86_400
     breaker_fail_max: int = 3
     breaker_reset_timeout: int = 30
 
@@ -129,13 +129,125 @@ class PerformanceSettings(BaseSettings):
     """Runtime performance and tuning parameters."""
 
     uvloop_enabled: bool = True
+    asgi_fast_path: bool = True
     worker_processes: str = "auto"
     max_concurrent_tasks: int = 1000
+    adaptive_concurrency: bool = True
+    min_concurrent_tasks: int = 1
+    initial_concurrent_tasks: int = 20
+    concurrency_latency_tolerance: float = 2.0
     task_timeout: int = 30
     max_payload_size: int = 1_048_576
+    max_batch_size: int = 1000
+    ingest_queue_size: int = 10_000
+    ingest_workers: int = 16
+    ingest_retry_after: int = 1
+    ingest_sync: bool = False
+    ws_ingest_credit: int = 1000
+    enqueue_batching: bool = False
+    enqueue_batch_max: int = 256
+    enqueue_batch_delay_ms: float = 1.0
+    enqueue_batch_target_rtt_ms: float = 5.0
+    idempotency_cache_size: int = 10_000
+    payload_compression: Literal["none", "zlib", "zstd"] = "none"
+    payload_compression_min_size: int = 1024
+    payload_compression_level: int = 3
+    payload_zstd_dictionary: str | None = None
+    json_backend: Literal["auto", "orjson", "msgspec", "json"] = "auto"
+    sanitize_mode: Literal["ingest", "lazy", "off"] = "ingest"
+    sanitize_max_depth: int = 64
+    sanitize_max_nodes: int = 100_000
+    lane_weight_high: int = 8
+    lane_weight_normal: int = 4
+    lane_weight_low: int = 1
+    stream_readers: int = 1
+    fetch_batch_max: int = 64
+    prefetch_count: int = 8
+    ack_batch_max: int = 256
     shutdown_timeout: int = 30
 
 
+class ClaimCheckSettings(BaseSettings):
+    """Configuration for offloading large payloads out of the stream."""
+
+    model_config = SettingsConfigDict(env_prefix="CLAIM_CHECK_")
+
+    threshold: int = 0
+    store: Literal["redis", "file"] = "redis"
+    ttl: int = 86_400
+    path: Path = Field(default_factory=lambda: DATA_DIR / "blobs")
+    prune_interval: float = 3600.0
+
+
+class RateLimitSettings(BaseSettings):
+    """Configuration for per-client token-bucket rate limiting."""
+
+    model_config = SettingsConfigDict(env_prefix="RATE_LIMIT_")
+
+    enabled: bool = False
+    rate: float = 50.0
+    burst: int = 100
+    lease_size: int = 10
+    lease_ttl: float = 1.0
+    identity_header: str = "x-api-key"
+
+
+class TaskStatusSettings(BaseSettings):
+    """Configuration for recording task states and results in Redis."""
+
+    model_config = SettingsConfigDict(env_prefix="TASK_STATUS_")
+
+    enabled: bool = False
+    ttl: int = 86_400
+    max_result_size: int = 65_536
+    max_lookup: int = 100
+    max_wait: int = 30
+    heartbeat: int = 15
+
+
+class SchedulerSettings(BaseSettings):
+    """Configuration for delayed tasks and retry backoff."""
+
+    model_config = SettingsConfigDict(env_prefix="SCHEDULER_")
+
+    batch_size: int = 500
+    poll_interval: float = 0.1
+    max_delay: int = 604_800
+    retry_backoff: float = 1.0
+
+
+class ReclaimSettings(BaseSettings):
+    """Configuration for recovering messages left pending by dead consumers."""
+
+    model_config = SettingsConfigDict(env_prefix="RECLAIM_")
+
+    enabled: bool = True
+    min_idle: float = 300.0
+    batch_size: int = 100
+    interval: float = 5.0
+    max_deliveries: int = 5
+
+
+class ProcessPoolSettings(BaseSettings):
+    """Configuration for the worker processes of CPU-bound handlers."""
+
+    model_config = SettingsConfigDict(env_prefix="PROCESS_POOL_")
+
+    workers: int = 0
+    max_tasks_per_child: int = 1000
+    max_pending: int = 0
+    start_method: Literal["forkserver", "spawn"] = "forkserver"
+
+
+class ThreadPoolSettings(BaseSettings):
+    """Configuration for the worker threads of blocking handlers."""
+
+    model_config = SettingsConfigDict(env_prefix="THREAD_POOL_")
+
+    workers: int = 0
+    max_pending: int = 0
+
+
 class AppSettings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env", extra="ignore", env_prefix="APP_"
@@ -150,11 +262,16 @@ class AppSettings(BaseSettings):
     jaeger: JaegerSettings = Field(default_factory=JaegerSettings)
     service: ServiceSettings = Field(default_factory=ServiceSettings)
     performance: PerformanceSettings = Field(default_factory=PerformanceSettings)
+    claim_check: ClaimCheckSettings = Field(default_factory=ClaimCheckSettings)
+    rate_limit: RateLimitSettings = Field(default_factory=RateLimitSettings)
+    task_status: TaskStatusSettings = Field(default_factory=TaskStatusSettings)
+    scheduler: SchedulerSettings = Field(default_factory=SchedulerSettings)
+    reclaim: ReclaimSettings = Field(default_factory=ReclaimSettings)
+    process_pool: ProcessPoolSettings = Field(default_factory=ProcessPoolSettings)
+    thread_pool: ThreadPoolSettings = Field(default_factory=ThreadPoolSettings)
 
     app_host: str = Field(default="0.0.0.0", description="Host for Uvicorn")
-    app_port: int = Field(
-        default={{cookiecutter.app_port_host}}, description="Порт Starlette приложения"
-    )
+    app_port: int = Field(default={{cookiecutter.app_port_host}}, description="Порт Starlette приложения")
     app_reload: bool = Field(
         default=True, description="Enable/disable Uvicorn auto-reloading"
     )
@@ -3,7 +3,6 @@
 import sys
 import logging
 import os
-import json
 from datetime import datetime
 from pathlib import Path
 from types import FrameType
@@ -14,6 +13,7 @@ import httpx
 
 _logger_initialized = False
 
+from . import codec
 from .config import settings, AppSettings
 
 
@@ -64,7 +64,7 @@ def setup_initial_logger() -> None:
     def _send_to_loki(message: Any) -> None:
         """Forward log records to a Grafana Loki instance."""
         record = message.record
-        formatted = json.dumps(
+        formatted = codec.dumps(
             {
                 "message": record.get("message", ""),
                 "level": record["level"].name,
@@ -150,8 +150,8 @@ def get_logger(name: str) -> Any:
     info_log_path: Path = info_log_dir / f"{name}.log"
     error_log_path: Path = error_log_dir / f"{name}.log"
 
-    name_filter: Callable[[Dict[str, Any]], bool] = (
-        lambda record: record["extra"].get("name") == name
+    name_filter: Callable[[Dict[str, Any]], bool] = lambda record: (
+        record["extra"].get("name") == name
     )
 
     base_file_args: Dict[str, Any] = {
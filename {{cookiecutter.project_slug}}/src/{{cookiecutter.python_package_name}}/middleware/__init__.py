@@ -1,5 +1,7 @@
 """Application middleware components."""
 
+from .fast_path import FastPathMiddleware
 from .metrics import MetricsMiddleware
+from .rate_limit import RateLimitMiddleware
 
-__all__ = ["MetricsMiddleware"]
+__all__ = ["FastPathMiddleware", "MetricsMiddleware", "RateLimitMiddleware"]
@@ -0,0 +1,73 @@
+"""Direct dispatch of the hot endpoints, bypassing route matching."""
+
+from __future__ import annotations
+
+from typing import Awaitable, Callable, Dict, Iterable, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route, Router
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..utils import TASKS_ENDPOINT_PATH
+
+Endpoint = Callable[[Request], Awaitable[Response]]
+
+
+def _raw_handler(endpoint: Endpoint) -> ASGIApp:
+    """Wrap a request/response endpoint into a bare ASGI handler."""
+
+    async def handler(scope: Scope, receive: Receive, send: Send) -> None:
+        response = await endpoint(Request(scope, receive, send))
+        await response(scope, receive, send)
+
+    return handler
+
+
+class FastPathMiddleware:
+    """
+    Serve exact-path routes without walking the router.
+
+    Starlette matches every request against each route's regex in turn and
+    wraps the endpoint in exception-handling layers. For the listed
+    ``paths`` the handlers are looked up in a dict keyed by method and path
+    instead; everything else, including ``405`` responses for these paths,
+    falls through to the router. Handlers are resolved when the middleware
+    stack is built, so routes replaced afterwards are not picked up until
+    it is rebuilt.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        router: Router,
+        paths: Iterable[str] = (TASKS_ENDPOINT_PATH, "/health"),
+    ) -> None:
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Downstream ASGI application.
+            router: Router whose routes are served directly.
+            paths: Paths without parameters to serve directly.
+        """
+        self.app = app
+        wanted = set(paths)
+        self.handlers: Dict[Tuple[str, str], ASGIApp] = {}
+        for route in router.routes:
+            if not isinstance(route, Route) or route.path not in wanted:
+                continue
+            handler = _raw_handler(route.endpoint)
+            for method in route.methods or ():
+                self.handlers.setdefault((method, route.path), handler)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            handler = self.handlers.get((scope["method"], scope["path"]))
+            if handler is not None:
+                await handler(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+__all__ = ["FastPathMiddleware"]
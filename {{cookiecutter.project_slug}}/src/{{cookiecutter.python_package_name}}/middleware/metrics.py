@@ -2,31 +2,54 @@
 
 from __future__ import annotations
 
+import asyncio
 import time
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
-from starlette.requests import Request
-from starlette.responses import Response
+
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from ..repository.redis_repo import RedisRepository
 from ..utils import TASKS_STREAM_NAME, statsd_client
 
+QUEUE_SIZE_INTERVAL = 1.0
+
+
+class MetricsMiddleware:
+    """
+    Measure request duration and queue size via StatsD.
 
-class MetricsMiddleware(BaseHTTPMiddleware):
-    """Measure request duration and queue size via StatsD."""
+    Written as plain ASGI so the response is streamed straight through
+    instead of being wrapped by ``BaseHTTPMiddleware``. The queue size is
+    sampled in the background at most once per ``queue_size_interval``
+    seconds, so requests do not each wait for an extra Redis round-trip.
+    """
 
-    def __init__(self, app: ASGIApp, repo: RedisRepository) -> None:
-        super().__init__(app)
+    def __init__(
+        self,
+        app: ASGIApp,
+        repo: RedisRepository,
+        queue_size_interval: float = QUEUE_SIZE_INTERVAL,
+    ) -> None:
+        self.app = app
         self.repo = repo
+        self.queue_size_interval = queue_size_interval
+        self._next_sample = 0.0
+        self._sampler: asyncio.Task[None] | None = None
 
-    async def dispatch(self, request: Request, call_next) -> Response:  # type: ignore[override]
-        start = time.perf_counter()
-        response = await call_next(request)
-        duration_ms = (time.perf_counter() - start) * 1000
-        await statsd_client.gauge("request_duration", duration_ms)
+    async def _report_queue_size(self) -> None:
         try:
             size = await self.repo.length(TASKS_STREAM_NAME)
             await statsd_client.gauge("task_queue_size", float(size))
         except Exception:
             pass
-        return response
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        await self.app(scope, receive, send)
+        finished = time.perf_counter()
+        await statsd_client.gauge("request_duration", (finished - start) * 1000)
+        if finished >= self._next_sample:
+            self._next_sample = finished + self.queue_size_interval
+            self._sampler = asyncio.create_task(self._report_queue_size())
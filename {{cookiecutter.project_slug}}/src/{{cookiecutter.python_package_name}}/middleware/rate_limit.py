@@ -0,0 +1,125 @@
+"""Middleware enforcing per-client rate limits on the task routes."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from typing import Collection
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.status import HTTP_429_TOO_MANY_REQUESTS
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from ..repository.redis_repo import RedisRepository
+from ..services.rate_limiter import RateLimiter
+from ..utils import TASKS_ENDPOINT_PATH, statsd_client
+
+log = get_logger(__name__)
+
+THROTTLED_BODY = b'{"detail":"Rate limit exceeded"}'
+
+
+class RateLimitMiddleware:
+    """
+    Admit task submissions through a shared token bucket.
+
+    Only ``POST`` requests to ``paths`` and frames received on the WebSocket
+    routes in ``ws_paths`` take a token; status lookups are not limited.
+    Clients are identified by ``RATE_LIMIT_IDENTITY_HEADER`` and fall back to
+    the peer address. Throttled requests get ``429`` with ``Retry-After``;
+    every limited response carries ``X-RateLimit-Limit`` and
+    ``X-RateLimit-Remaining``. A throttled WebSocket frame is held until the
+    bucket refills, which slows the producer down through its credit. If
+    Redis is unavailable requests are admitted.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        repo: RedisRepository,
+        limiter: RateLimiter | None = None,
+        paths: Collection[str] = (TASKS_ENDPOINT_PATH,),
+        ws_paths: Collection[str] = (),
+    ) -> None:
+        self.app = app
+        self.limiter = limiter or RateLimiter(repo)
+        self.paths = frozenset(paths)
+        self.ws_paths = frozenset(ws_paths)
+        self.identity_header = settings.rate_limit.identity_header
+
+    def _identity(self, scope: Scope) -> str:
+        key = Headers(scope=scope).get(self.identity_header)
+        if key:
+            return f"key:{key}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    def _paced(self, scope: Scope, receive: Receive) -> Receive:
+        identity = self._identity(scope)
+
+        async def receive_paced() -> Message:
+            message = await receive()
+            if message["type"] == "websocket.receive":
+                await self._wait_for_token(identity)
+            return message
+
+        return receive_paced
+
+    async def _wait_for_token(self, identity: str) -> None:
+        while True:
+            try:
+                decision = await self.limiter.acquire(identity)
+            except Exception as exc:  # pragma: no cover - network errors
+                log.warning("Rate limiter unavailable, admitting frame", exc_info=exc)
+                return
+            if decision.allowed:
+                return
+            await statsd_client.incr("requests.throttled")
+            await asyncio.sleep(decision.retry_after)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "websocket" and scope["path"] in self.ws_paths:
+            await self.app(scope, self._paced(scope, receive), send)
+            return
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+        try:
+            decision = await self.limiter.acquire(self._identity(scope))
+        except Exception as exc:  # pragma: no cover - network errors
+            log.warning("Rate limiter unavailable, admitting request", exc_info=exc)
+            await self.app(scope, receive, send)
+            return
+
+        headers = [
+            (b"x-ratelimit-limit", str(decision.limit).encode()),
+            (b"x-ratelimit-remaining", str(decision.remaining).encode()),
+        ]
+        if not decision.allowed:
+            await statsd_client.incr("requests.throttled")
+            retry_after = str(max(1, math.ceil(decision.retry_after)))
+            response = Response(
+                THROTTLED_BODY,
+                status_code=HTTP_429_TOO_MANY_REQUESTS,
+                media_type="application/json",
+            )
+            response.raw_headers.extend(
+                [*headers, (b"retry-after", retry_after.encode())]
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Build a new list: responses may share their header list.
+                message["headers"] = [*message.get("headers", ()), *headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -1,9 +1,10 @@
 """Custom JSON logging formatter for simplified output."""
 
-import json
 import logging
 from typing import Any, Dict
 
+from ..core import codec
+
 
 class JsonFormatter(logging.Formatter):
     """Minimal JSON formatter used for testing."""
@@ -16,4 +17,4 @@ class JsonFormatter(logging.Formatter):
         }
         if record.exc_info:
             log_record["exc_info"] = self.formatException(record.exc_info)
-        return json.dumps(log_record)
+        return codec.dumps(log_record)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+"""Side stores for payload bodies offloaded from the task stream."""
+
+import asyncio
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Protocol
+
+from ..core.config import settings
+from ..utils import TASKS_STREAM_NAME, tracer
+from .redis_repo import RedisRepository
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+class BlobNotFoundError(LookupError):
+    """Raised when an offloaded payload is missing or has expired."""
+
+
+class BlobStore(Protocol):
+    """Storage for payload bodies addressed by their SHA-256 digest."""
+
+    async def put(self, digest: str, data: str, ttl: int | None = None) -> str:
+        """
+        Store ``data`` and return the reference kept in the stream entry.
+
+        The body is kept for at least ``ttl`` seconds, the store default if
+        omitted. A body shared with other tasks never loses lifetime.
+        """
+        ...
+
+    async def touch(self, ref: str, ttl: int) -> None:
+        """Keep the body under ``ref`` for at least ``ttl`` more seconds."""
+        ...
+
+    async def get(self, ref: str) -> str:
+        """Return the body stored under ``ref``."""
+        ...
+
+
+class RedisBlobStore:
+    """Keep payload bodies in plain Redis keys that expire after ``ttl``."""
+
+    def __init__(self, repo: RedisRepository, ttl: int) -> None:
+        self.repo = repo
+        self.ttl = ttl
+        self.prefix = f"{TASKS_STREAM_NAME}:blob:"
+
+    async def put(self, digest: str, data: str, ttl: int | None = None) -> str:
+        key = f"{self.prefix}{digest}"
+        await self.repo.put_blob(key, data, ttl or self.ttl)
+        return key
+
+    async def touch(self, ref: str, ttl: int) -> None:
+        if not ref.startswith(self.prefix):
+            raise BlobNotFoundError(f"Foreign payload reference: {ref}")
+        if not await self.repo.touch_blob(ref, ttl):
+            raise BlobNotFoundError(f"Payload {ref} has expired")
+
+    async def get(self, ref: str) -> str:
+        if not ref.startswith(self.prefix):
+            raise BlobNotFoundError(f"Foreign payload reference: {ref}")
+        data = await self.repo.get_blob(ref)
+        if data is None:
+            raise BlobNotFoundError(f"Payload {ref} has expired")
+        return data
+
+
+class FileBlobStore:
+    """
+    Content-addressed blob directory, usually under ``DATA_DIR``.
+
+    Bodies are written once per digest, so identical payloads share a file.
+    Files older than ``ttl`` are removed by :meth:`prune`, which the task
+    processor runs every ``CLAIM_CHECK_PRUNE_INTERVAL`` seconds. A body kept
+    for longer gets a modification time in the future.
+    """
+
+    def __init__(self, root: Path, ttl: int) -> None:
+        self.root = root
+        self.ttl = ttl
+
+    def _path(self, digest: str) -> Path:
+        if not _DIGEST.fullmatch(digest):
+            raise BlobNotFoundError(f"Invalid payload reference: {digest}")
+        return self.root / digest[:2] / digest
+
+    def _keep(self, path: Path, ttl: int) -> None:
+        mtime = time.time() + ttl - self.ttl
+        if path.stat().st_mtime < mtime:
+            os.utime(path, (mtime, mtime))
+
+    def _write(self, path: Path, data: str, ttl: int) -> None:
+        if path.exists():
+            self._keep(path, ttl)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=path.parent)
+        tmp: str | None = name
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(data)
+            os.replace(name, path)
+            tmp = None
+        finally:
+            if tmp is not None:
+                os.unlink(tmp)
+        self._keep(path, ttl)
+
+    async def put(self, digest: str, data: str, ttl: int | None = None) -> str:
+        with tracer.start_as_current_span("запись_тела_задачи"):
+            await asyncio.to_thread(
+                self._write, self._path(digest), data, ttl or self.ttl
+            )
+            return digest
+
+    async def touch(self, ref: str, ttl: int) -> None:
+        try:
+            await asyncio.to_thread(self._keep, self._path(ref), ttl)
+        except FileNotFoundError as exc:
+            raise BlobNotFoundError(f"Payload {ref} has expired") from exc
+
+    async def get(self, ref: str) -> str:
+        with tracer.start_as_current_span("чтение_тела_задачи"):
+            try:
+                return await asyncio.to_thread(
+                    self._path(ref).read_text, encoding="utf-8"
+                )
+            except FileNotFoundError as exc:
+                raise BlobNotFoundError(f"Payload {ref} has expired") from exc
+
+    def prune(self) -> int:
+        """Delete bodies older than ``ttl`` and return how many were removed."""
+        cutoff = time.time() - self.ttl
+        removed = 0
+        for path in self.root.glob("??/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:  # pragma: no cover - concurrent prune
+                continue
+        return removed
+
+
+def create_blob_store(repo: RedisRepository) -> BlobStore:
+    """Return the blob store selected by ``CLAIM_CHECK_STORE``."""
+    claim = settings.claim_check
+    if claim.store == "file":
+        return FileBlobStore(claim.path, claim.ttl)
+    return RedisBlobStore(repo, claim.ttl)
+
+
+__all__ = [
+    "BlobNotFoundError",
+    "BlobStore",
+    "FileBlobStore",
+    "RedisBlobStore",
+    "create_blob_store",
+]
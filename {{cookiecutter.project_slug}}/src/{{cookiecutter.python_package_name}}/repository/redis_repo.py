@@ -4,16 +4,127 @@ from __future__ import annotations
 """Redis repository used for queue operations."""
 
 from datetime import timedelta
-from typing import Any, Awaitable, Callable, Dict, List, Tuple, cast
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    List,
+    Mapping,
+    Sequence,
+    Tuple,
+    cast,
+)
 
 from redis.exceptions import ResponseError
 
-from ..utils import CircuitBreaker, tracer
+from ..core import codec
+from ..utils import PRIORITY_STREAMS, CircuitBreaker, consumer_name, tracer
 
 from redis.asyncio import Redis
 
 from ..core.config import settings
 
+ADD_ONCE_SCRIPT = """
+local existing = redis.call('GET', KEYS[1])
+if existing then
+    return {0, existing}
+end
+local status_size = tonumber(ARGV[5])
+local id = redis.call(
+    'XADD', KEYS[2], 'MAXLEN', '~', ARGV[2], '*', unpack(ARGV, 6 + status_size)
+)
+redis.call('SET', KEYS[1], ARGV[3], 'EX', ARGV[1])
+if status_size > 0 then
+    redis.call('HSET', KEYS[3], unpack(ARGV, 6, 5 + status_size))
+    redis.call('EXPIRE', KEYS[3], ARGV[4])
+end
+return {1, id}
+"""
+
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local granted = math.min(requested, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+local wait = 0
+if granted == 0 then
+    wait = (1 - tokens) / rate
+end
+return {granted, tostring(tokens), tostring(wait)}
+"""
+
+# Scheduled entries name their target stream, which must be one of KEYS[2..]
+# so that every key the script touches is declared (and, on a cluster,
+# lives in the same slot). Undeclared streams fail the call before any write.
+PROMOTE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local due = redis.call(
+    'ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, tonumber(ARGV[1])
+)
+local streams = {}
+for i = 2, #KEYS do
+    streams[KEYS[i]] = true
+end
+local entries = {}
+for i, member in ipairs(due) do
+    local entry = cjson.decode(member)
+    if not streams[entry[1]] then
+        return redis.error_reply('undeclared stream ' .. tostring(entry[1]))
+    end
+    entries[i] = entry
+end
+for i, entry in ipairs(entries) do
+    redis.call('XADD', entry[1], 'MAXLEN', '~', ARGV[2], '*', unpack(entry[2]))
+    redis.call('ZREM', KEYS[1], due[i])
+end
+local moved = #due
+local head = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {moved, head[2] or '-1', tostring(now)}
+"""
+
+# Resets the idle time of the given pending messages that still belong to
+# the consumer, so the reclaimer of another worker leaves them alone. JUSTID
+# keeps the delivery counter as it is. Messages claimed by someone else in
+# the meantime are skipped and left out of the reply.
+REFRESH_SCRIPT = """
+local owned = {}
+for i = 3, #ARGV do
+    local entry = redis.call(
+        'XPENDING', KEYS[1], ARGV[1], ARGV[i], ARGV[i], 1, ARGV[2]
+    )
+    if #entry > 0 then
+        redis.call('XCLAIM', KEYS[1], ARGV[1], ARGV[2], 0, ARGV[i], 'JUSTID')
+        owned[#owned + 1] = ARGV[i]
+    end
+end
+return owned
+"""
+
+# Largest batch one promotion script call moves, keeping each call short.
+MAX_PROMOTE_BATCH = 1000
+
+# Target stream, message and due time (epoch seconds) of a scheduled task.
+ScheduledEntry = Tuple[str, Mapping[str, Any], float]
+
+# Status hash key, its fields and TTL, written together with a stream command.
+StatusWrite = Tuple[str, Mapping[str, str], int]
+
+# Stream, message id, final status and ``(channel, message)`` to publish.
+PendingAck = Tuple[str, str, StatusWrite | None, Tuple[str, str] | None]
+
 
 class RedisRepository:
     """Wrapper around Redis operations used by the service."""
@@ -26,17 +137,339 @@ class RedisRepository:
             fail_max=settings.redis.breaker_fail_max,
             timeout_duration=timedelta(seconds=settings.redis.breaker_reset_timeout),
         )
+        self._add_once: Any = self.redis.register_script(ADD_ONCE_SCRIPT)
+        self._take_tokens: Any = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self._promote: Any = self.redis.register_script(PROMOTE_SCRIPT)
+        self._refresh: Any = self.redis.register_script(REFRESH_SCRIPT)
+        self.consumer_name = consumer_name()
 
-    async def add_to_stream(self, stream_name: str, message: Dict[str, Any]) -> str:
-        """Add a message to a Redis Stream."""
+    @staticmethod
+    def _queue_status(pipe: Any, status: StatusWrite) -> None:
+        key, fields, ttl = status
+        pipe.hset(key, mapping=dict(fields))
+        pipe.expire(key, ttl)
+
+    async def add_to_stream(
+        self,
+        stream_name: str,
+        message: Dict[str, Any],
+        status: StatusWrite | None = None,
+    ) -> str:
+        """
+        Add a message to a Redis Stream.
+
+        When ``status`` is given the status hash is written in the same
+        pipeline as the ``XADD``.
+        """
         with tracer.start_as_current_span("добавление_в_redis_стрим"):
+            if status is None:
+                result: Any = await self.breaker.call_async(
+                    cast(Callable[..., Awaitable[Any]], self.redis.xadd),
+                    stream_name,
+                    message,
+                    maxlen=settings.redis.max_length,
+                )
+                return cast(str, result)
+
+            async def _execute() -> List[Any]:
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.xadd(stream_name, message, maxlen=settings.redis.max_length)
+                self._queue_status(pipe, status)
+                return await pipe.execute()
+
+            results: List[Any] = await self.breaker.call_async(_execute)
+            return cast(str, results[0])
+
+    async def add_many_to_stream(
+        self,
+        stream_name: str,
+        messages: Sequence[Dict[str, Any]],
+        statuses: Sequence[StatusWrite] | None = None,
+    ) -> List[str | Exception]:
+        """
+        Add several messages to a Redis Stream in a single pipelined round trip.
+
+        Args:
+            stream_name: Target stream.
+            messages: Messages to append, in order.
+            statuses: Status hash written after each message, aligned with
+                ``messages``.
+
+        Returns:
+            Stream ids in the same order as ``messages``. Entries rejected by
+            Redis are returned as the exception instead of raising.
+        """
+        with tracer.start_as_current_span("пакетное_добавление_в_redis_стрим"):
+            if not messages:
+                return []
+
+            async def _execute() -> List[Any]:
+                pipe = self.redis.pipeline(transaction=False)
+                for index, message in enumerate(messages):
+                    pipe.xadd(stream_name, message, maxlen=settings.redis.max_length)
+                    if statuses is not None:
+                        self._queue_status(pipe, statuses[index])
+                return await pipe.execute(raise_on_error=False)
+
+            result: List[Any] = await self.breaker.call_async(_execute)
+            if statuses is not None:
+                result = result[::3]
+            return [
+                item if isinstance(item, Exception) else cast(str, item)
+                for item in result
+            ]
+
+    async def add_to_stream_once(
+        self,
+        stream_name: str,
+        key: str,
+        message: Dict[str, Any],
+        ttl: int,
+        status: StatusWrite | None = None,
+    ) -> Tuple[bool, str]:
+        """
+        Add a message unless ``key`` was already used within ``ttl`` seconds.
+
+        The key lookup, the ``XADD`` and the ``SET ... EX`` run in one Lua
+        script, so concurrent submissions with the same key cannot both be
+        added.
+
+        Args:
+            stream_name: Target stream.
+            key: Redis key that records the submission.
+            message: Message to append; its ``task_id`` is stored under ``key``.
+            ttl: Seconds the key is kept.
+            status: Status hash written by the same script if the message is
+                added.
+
+        Returns:
+            ``(True, stream_id)`` when the message was added, or
+            ``(False, task_id)`` with the task id stored by the first
+            submission.
+        """
+        with tracer.start_as_current_span("однократное_добавление_в_redis_стрим"):
+            fields = [part for item in message.items() for part in item]
+            keys = [key, stream_name]
+            status_ttl, status_fields = 0, []
+            if status is not None:
+                status_key, mapping, status_ttl = status
+                keys.append(status_key)
+                status_fields = [part for item in mapping.items() for part in item]
             result: Any = await self.breaker.call_async(
-                cast(Callable[..., Awaitable[Any]], self.redis.xadd),
-                stream_name,
-                message,
-                maxlen=settings.redis.max_length,
+                self._add_once,
+                keys=keys,
+                args=[
+                    ttl,
+                    settings.redis.max_length,
+                    message["task_id"],
+                    status_ttl,
+                    len(status_fields),
+                    *status_fields,
+                    *fields,
+                ],
+            )
+            added, value = result
+            return bool(int(added)), cast(str, value)
+
+    @staticmethod
+    def _schedule_member(stream_name: str, message: Mapping[str, Any]) -> str:
+        """Encode a scheduled message as the sorted set member read by Lua."""
+        return codec.dumps(
+            [stream_name, [str(part) for item in message.items() for part in item]]
+        )
+
+    async def add_to_schedule(
+        self,
+        set_name: str,
+        entries: Sequence[ScheduledEntry],
+        statuses: Sequence[StatusWrite] | None = None,
+    ) -> int:
+        """
+        Store messages in a sorted set until they are due.
+
+        Every entry is kept as a member scored by its due time in
+        milliseconds; :meth:`promote_due` later moves it into its stream.
+        All entries and their status hashes are written in one pipeline.
+
+        Args:
+            set_name: Sorted set holding scheduled messages.
+            entries: Target stream, message and due time of each task.
+            statuses: Status hash written for each entry.
+
+        Returns:
+            Number of entries added.
+        """
+        with tracer.start_as_current_span("планирование_задач"):
+            if not entries:
+                return 0
+            mapping = {
+                self._schedule_member(stream, message): int(due * 1000)
+                for stream, message, due in entries
+            }
+
+            async def _execute() -> List[Any]:
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.zadd(set_name, mapping)
+                for status in statuses or ():
+                    self._queue_status(pipe, status)
+                return await pipe.execute()
+
+            results: List[Any] = await self.breaker.call_async(_execute)
+            return cast(int, results[0])
+
+    async def promote_due(
+        self,
+        set_name: str,
+        limit: int,
+        streams: Collection[str] = tuple(PRIORITY_STREAMS.values()),
+    ) -> Tuple[int, float | None]:
+        """
+        Move up to ``limit`` due messages from ``set_name`` into their streams.
+
+        The range query, the ``XADD`` calls and the ``ZREM`` run in one Lua
+        script against the Redis clock, so several workers can promote from
+        the same set without moving a message twice. ``limit`` is capped at
+        :data:`MAX_PROMOTE_BATCH`.
+
+        Args:
+            set_name: Sorted set holding scheduled messages.
+            limit: Maximum messages to move.
+            streams: Every stream a scheduled message may target; they are
+                passed to the script as keys. A due message for any other
+                stream fails the call and nothing is moved.
+
+        Returns:
+            The number of messages moved and the seconds until the next
+            message is due, or ``None`` if the set is empty.
+        """
+        with tracer.start_as_current_span("перенос_отложенных_задач"):
+            result: Any = await self.breaker.call_async(
+                self._promote,
+                keys=[set_name, *streams],
+                args=[min(limit, MAX_PROMOTE_BATCH), settings.redis.max_length],
             )
-            return cast(str, result)
+            moved, head, now = result
+            head_ms = float(head)
+            if head_ms < 0:
+                return int(moved), None
+            return int(moved), max(0.0, (head_ms - float(now)) / 1000)
+
+    async def reschedule(
+        self,
+        stream_name: str,
+        message_id: str,
+        set_name: str,
+        message: Mapping[str, Any],
+        due: float,
+        *,
+        status: StatusWrite | None = None,
+    ) -> None:
+        """
+        Acknowledge a message and schedule ``message`` to run again at ``due``.
+
+        The ``ZADD``, the ``XACK`` and the optional status write run in one
+        ``MULTI``/``EXEC`` transaction, so a retry waiting for its turn does
+        not stay pending in the consumer group, and an acknowledged message
+        is never left without its retry.
+        """
+        with tracer.start_as_current_span("повторное_планирование_задачи"):
+            member = self._schedule_member(stream_name, message)
+
+            async def _execute() -> List[Any]:
+                pipe = self.redis.pipeline(transaction=True)
+                pipe.zadd(set_name, {member: int(due * 1000)})
+                pipe.xack(stream_name, settings.redis.consumer_group, message_id)
+                if status is not None:
+                    self._queue_status(pipe, status)
+                return await pipe.execute()
+
+            await self.breaker.call_async(_execute)
+
+    async def take_tokens(
+        self, key: str, rate: float, burst: int, count: int
+    ) -> Tuple[int, float, float]:
+        """
+        Take up to ``count`` tokens from the bucket stored at ``key``.
+
+        The refill and the withdrawal run in one Lua script using the Redis
+        clock, so every worker sees the same bucket.
+
+        Args:
+            key: Bucket key.
+            rate: Tokens added per second.
+            burst: Bucket capacity.
+            count: Tokens requested.
+
+        Returns:
+            ``(granted, remaining, retry_after)`` where ``retry_after`` is the
+            number of seconds until a token is available when none was granted.
+        """
+        with tracer.start_as_current_span("получение_токенов"):
+            result: Any = await self.breaker.call_async(
+                self._take_tokens, keys=[key], args=[rate, burst, count]
+            )
+            granted, remaining, retry_after = result
+            return int(granted), float(remaining), float(retry_after)
+
+    async def put_blob(self, key: str, value: str, ttl: int) -> None:
+        """
+        Store a payload body under ``key`` for at least ``ttl`` seconds.
+
+        Bodies are shared by tasks with the same digest, so an existing key
+        keeps a longer expiry (``EXPIRE ... GT``).
+        """
+        with tracer.start_as_current_span("запись_тела_задачи"):
+
+            async def _execute() -> List[Any]:
+                pipe = self.redis.pipeline(transaction=True)
+                pipe.set(key, value, nx=True, ex=ttl)
+                pipe.expire(key, ttl, gt=True)
+                return await pipe.execute()
+
+            await self.breaker.call_async(_execute)
+
+    async def touch_blob(self, key: str, ttl: int) -> bool:
+        """
+        Keep the body under ``key`` for at least ``ttl`` more seconds.
+
+        Returns:
+            ``False`` if the body has already expired.
+        """
+        with tracer.start_as_current_span("продление_тела_задачи"):
+
+            async def _execute() -> List[Any]:
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.expire(key, ttl, gt=True)
+                pipe.exists(key)
+                return await pipe.execute()
+
+            results: List[Any] = await self.breaker.call_async(_execute)
+            return bool(results[1])
+
+    async def get_blob(self, key: str) -> str | None:
+        """Return the payload body stored under ``key``, if it still exists."""
+        with tracer.start_as_current_span("чтение_тела_задачи"):
+            result: Any = await self.breaker.call_async(
+                cast(Callable[..., Awaitable[Any]], self.redis.get), key
+            )
+            return cast(str | None, result)
+
+    async def listen(self, channel: str) -> AsyncIterator[str]:
+        """
+        Yield messages published to ``channel``.
+
+        The subscription holds one dedicated connection until the iterator is
+        closed.
+        """
+        pubsub: Any = self.redis.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    yield cast(str, message["data"])
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
 
     async def ping(self) -> bool:
         """Check Redis connectivity."""
@@ -61,14 +494,186 @@ class RedisRepository:
                 if "BUSYGROUP" not in str(exc):
                     raise
 
+    async def delete_idle_consumers(
+        self, stream_name: str, idle_ms: int, names: Collection[str] | None = None
+    ) -> List[str]:
+        """
+        Remove consumers that hold no pending messages from the group.
+
+        ``XGROUP DELCONSUMER`` drops the pending entries of a consumer, so
+        consumers that still own messages are always kept; they are left for
+        another consumer to claim.
+
+        Args:
+            stream_name: Stream whose consumer group is cleaned up.
+            idle_ms: Minimum idle time of a removed consumer.
+            names: Only consider these consumers, if given.
+
+        Returns:
+            Names of the removed consumers.
+        """
+        with tracer.start_as_current_span("очистка_консьюмеров"):
+            try:
+                consumers: Any = await self.breaker.call_async(
+                    cast(Callable[..., Awaitable[Any]], self.redis.xinfo_consumers),
+                    stream_name,
+                    settings.redis.consumer_group,
+                )
+            except ResponseError as exc:
+                if "NOGROUP" in str(exc) or "no such key" in str(exc):
+                    return []
+                raise
+            idle = [
+                cast(str, consumer["name"])
+                for consumer in consumers
+                if int(consumer["pending"]) == 0
+                and int(consumer["idle"]) >= idle_ms
+                and (names is None or consumer["name"] in names)
+            ]
+            if not idle:
+                return []
+
+            async def _execute() -> List[Any]:
+                pipe = self.redis.pipeline(transaction=False)
+                for name in idle:
+                    pipe.xgroup_delconsumer(
+                        stream_name, settings.redis.consumer_group, name
+                    )
+                return await pipe.execute()
+
+            await self.breaker.call_async(_execute)
+            return idle
+
+    async def claim_stale(
+        self,
+        stream_name: str,
+        consumer: str,
+        min_idle_ms: int,
+        start_id: str = "0-0",
+        count: int = 100,
+    ) -> Tuple[str, List[Tuple[str, Dict[str, Any], int]]]:
+        """
+        Take over messages left pending by other consumers with XAUTOCLAIM.
+
+        Args:
+            stream_name: Stream whose consumer group is scanned.
+            consumer: Consumer that becomes the owner of claimed messages.
+            min_idle_ms: Minimum time since the last delivery of a message.
+            start_id: Pending-entries cursor returned by the previous call.
+            count: Maximum number of pending entries examined.
+
+        Returns:
+            The cursor for the next call (``"0-0"`` once the whole list was
+            scanned) and the claimed ``(message_id, fields, deliveries)``
+            entries, where ``deliveries`` counts this claim too. Entries
+            whose message was already trimmed from the stream are dropped
+            from the pending list instead of returned.
+        """
+        with tracer.start_as_current_span("перехват_зависших_сообщений"):
+            result: Any = await self.breaker.call_async(
+                cast(Callable[..., Awaitable[Any]], self.redis.xautoclaim),
+                stream_name,
+                settings.redis.consumer_group,
+                consumer,
+                min_idle_ms,
+                start_id=start_id,
+                count=count,
+            )
+            claimed: List[Tuple[str, Dict[str, Any]]] = []
+            trimmed: List[str] = []
+            for msg_id, data in result[1]:
+                if data:
+                    claimed.append((cast(str, msg_id), cast(Dict[str, Any], data)))
+                elif msg_id is not None:
+                    # Redis 6.2 still returns trimmed entries, without fields
+                    trimmed.append(cast(str, msg_id))
+            if trimmed:
+                await self.breaker.call_async(
+                    cast(Callable[..., Awaitable[Any]], self.redis.xack),
+                    stream_name,
+                    settings.redis.consumer_group,
+                    *trimmed,
+                )
+            counts = await self._deliveries(
+                stream_name, [msg_id for msg_id, _ in claimed]
+            )
+            messages = [
+                (msg_id, data, counts.get(msg_id, 1)) for msg_id, data in claimed
+            ]
+            return cast(str, result[0]), messages
+
+    async def _deliveries(
+        self, stream_name: str, message_ids: Sequence[str]
+    ) -> Dict[str, int]:
+        """Return how often each pending message was delivered, in one trip."""
+        if not message_ids:
+            return {}
+
+        async def _execute() -> List[Any]:
+            pipe = self.redis.pipeline(transaction=False)
+            for msg_id in message_ids:
+                pipe.xpending_range(
+                    stream_name,
+                    settings.redis.consumer_group,
+                    min=msg_id,
+                    max=msg_id,
+                    count=1,
+                )
+            return await pipe.execute()
+
+        entries = await self.breaker.call_async(_execute)
+        return {
+            str(entry[0]["message_id"]): int(entry[0]["times_delivered"])
+            for entry in entries
+            if entry
+        }
+
+    async def refresh_pending(
+        self, stream_name: str, consumer: str, message_ids: Sequence[str]
+    ) -> List[str]:
+        """
+        Reset the idle time of pending messages still owned by ``consumer``.
+
+        A message kept in a local buffer stays idle in the pending list
+        until it is acknowledged; refreshing it keeps other workers from
+        reclaiming it while it waits for a slot.
+
+        Returns:
+            The ids that still belonged to ``consumer``; the others were
+            taken over by another consumer and must not be processed here.
+        """
+        if not message_ids:
+            return []
+        with tracer.start_as_current_span("продление_ожидающих_сообщений"):
+            owned: Any = await self.breaker.call_async(
+                self._refresh,
+                keys=[stream_name],
+                args=[settings.redis.consumer_group, consumer, *message_ids],
+            )
+            return [str(msg_id) for msg_id in owned]
+
+    async def pending_count(self, stream_name: str) -> int:
+        """Return the number of delivered but unacknowledged messages."""
+        with tracer.start_as_current_span("размер_списка_ожидания"):
+            summary: Any = await self.breaker.call_async(
+                cast(Callable[..., Awaitable[Any]], self.redis.xpending),
+                stream_name,
+                settings.redis.consumer_group,
+            )
+            return int(summary["pending"])
+
     async def fetch(
-        self, stream_name: str, count: int = 1, block_ms: int = 1000
+        self,
+        stream_name: str,
+        count: int = 1,
+        block_ms: int = 1000,
+        consumer: str | None = None,
     ) -> List[Tuple[str, Dict[str, Any]]]:
         """Read messages from a stream using XREADGROUP."""
         result: Any = await self.breaker.call_async(
             cast(Callable[..., Awaitable[Any]], self.redis.xreadgroup),
             settings.redis.consumer_group,
-            settings.redis.consumer_name,
+            consumer or self.consumer_name,
             streams={stream_name: ">"},
             count=count,
             block=block_ms,
@@ -79,16 +684,146 @@ class RedisRepository:
                 messages.append((cast(str, msg_id), cast(Dict[str, Any], data)))
         return messages
 
-    async def ack(self, stream_name: str, message_id: str) -> int:
-        """Acknowledge message processing."""
-        with tracer.start_as_current_span("подтверждение"):
+    async def fetch_lanes(
+        self,
+        stream_names: Sequence[str],
+        count: int = 1,
+        block_ms: int | None = 1000,
+        consumer: str | None = None,
+    ) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Read new messages from several streams with one XREADGROUP call.
+
+        Args:
+            stream_names: Streams to read, each with its own consumer group.
+            count: Maximum number of messages per stream.
+            block_ms: Milliseconds to wait when every stream is empty, or
+                ``None`` to return immediately.
+            consumer: Consumer name to read as; defaults to the name of this
+                repository's process.
+
+        Returns:
+            ``(stream, message_id, fields)`` tuples grouped by stream.
+        """
+        with tracer.start_as_current_span("чтение_очередей"):
             result: Any = await self.breaker.call_async(
-                cast(Callable[..., Awaitable[Any]], self.redis.xack),
-                stream_name,
+                cast(Callable[..., Awaitable[Any]], self.redis.xreadgroup),
                 settings.redis.consumer_group,
-                message_id,
+                consumer or self.consumer_name,
+                streams=dict.fromkeys(stream_names, ">"),
+                count=count,
+                block=block_ms,
             )
-            return cast(int, result)
+            messages: List[Tuple[str, str, Dict[str, Any]]] = []
+            for stream, msgs in result or []:
+                for msg_id, data in msgs:
+                    messages.append(
+                        (
+                            cast(str, stream),
+                            cast(str, msg_id),
+                            cast(Dict[str, Any], data),
+                        )
+                    )
+            return messages
+
+    async def ack(
+        self,
+        stream_name: str,
+        message_id: str,
+        status: StatusWrite | None = None,
+        notify: Tuple[str, str] | None = None,
+    ) -> int:
+        """
+        Acknowledge message processing.
+
+        When ``status`` is given the final task status is written in the same
+        pipeline as the ``XACK``; ``notify`` adds a ``(channel, message)``
+        ``PUBLISH`` to that pipeline.
+        """
+        with tracer.start_as_current_span("подтверждение"):
+            if status is None:
+                result: Any = await self.breaker.call_async(
+                    cast(Callable[..., Awaitable[Any]], self.redis.xack),
+                    stream_name,
+                    settings.redis.consumer_group,
+                    message_id,
+                )
+                return cast(int, result)
+
+            async def _execute() -> List[Any]:
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.xack(stream_name, settings.redis.consumer_group, message_id)
+                self._queue_status(pipe, status)
+                if notify is not None:
+                    pipe.publish(*notify)
+                return await pipe.execute()
+
+            results: List[Any] = await self.breaker.call_async(_execute)
+            return cast(int, results[0])
+
+    async def ack_many(self, acks: Sequence[PendingAck]) -> List[int | Exception]:
+        """
+        Acknowledge several messages in a single pipelined round trip.
+
+        Each acknowledgement carries its optional status write and
+        completion event, as in :meth:`ack`.
+
+        Returns:
+            The ``XACK`` result for every entry of ``acks``, in order. Entries
+            rejected by Redis are returned as the exception instead of raising.
+        """
+        with tracer.start_as_current_span("пакетное_подтверждение"):
+            if not acks:
+                return []
+
+            async def _execute() -> List[Any]:
+                pipe = self.redis.pipeline(transaction=False)
+                for stream_name, message_id, status, notify in acks:
+                    pipe.xack(stream_name, settings.redis.consumer_group, message_id)
+                    if status is not None:
+                        self._queue_status(pipe, status)
+                    if notify is not None:
+                        pipe.publish(*notify)
+                return await pipe.execute(raise_on_error=False)
+
+            results: List[Any] = await self.breaker.call_async(_execute)
+            acked: List[int | Exception] = []
+            index = 0
+            for _, _, status, notify in acks:
+                acked.append(results[index])
+                index += 1 + (2 if status is not None else 0) + (notify is not None)
+            return acked
+
+    async def set_status(self, status: StatusWrite) -> None:
+        """Write a task status hash and refresh its TTL."""
+        with tracer.start_as_current_span("запись_статуса"):
+
+            async def _execute() -> List[Any]:
+                pipe = self.redis.pipeline(transaction=False)
+                self._queue_status(pipe, status)
+                return await pipe.execute()
+
+            await self.breaker.call_async(_execute)
+
+    async def get_statuses(self, keys: Sequence[str]) -> List[Dict[str, str]]:
+        """
+        Read several status hashes in one pipelined round trip.
+
+        Returns:
+            The hash for every key in order; missing keys give an empty dict.
+        """
+        with tracer.start_as_current_span("чтение_статусов"):
+            if not keys:
+                return []
+
+            async def _execute() -> List[Any]:
+                pipe = self.redis.pipeline(transaction=False)
+                for key in keys:
+                    pipe.hgetall(key)
+                return await pipe.execute()
+
+            result: List[Any] = await self.breaker.call_async(_execute)
+            return [cast(Dict[str, str], item or {}) for item in result]
 
     async def length(self, stream_name: str) -> int:
         """Return the length of a Redis Stream."""
@@ -99,4 +834,13 @@ class RedisRepository:
             return cast(int, result)
 
 
-__all__ = ["RedisRepository"]
+__all__ = [
+    "ADD_ONCE_SCRIPT",
+    "PROMOTE_SCRIPT",
+    "REFRESH_SCRIPT",
+    "PendingAck",
+    "RedisRepository",
+    "ScheduledEntry",
+    "StatusWrite",
+    "TOKEN_BUCKET_SCRIPT",
+]
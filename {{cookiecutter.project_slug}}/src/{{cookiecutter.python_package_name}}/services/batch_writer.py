@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+"""Coalescing writer that turns concurrent commands into pipelined batches."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Sequence, Set, Tuple
+
+from ..utils import statsd_client
+
+type SendBatch[T, R] = Callable[[Sequence[T]], Awaitable[List[R | Exception]]]
+
+
+class BatchWriter[T, R]:
+    """
+    Collect concurrent writes and send them with one round-trip.
+
+    A write waits at most ``max_delay`` seconds for company before its batch
+    is sent; a batch that reaches the current size limit is sent at once.
+    While ``max_in_flight`` batches are waiting for Redis, new writes keep
+    accumulating, so batches grow with the round-trip time on their own.
+
+    The size limit is adjusted after every batch from the observed round-trip
+    time: it doubles while full batches come back within ``target_rtt`` of
+    the fastest round-trip seen so far and halves when larger batches push
+    the round-trip past that budget. A slow but steady Redis therefore keeps
+    large batches, while batching stops adding latency once Redis is
+    saturated.
+    """
+
+    def __init__(
+        self,
+        send: SendBatch[T, R],
+        *,
+        max_batch: int,
+        max_delay: float,
+        target_rtt: float,
+        max_in_flight: int = 2,
+        metric: str = "enqueue.batch.size",
+    ) -> None:
+        """
+        Initialize the writer.
+
+        Args:
+            send: Coroutine writing a batch and returning one result or
+                exception per message, in order.
+            max_batch: Upper bound for the batch size.
+            max_delay: Seconds a write may wait for a batch to fill.
+            target_rtt: Seconds a batch may add to the fastest observed
+                round-trip before the batch size is reduced.
+            max_in_flight: Number of batches allowed to wait for Redis at once.
+            metric: Gauge reporting the size of every sent batch.
+        """
+        self.send = send
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.target_rtt = target_rtt
+        self.max_in_flight = max_in_flight
+        self.metric = metric
+        self.batch_size = min(16, max_batch)
+        self.rtt = 0.0
+        self.min_rtt = float("inf")
+        self._pending: List[Tuple[T, asyncio.Future[R]]] = []
+        self._in_flight = 0
+        self._sending: Set[asyncio.Task[None]] = set()
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def write(self, message: T) -> R:
+        """
+        Add ``message`` to the next batch and wait for its result.
+
+        Raises:
+            Exception: The error reported for this message by ``send``.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[R] = loop.create_future()
+        self._pending.append((message, future))
+        if len(self._pending) >= self.batch_size:
+            self._kick()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._kick)
+        return await future
+
+    def _kick(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending and self._in_flight < self.max_in_flight:
+            batch = self._pending[: self.batch_size]
+            del self._pending[: self.batch_size]
+            self._in_flight += 1
+            task = asyncio.get_running_loop().create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def close(self) -> None:
+        """Send the writes still waiting and wait for every batch in flight."""
+        self._kick()
+        while self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+
+    async def _send(self, batch: List[Tuple[T, asyncio.Future[R]]]) -> None:
+        started = time.perf_counter()
+        results: List[Any]
+        try:
+            results = await self.send([message for message, _ in batch])
+        except Exception as exc:
+            results = [exc] * len(batch)
+        rtt = time.perf_counter() - started
+        for (_, future), result in zip(batch, results, strict=True):
+            if future.done():  # pragma: no cover - caller cancelled
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        self._in_flight -= 1
+        self._adapt(len(batch), rtt)
+        if self._pending:
+            self._kick()
+        await statsd_client.gauge(self.metric, len(batch))
+
+    def _adapt(self, sent: int, rtt: float) -> None:
+        self.rtt = rtt if not self.rtt else 0.8 * self.rtt + 0.2 * rtt
+        self.min_rtt = min(self.min_rtt, rtt)
+        if self.rtt - self.min_rtt > self.target_rtt and self.batch_size > 1:
+            self.batch_size = max(1, self.batch_size // 2)
+        elif sent >= self.batch_size and self.batch_size < self.max_batch:
+            self.batch_size = min(self.max_batch, self.batch_size * 2)
+
+
+__all__ = ["BatchWriter", "SendBatch"]
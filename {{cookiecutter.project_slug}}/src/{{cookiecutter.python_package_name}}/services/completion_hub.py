@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+"""In-process fan-out of task completion events to waiting requests."""
+
+import asyncio
+from typing import Any, Dict, Iterable, List, Set
+
+from ..core.logging_config import get_logger
+from ..utils import statsd_client
+from .task_status import COMPLETION_CHANNEL, TaskStatusCodec
+from .tasks_service import TasksService
+
+# Preserve the original sleep so tests patching ``asyncio.sleep`` do not
+# affect the reconnect backoff.
+_yield_sleep = asyncio.sleep
+
+log = get_logger(__name__)
+
+
+class CompletionHub:
+    """
+    Deliver task completions to every request waiting on them.
+
+    Each worker process holds a single subscription to
+    ``COMPLETION_CHANNEL``, opened at startup or when the first request
+    starts waiting.
+    Published completions resolve in-memory futures keyed by task id, so
+    any number of waiting clients costs one Redis connection. Completions
+    published while the subscription is reconnecting are missed; callers
+    re-read the status store when their wait ends.
+    """
+
+    def __init__(
+        self, service: TasksService, channel: str = COMPLETION_CHANNEL
+    ) -> None:
+        """
+        Initialize the hub.
+
+        Args:
+            service: Service whose repository provides the subscription.
+            channel: Pub/sub channel the processor publishes completions to.
+        """
+        self.service = service
+        self.channel = channel
+        self._waiters: Dict[str, Set[asyncio.Future[Dict[str, Any]]]] = {}
+        self._listener: asyncio.Task[None] | None = None
+
+    @property
+    def waiting(self) -> int:
+        """Number of task ids with at least one waiting request."""
+        return len(self._waiters)
+
+    def _ensure_listening(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        delay = 0.1
+        while True:
+            try:
+                async for message in self.service.repo.listen(self.channel):
+                    delay = 0.1
+                    self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # pragma: no cover - network errors
+                log.warning("Completion subscription lost, reconnecting", exc_info=exc)
+                await statsd_client.incr("completion.reconnects")
+            await _yield_sleep(delay)
+            delay = min(delay * 2, 5.0)
+
+    def _dispatch(self, message: str) -> None:
+        try:
+            status = TaskStatusCodec.decode_event(message)
+        except (KeyError, TypeError, ValueError) as exc:
+            log.warning("Ignoring malformed completion event", exc_info=exc)
+            return
+        for future in self._waiters.pop(status["task_id"], ()):
+            if not future.done():
+                future.set_result(status)
+
+    async def start(self) -> None:
+        """Open the subscription before the first request waits."""
+        self._ensure_listening()
+
+    def register(
+        self, task_ids: Iterable[str]
+    ) -> Dict[str, asyncio.Future[Dict[str, Any]]]:
+        """
+        Start waiting for ``task_ids`` and return one future per id.
+
+        Register before reading the current statuses so that a completion
+        landing in between is not lost. Every call must be paired with
+        :meth:`release`.
+        """
+        self._ensure_listening()
+        loop = asyncio.get_running_loop()
+        futures: Dict[str, asyncio.Future[Dict[str, Any]]] = {}
+        for task_id in task_ids:
+            future: asyncio.Future[Dict[str, Any]] = loop.create_future()
+            self._waiters.setdefault(task_id, set()).add(future)
+            futures[task_id] = future
+        return futures
+
+    def release(self, futures: Dict[str, asyncio.Future[Dict[str, Any]]]) -> None:
+        """Stop waiting on ``futures`` returned by :meth:`register`."""
+        for task_id, future in futures.items():
+            future.cancel()
+            waiters = self._waiters.get(task_id)
+            if waiters is None:
+                continue
+            waiters.discard(future)
+            if not waiters:
+                del self._waiters[task_id]
+
+    async def stop(self) -> None:
+        """Close the subscription and cancel all waiters."""
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
+        pending: List[asyncio.Future[Dict[str, Any]]] = [
+            future for waiters in self._waiters.values() for future in waiters
+        ]
+        for future in pending:
+            future.cancel()
+        self._waiters.clear()
+
+
+__all__ = ["CompletionHub"]
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+"""Concurrency limit that adapts to handler latency and errors."""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque
+
+from ..core.config import settings
+from ..utils import statsd_client
+
+# Latency below this is never treated as congestion, so scheduling jitter
+# around sub-millisecond handlers does not shrink the limit.
+LATENCY_SLACK: float = 0.005
+
+
+class AdaptiveLimiter:
+    """
+    Limit concurrent tasks with additive increase, multiplicative decrease.
+
+    Every finished task reports its latency and whether it failed. The
+    limiter keeps a moving average of both and the fastest latency seen. An
+    average latency above ``tolerance`` times that baseline (plus
+    ``LATENCY_SLACK``), or an error rate above ``max_error_rate``, means the
+    handlers' downstream is saturated: the limit is multiplied by
+    ``backoff``, at most once per average latency so that one burst of slow
+    calls counts once. Otherwise, while at least half of the limit is in
+    use, the limit grows by one per limit's worth of tasks. Until the first
+    decrease it grows by one per task instead (slow start), doubling every
+    round.
+
+    If the limit is already at ``min_limit`` and tasks are still slow, the
+    downstream has become slower at any concurrency, and the current
+    latency becomes the new baseline. The limit stays between ``min_limit``
+    and ``max_limit``; with ``adaptive`` off it is fixed at ``max_limit``.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_limit: int = settings.performance.max_concurrent_tasks,
+        min_limit: int = settings.performance.min_concurrent_tasks,
+        initial_limit: int = settings.performance.initial_concurrent_tasks,
+        tolerance: float = settings.performance.concurrency_latency_tolerance,
+        adaptive: bool = settings.performance.adaptive_concurrency,
+        backoff: float = 0.9,
+        max_error_rate: float = 0.1,
+        metric: str = "concurrency.limit",
+    ) -> None:
+        """
+        Initialize the limiter.
+
+        Args:
+            max_limit: Upper bound of the limit.
+            min_limit: Lower bound of the limit.
+            initial_limit: Limit before any task has finished.
+            tolerance: Ratio of average to fastest latency that counts as
+                congestion.
+            adaptive: Whether to adapt the limit at all.
+            backoff: Factor applied to the limit on congestion.
+            max_error_rate: Average share of failed tasks that counts as
+                congestion.
+            metric: Gauge reporting the current limit.
+        """
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.adaptive = adaptive
+        start = initial_limit if adaptive else self.max_limit
+        self.limit = float(max(self.min_limit, min(start, self.max_limit)))
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.max_error_rate = max_error_rate
+        self.metric = metric
+        self.latency = 0.0
+        self.min_latency = float("inf")
+        self.error_rate = 0.0
+        self._slow_start = True
+        self._decreased_at = 0.0
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future[None]] = deque()
+        self._reported = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Slots currently held."""
+        return self._in_flight
+
+    @property
+    def available(self) -> int:
+        """Slots that can be taken without waiting."""
+        return max(0, int(self.limit) - self._in_flight)
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting while the limit is reached."""
+        if not self._waiters and self._in_flight < int(self.limit):
+            self._in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # woken up with a slot just before being cancelled
+                self.release()
+            raise
+
+    def release(self, latency: float | None = None, failed: bool = False) -> None:
+        """
+        Return a slot, adapting the limit if the slot ran a task.
+
+        Args:
+            latency: Seconds the task took; ``None`` if no task ran.
+            failed: Whether the task failed or timed out.
+        """
+        self._in_flight -= 1
+        if latency is not None and self.adaptive:
+            self._adapt(latency, failed)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                self._in_flight += 1
+                future.set_result(None)
+
+    def _adapt(self, latency: float, failed: bool) -> None:
+        self.error_rate = 0.8 * self.error_rate + 0.2 * failed
+        if not failed:
+            self.latency = (
+                latency if not self.latency else 0.8 * self.latency + 0.2 * latency
+            )
+            self.min_latency = min(self.min_latency, latency)
+        slow = self.latency > self.min_latency * self.tolerance + LATENCY_SLACK
+        if slow and not failed and self.limit <= self.min_limit:
+            self.min_latency = self.latency
+            slow = False
+        if slow or self.error_rate > self.max_error_rate:
+            now = time.monotonic()
+            if now - self._decreased_at >= (self.latency or latency):
+                self._decreased_at = now
+                self._slow_start = False
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+            return
+        if self._in_flight + 1 < self.limit / 2:
+            # the limit is not what holds throughput back
+            return
+        step = 1.0 if self._slow_start else 1.0 / self.limit
+        self.limit = min(self.max_limit, self.limit + step)
+
+    async def report(self) -> None:
+        """Send the limit as a gauge if it changed since the last report."""
+        limit = int(self.limit)
+        if limit != self._reported:
+            self._reported = limit
+            await statsd_client.gauge(self.metric, limit)
+
+
+__all__ = ["AdaptiveLimiter"]
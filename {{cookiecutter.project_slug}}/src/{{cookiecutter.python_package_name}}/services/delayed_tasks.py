@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+"""Promotion of delayed tasks from a Redis sorted set into their streams."""
+
+import asyncio
+
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from ..repository.redis_repo import MAX_PROMOTE_BATCH, RedisRepository
+from ..utils import SCHEDULED_SET_NAME, statsd_client
+
+# Preserve the original sleep so tests patching ``asyncio.sleep`` do not
+# affect the polling interval.
+_yield_sleep = asyncio.sleep
+
+log = get_logger(__name__)
+
+
+class DelayedTaskScheduler:
+    """
+    Move tasks whose due time has passed into their priority streams.
+
+    Delayed tasks and retries wait in ``SCHEDULED_SET_NAME``, scored by due
+    time. Each pass runs one Lua script that moves up to ``batch_size`` due
+    tasks; a full batch is followed immediately by the next pass. Otherwise
+    the loop sleeps until the next task is due, but never longer than
+    ``poll_interval``, so tasks scheduled by other workers are picked up
+    with at most that much delay. Every worker may run a scheduler; the
+    script is atomic, so a task is moved exactly once.
+    """
+
+    def __init__(
+        self,
+        repo: RedisRepository,
+        set_name: str = SCHEDULED_SET_NAME,
+        batch_size: int = settings.scheduler.batch_size,
+        poll_interval: float = settings.scheduler.poll_interval,
+    ) -> None:
+        """
+        Initialize the scheduler.
+
+        Args:
+            repo: Repository running the promotion script.
+            set_name: Sorted set holding scheduled tasks.
+            batch_size: Maximum tasks moved per script call, at most
+                ``MAX_PROMOTE_BATCH``.
+            poll_interval: Longest pause between two passes, in seconds.
+        """
+        self.repo = repo
+        self.set_name = set_name
+        self.batch_size = max(1, min(batch_size, MAX_PROMOTE_BATCH))
+        self.poll_interval = poll_interval
+        self._task: asyncio.Task[None] | None = None
+
+    async def promote(self) -> float:
+        """
+        Run one promotion pass.
+
+        Returns:
+            Seconds to wait before the next pass.
+        """
+        try:
+            moved, next_due = await self.repo.promote_due(
+                self.set_name, self.batch_size
+            )
+        except Exception as exc:  # pragma: no cover - network errors
+            log.warning("Failed to promote scheduled tasks", exc_info=exc)
+            return self.poll_interval
+        if moved:
+            await statsd_client.incr("tasks.scheduled.promoted", moved)
+        if moved >= self.batch_size:
+            return 0.0
+        if next_due is None:
+            return self.poll_interval
+        return min(self.poll_interval, next_due)
+
+    async def _run(self) -> None:
+        while True:
+            await _yield_sleep(await self.promote())
+
+    async def start(self) -> None:
+        """Start promoting in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop promoting; tasks that are not due yet stay in the set."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+__all__ = ["DelayedTaskScheduler"]
@@ -0,0 +1,53 @@
+"""Weighted fair selection between task priority lanes."""
+
+from typing import Dict, Iterable
+
+
+class WeightedFairScheduler:
+    """
+    Smooth weighted round-robin over lanes that currently have work.
+
+    With weights ``8:4:1`` and every lane busy, 13 consecutive picks take
+    8 tasks from the first lane, 4 from the second and 1 from the third,
+    interleaved rather than in bursts. Idle lanes are skipped without
+    accumulating credit, so a lane that was empty cannot monopolise the
+    consumer once it fills up again, and a lane with a positive weight is
+    never starved.
+    """
+
+    def __init__(self, weights: Dict[str, int]) -> None:
+        """
+        Initialize the scheduler.
+
+        Args:
+            weights: Relative share of picks per lane; values below 1 are
+                treated as 1.
+        """
+        self.weights = {lane: max(1, weight) for lane, weight in weights.items()}
+        self._current = dict.fromkeys(self.weights, 0)
+
+    def pick(self, ready: Iterable[str]) -> str:
+        """
+        Return the lane to take the next task from.
+
+        Args:
+            ready: Lanes with at least one buffered task.
+
+        Raises:
+            ValueError: If no lane is ready.
+        """
+        total = 0
+        best: str | None = None
+        for lane in ready:
+            weight = self.weights[lane]
+            self._current[lane] += weight
+            total += weight
+            if best is None or self._current[lane] > self._current[best]:
+                best = lane
+        if best is None:
+            raise ValueError("No lane has pending tasks")
+        self._current[best] -= total
+        return best
+
+
+__all__ = ["WeightedFairScheduler"]
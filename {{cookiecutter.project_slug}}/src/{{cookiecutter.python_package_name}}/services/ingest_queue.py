@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+"""Bounded in-process buffer between the ingest routes and Redis."""
+
+import asyncio
+from typing import Any, Dict, List, Tuple
+
+from ..core.logging_config import get_logger
+from ..utils import Priority, statsd_client, tracer
+from .tasks_service import TasksService
+
+log = get_logger(__name__)
+
+_Item = Tuple[Dict[str, Any], str | None, Priority, float | None]
+
+
+class IngestQueueFullError(Exception):
+    """Raised when the ingest buffer has no free slot."""
+
+
+class IngestQueue:
+    """
+    Fixed-size queue drained by a fixed pool of flusher coroutines.
+
+    Accepted payloads wait here until a flusher hands them to
+    :meth:`TasksService.enqueue_task`. Memory use is bounded by ``maxsize``:
+    once the queue is full :meth:`submit` fails fast instead of piling up
+    background tasks.
+    """
+
+    def __init__(self, service: TasksService, maxsize: int, workers: int) -> None:
+        """
+        Initialize the queue.
+
+        Args:
+            service: Service used to write payloads to Redis.
+            maxsize: Maximum number of buffered payloads.
+            workers: Number of flusher coroutines.
+        """
+        self.service = service
+        self.maxsize = maxsize
+        self.workers = workers
+        self._queue: asyncio.Queue[_Item] | None = None
+        self._workers: List[asyncio.Task[None]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def depth(self) -> int:
+        """Number of payloads waiting to be flushed."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self) -> asyncio.Queue[_Item]:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(self.maxsize)
+            self._workers = [
+                loop.create_task(self._flush(self._queue)) for _ in range(self.workers)
+            ]
+        return self._queue
+
+    async def start(self) -> None:
+        """Start the flusher coroutines on the running loop."""
+        self._ensure_started()
+
+    def submit(
+        self,
+        payload: Dict[str, Any],
+        task_id: str | None = None,
+        priority: Priority = "normal",
+        deadline: float | None = None,
+    ) -> None:
+        """
+        Buffer a payload for enqueueing without waiting for Redis.
+
+        Args:
+            payload: Validated task payload.
+            task_id: Task id to use instead of a generated one.
+            priority: Lane the task is routed to.
+            deadline: Unix time after which the task is dropped unprocessed.
+
+        Raises:
+            IngestQueueFullError: If the buffer is full.
+        """
+        try:
+            self._ensure_started().put_nowait((payload, task_id, priority, deadline))
+        except asyncio.QueueFull as exc:
+            raise IngestQueueFullError("Ingest queue is full") from exc
+
+    async def _flush(self, queue: asyncio.Queue[_Item]) -> None:
+        while True:
+            payload, task_id, priority, deadline = await queue.get()
+            try:
+                if not await self.service.enqueue_task(
+                    payload, task_id=task_id, priority=priority, deadline=deadline
+                ):
+                    await statsd_client.incr("ingest.lost")
+            except Exception as exc:  # pragma: no cover - enqueue handles errors
+                log.error("Ingest flush failed", exc_info=exc)
+            finally:
+                queue.task_done()
+
+    async def stop(self, timeout: float) -> None:
+        """
+        Flush buffered payloads and stop the flushers.
+
+        Args:
+            timeout: Seconds to wait for the buffer to drain.
+        """
+        queue, workers = self._queue, self._workers
+        if queue is None:
+            return
+        with tracer.start_as_current_span("остановка_очереди_приема"):
+            try:
+                await asyncio.wait_for(queue.join(), timeout)
+            except TimeoutError:
+                log.error(f"Ingest queue not drained, {queue.qsize()} tasks dropped")
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._queue, self._workers, self._loop = None, [], None
+
+
+__all__ = ["IngestQueue", "IngestQueueFullError"]
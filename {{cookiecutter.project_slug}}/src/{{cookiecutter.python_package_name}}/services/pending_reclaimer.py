@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+"""Recovery of messages left pending by consumers that died."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Mapping
+
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from ..repository.redis_repo import RedisRepository
+from ..utils import statsd_client
+
+# Preserve the original sleep so tests patching ``asyncio.sleep`` do not
+# affect the polling interval.
+_yield_sleep = asyncio.sleep
+
+log = get_logger(__name__)
+
+Deliver = Callable[[str, str, Dict[str, Any]], None]
+Bury = Callable[[str, str, Dict[str, Any], int], Awaitable[None]]
+
+
+class PendingReclaimer:
+    """
+    Take over messages that stayed unacknowledged for too long.
+
+    A consumer that dies between reading a message and acknowledging it
+    leaves the message in the group's pending entries list (PEL), where
+    ``XREADGROUP >`` never delivers it again. Every ``interval`` seconds the
+    reclaimer walks the PEL of each stream with ``XAUTOCLAIM``, examining at
+    most ``batch_size`` entries per call, and claims the messages idle for
+    at least ``min_idle`` seconds. Claimed messages are passed to
+    ``deliver`` and take the normal processing path. No more messages are
+    claimed than ``room`` reports space for, so a large backlog of orphaned
+    messages is drained gradually instead of being loaded at once.
+
+    A message claimed for more than its ``max_deliveries``-th delivery has
+    probably crashed every worker that took it. It is passed to ``bury``
+    instead, which dead-letters it, so it is not reclaimed forever.
+
+    When the PEL of a stream has been scanned to the end, its size is sent
+    as the ``pel.<lane>.size`` gauge and consumers that have been idle for
+    ``REDIS_CONSUMER_IDLE_TIMEOUT`` without pending messages are removed.
+    """
+
+    def __init__(
+        self,
+        repo: RedisRepository,
+        streams: Mapping[str, str],
+        consumer: str,
+        deliver: Deliver,
+        room: Callable[[], int],
+        *,
+        bury: Bury,
+        min_idle: float = settings.reclaim.min_idle,
+        batch_size: int = settings.reclaim.batch_size,
+        interval: float = settings.reclaim.interval,
+        max_deliveries: int = settings.reclaim.max_deliveries,
+    ) -> None:
+        """
+        Initialize the reclaimer.
+
+        Args:
+            repo: Repository running ``XAUTOCLAIM``.
+            streams: Streams to scan, mapped to the lane name used in metrics.
+            consumer: Consumer that becomes the owner of claimed messages.
+            deliver: Callback receiving ``(stream, message_id, fields)`` of
+                every claimed message.
+            room: Callback returning how many more messages may be claimed.
+            bury: Coroutine dead-lettering ``(stream, message_id, fields,
+                deliveries)`` of a message delivered too often.
+            min_idle: Seconds a message must be pending before it is claimed.
+            batch_size: Maximum pending entries examined per call.
+            interval: Pause between two passes, in seconds.
+            max_deliveries: Deliveries after which a message is buried.
+        """
+        self.repo = repo
+        self.streams = dict(streams)
+        self.consumer = consumer
+        self.deliver = deliver
+        self.room = room
+        self.bury = bury
+        self.max_deliveries = max(1, max_deliveries)
+        self.min_idle_ms = int(min_idle * 1000)
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.consumer_idle_ms = settings.redis.consumer_idle_timeout * 1000
+        self._cursors: Dict[str, str] = dict.fromkeys(self.streams, "0-0")
+        self._task: asyncio.Task[None] | None = None
+
+    def check_min_idle(self, busy: float) -> None:
+        """
+        Make sure messages that are still being worked on are never claimed.
+
+        Args:
+            busy: Longest time, in seconds, a live consumer may keep a
+                message pending without refreshing its idle time.
+
+        Raises:
+            ValueError: If ``min_idle`` is not above ``busy``.
+        """
+        if self.min_idle_ms <= busy * 1000:
+            raise ValueError(
+                f"RECLAIM_MIN_IDLE ({self.min_idle_ms / 1000:g}s) must exceed "
+                f"the {busy:g}s a task may stay pending on a live consumer"
+            )
+
+    async def _scanned(self, stream: str) -> None:
+        """Report the PEL size and drop idle consumers after a full scan."""
+        try:
+            pending = await self.repo.pending_count(stream)
+            await self.repo.delete_idle_consumers(stream, self.consumer_idle_ms)
+        except Exception as exc:  # pragma: no cover - network errors
+            log.warning("Failed to inspect pending messages", exc_info=exc)
+            return
+        await statsd_client.gauge(f"pel.{self.streams[stream]}.size", pending)
+
+    async def reclaim(self) -> int:
+        """
+        Run one pass over every stream.
+
+        Returns:
+            Number of claimed messages, including buried ones.
+        """
+        claimed = buried = 0
+        for stream in self.streams:
+            while (room := self.room()) > 0:
+                try:
+                    cursor, messages = await self.repo.claim_stale(
+                        stream,
+                        self.consumer,
+                        self.min_idle_ms,
+                        start_id=self._cursors[stream],
+                        count=min(self.batch_size, room),
+                    )
+                except Exception as exc:  # pragma: no cover - network errors
+                    log.warning("Failed to claim pending messages", exc_info=exc)
+                    break
+                self._cursors[stream] = cursor
+                for msg_id, fields, deliveries in messages:
+                    if deliveries > self.max_deliveries:
+                        await self.bury(stream, msg_id, fields, deliveries)
+                        buried += 1
+                    else:
+                        self.deliver(stream, msg_id, fields)
+                claimed += len(messages)
+                if cursor == "0-0":
+                    await self._scanned(stream)
+                    break
+        if claimed:
+            log.warning(f"Reclaimed {claimed} messages from dead consumers")
+            await statsd_client.incr("tasks.reclaimed", claimed)
+        if buried:
+            log.error(f"Dead-lettered {buried} messages delivered too often")
+        return claimed
+
+    async def _run(self) -> None:
+        while True:
+            await self.reclaim()
+            await _yield_sleep(self.interval)
+
+    async def start(self) -> None:
+        """Start reclaiming in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop reclaiming; unclaimed messages stay in the pending lists."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+__all__ = ["PendingReclaimer"]
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+"""Process pool for CPU-bound task handlers."""
+
+import asyncio
+import importlib
+import inspect
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable
+
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from ..utils import statsd_client
+
+CPU_BOUND_ATTR = "__cpu_bound__"
+
+log = get_logger(__name__)
+
+
+def check_pool_handler(func: Any) -> None:
+    """
+    Make sure worker processes can import ``func`` by name.
+
+    Raises:
+        TypeError: If ``func`` is a bound method, a method, a nested
+            function or a lambda, which would be pickled with its owner or
+            cannot be pickled at all.
+    """
+    qualname = getattr(func, "__qualname__", "")
+    if inspect.ismethod(func) or "." in qualname or "<" in qualname:
+        raise TypeError(
+            f"CPU-bound handler {qualname or func!r} must be a module-level "
+            "function; register it with task_handlers instead of overriding "
+            "TaskProcessor.handle"
+        )
+
+
+def cpu_bound[F: Callable[..., Any]](func: F) -> F:
+    """
+    Mark a task handler as CPU-bound so it runs in the process pool.
+
+    The handler must be a plain module-level function taking the decoded
+    payload, so that worker processes can import it by name.
+
+    Example:
+        >>> @cpu_bound
+        ... def render_report(payload: dict) -> dict:
+        ...     ...
+
+    Raises:
+        TypeError: If ``func`` is not a module-level function.
+    """
+    check_pool_handler(func)
+    setattr(func, CPU_BOUND_ATTR, True)
+    return func
+
+
+def is_cpu_bound(func: Any) -> bool:
+    """Return whether ``func`` was marked with :func:`cpu_bound`."""
+    return bool(getattr(func, CPU_BOUND_ATTR, False))
+
+
+def _import_modules(modules: Iterable[str]) -> None:
+    """Import handler modules once when a worker process starts."""
+    for module in modules:
+        importlib.import_module(module)
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+class TaskProcessPool:
+    """
+    Run CPU-bound handlers in a managed ``ProcessPoolExecutor``.
+
+    Workers are started and import the handler modules when the pool
+    starts, so the first tasks do not pay for process start-up. Each worker
+    is replaced after ``max_tasks_per_child`` tasks, which bounds leaks in
+    native extensions. At most ``max_pending`` calls are submitted at once;
+    further callers wait on the event loop instead of piling up in the
+    executor queue. A slot is released only when the worker finishes, even
+    if the caller stopped waiting, so a timed-out handler still counts
+    against the limit while it runs.
+
+    If a worker dies, the executor is replaced and the calls that were
+    running fail with ``BrokenProcessPool``.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.process_pool.workers,
+        max_tasks_per_child: int = settings.process_pool.max_tasks_per_child,
+        max_pending: int = settings.process_pool.max_pending,
+        start_method: str = settings.process_pool.start_method,
+    ) -> None:
+        """
+        Initialize the pool.
+
+        Args:
+            workers: Number of worker processes; ``0`` uses every CPU.
+            max_tasks_per_child: Tasks a worker runs before it is replaced.
+            max_pending: Calls submitted at once; ``0`` means twice the
+                number of workers.
+            start_method: ``multiprocessing`` start method of the workers.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_tasks_per_child = max_tasks_per_child
+        self.max_pending = max_pending or 2 * self.workers
+        self.start_method = start_method
+        self.modules: tuple[str, ...] = ()
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots = asyncio.Semaphore(self.max_pending)
+
+    @property
+    def running(self) -> bool:
+        """Whether worker processes have been started."""
+        return self._executor is not None
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_import_modules,
+            initargs=(self.modules,),
+            max_tasks_per_child=self.max_tasks_per_child,
+        )
+
+    async def start(self, modules: Iterable[str] = ()) -> None:
+        """
+        Start the worker processes.
+
+        Args:
+            modules: Modules every worker imports before its first task,
+                usually those defining the handlers.
+        """
+        if self._executor is not None:
+            return
+        self.modules = tuple(dict.fromkeys(modules))
+        self._executor = self._create_executor()
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(
+            *(
+                loop.run_in_executor(self._executor, _warm_up)
+                for _ in range(self.workers)
+            )
+        )
+        log.info(f"Started {len(set(pids))} handler worker processes")
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Call ``func(*args)`` in a worker process and return its result.
+
+        Arguments and the result are pickled; pass serialized payloads
+        rather than decoded objects.
+
+        Raises:
+            RuntimeError: If the pool has not been started.
+            BrokenProcessPool: If the worker died while running the call.
+        """
+        if self._executor is None:
+            raise RuntimeError("Process pool is not running")
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            executor = self._executor
+            future: Future[Any] = executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(
+            lambda _: loop.call_soon_threadsafe(self._slots.release)
+        )
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            await statsd_client.incr("process_pool.broken")
+            if self._executor is executor:
+                log.error("Handler worker died, restarting the process pool")
+                self._executor = self._create_executor()
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    async def stop(self) -> None:
+        """Wait for running calls and stop the worker processes."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+
+__all__ = ["TaskProcessPool", "check_pool_handler", "cpu_bound", "is_cpu_bound"]
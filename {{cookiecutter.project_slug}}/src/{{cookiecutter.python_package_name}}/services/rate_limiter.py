@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+"""Per-client token-bucket rate limiter backed by Redis."""
+
+import time
+from hashlib import blake2b
+from typing import List, NamedTuple
+
+from ..core.config import settings
+from ..repository.redis_repo import RedisRepository
+from ..utils import TASKS_STREAM_NAME
+from ..utils.lru import LRUCache
+
+
+class RateLimitDecision(NamedTuple):
+    """Outcome of a rate limit check."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+
+
+class RateLimiter:
+    """
+    Token bucket shared by all workers through a Redis Lua script.
+
+    Each worker takes up to ``lease_size`` tokens per Redis call and spends
+    them locally, so most requests are admitted without a round-trip. Unused
+    leased tokens are forgotten after ``lease_ttl`` seconds; at most
+    ``lease_size`` tokens per worker can be spent beyond the shared limit.
+    A throttled client is rejected locally until its retry time passes, so
+    a flood of rejected requests does not reach Redis either.
+    """
+
+    def __init__(
+        self,
+        repo: RedisRepository,
+        *,
+        rate: float = settings.rate_limit.rate,
+        burst: int = settings.rate_limit.burst,
+        lease_size: int = settings.rate_limit.lease_size,
+        lease_ttl: float = settings.rate_limit.lease_ttl,
+        max_clients: int = 10_000,
+    ) -> None:
+        """
+        Initialize the limiter.
+
+        Args:
+            repo: Repository executing the token-bucket script.
+            rate: Tokens added to a client's bucket per second.
+            burst: Bucket capacity.
+            lease_size: Tokens taken from Redis per call.
+            lease_ttl: Seconds leased tokens stay usable.
+            max_clients: Clients whose leases are kept in memory.
+        """
+        self.repo = repo
+        self.rate = rate
+        self.burst = burst
+        self.lease_size = max(1, min(lease_size, burst))
+        self.lease_ttl = lease_ttl
+        self.prefix = f"{TASKS_STREAM_NAME}:ratelimit:"
+        # identity -> [leased tokens, tokens left in Redis, lease expiry,
+        #              throttled until]
+        self._leases: LRUCache[str, List[float]] = LRUCache(max_clients)
+
+    def _key(self, identity: str) -> str:
+        digest = blake2b(identity.encode(), digest_size=16).hexdigest()
+        return f"{self.prefix}{digest}"
+
+    async def acquire(self, identity: str) -> RateLimitDecision:
+        """
+        Take one token for ``identity``.
+
+        Args:
+            identity: Client identity such as an API key or IP address.
+
+        Returns:
+            Whether the request is allowed, with values for rate-limit headers.
+        """
+        lease = self._leases.get(identity)
+        now = time.monotonic()
+        if lease is not None:
+            if lease[3] > now:
+                return RateLimitDecision(False, self.burst, 0, lease[3] - now)
+            if lease[0] >= 1 and lease[2] > now:
+                lease[0] -= 1
+                return RateLimitDecision(
+                    True, self.burst, int(lease[0] + lease[1]), 0.0
+                )
+
+        granted, remote, retry_after = await self.repo.take_tokens(
+            self._key(identity), self.rate, self.burst, self.lease_size
+        )
+        if granted == 0:
+            self._leases.set(identity, [0.0, remote, now, now + retry_after])
+            return RateLimitDecision(False, self.burst, 0, retry_after)
+        self._leases.set(identity, [granted - 1, remote, now + self.lease_ttl, 0.0])
+        return RateLimitDecision(True, self.burst, int(granted - 1 + remote), 0.0)
+
+
+__all__ = ["RateLimitDecision", "RateLimiter"]
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+"""Registry routing task types to their handlers."""
+
+import asyncio
+from importlib.metadata import entry_points
+from typing import Any, Callable, Dict, NamedTuple
+
+from ..core.logging_config import get_logger
+
+ENTRY_POINT_GROUP = f"{__name__.split('.')[0]}.task_handlers"
+
+log = get_logger(__name__)
+
+
+class TaskHandler(NamedTuple):
+    """A registered handler with its concurrency and retry policy."""
+
+    name: str
+    func: Callable[..., Any]
+    concurrency: int
+    limit: asyncio.Semaphore | None
+    max_attempts: int | None
+    retry_backoff: float | None
+    timeout: float | None
+
+
+class HandlerStats:
+    """Call count, failures and timing of one handler in this process."""
+
+    __slots__ = ("calls", "failures", "max_ms", "total_ms")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.failures = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, duration_ms: float, failed: bool) -> None:
+        """Add one finished call."""
+        self.calls += 1
+        self.failures += failed
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    @property
+    def mean_ms(self) -> float:
+        """Average call duration in milliseconds."""
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+class HandlerRegistry:
+    """
+    Map task ``type`` names to the functions that handle them.
+
+    The type is stored as a field of its own in the stream message, so the
+    processor picks the handler before it fetches or decodes the payload.
+    A handler receives the decoded payload, with ``data`` loaded into the
+    schema registered for the type in :data:`task_types`, if any. It may be
+    a coroutine function, a plain function marked with :func:`cpu_bound`
+    or :func:`blocking`, or a quick plain function called on the loop.
+
+    Besides the :meth:`register` decorator, handlers are discovered from
+    installed packages through the ``ENTRY_POINT_GROUP`` entry points. An
+    entry point may name a module, whose import registers its handlers, or
+    a function, which is registered under the entry point name.
+    """
+
+    def __init__(self) -> None:
+        self._handlers: Dict[str, TaskHandler] = {}
+        self.stats: Dict[str, HandlerStats] = {}
+        self._discovered = False
+
+    def register[F: Callable[..., Any]](
+        self,
+        name: str,
+        *,
+        concurrency: int = 0,
+        max_attempts: int | None = None,
+        retry_backoff: float | None = None,
+        timeout: float | None = None,
+    ) -> Callable[[F], F]:
+        """
+        Register the decorated function as the handler of task type ``name``.
+
+        Args:
+            name: Task type handled by the function.
+            concurrency: Tasks of this type handled at once in one processor;
+                ``0`` leaves only the processor-wide limit.
+            max_attempts: Attempts before the task is dead-lettered; defaults
+                to the processor's.
+            retry_backoff: Delay before the first retry, doubled after each
+                attempt; defaults to ``SCHEDULER_RETRY_BACKOFF``.
+            timeout: Seconds a call may take; defaults to ``TASK_TIMEOUT``.
+
+        Example:
+            >>> @task_handlers.register("resize_image", concurrency=4)
+            ... async def resize_image(payload: dict) -> dict:
+            ...     ...
+
+        Raises:
+            ValueError: If ``name`` is already registered.
+        """
+
+        def decorator(func: F) -> F:
+            if name in self._handlers:
+                raise ValueError(f"Task handler {name!r} is already registered")
+            self._handlers[name] = TaskHandler(
+                name,
+                func,
+                concurrency,
+                asyncio.Semaphore(concurrency) if concurrency > 0 else None,
+                max_attempts,
+                retry_backoff,
+                timeout,
+            )
+            self.stats[name] = HandlerStats()
+            return func
+
+        return decorator
+
+    def unregister(self, name: str) -> None:
+        """Forget the handler of task type ``name`` if it is registered."""
+        self._handlers.pop(name, None)
+        self.stats.pop(name, None)
+
+    def __contains__(self, name: object) -> bool:
+        """Return whether task type ``name`` has a handler."""
+        return name in self._handlers
+
+    def __iter__(self) -> Any:
+        """Iterate over the registered handlers."""
+        return iter(self._handlers.values())
+
+    def get(self, name: str | None) -> TaskHandler | None:
+        """Return the handler of task type ``name``, if one is registered."""
+        return self._handlers.get(name) if name is not None else None
+
+    def discover(self, group: str = ENTRY_POINT_GROUP) -> int:
+        """
+        Load the handlers advertised by installed packages, once.
+
+        Returns:
+            Number of entry points loaded by this call.
+
+        Raises:
+            Exception: Whatever importing a plugin raises; a worker should
+                not start without handlers it was deployed with.
+        """
+        if self._discovered:
+            return 0
+        self._discovered = True
+        found = entry_points(group=group)
+        for entry in found:
+            target = entry.load()
+            if callable(target) and entry.name not in self:
+                self.register(entry.name)(target)
+        if found:
+            log.info(f"Loaded {len(found)} task handler plugins")
+        return len(found)
+
+
+task_handlers = HandlerRegistry()
+
+__all__ = [
+    "ENTRY_POINT_GROUP",
+    "HandlerRegistry",
+    "HandlerStats",
+    "TaskHandler",
+    "task_handlers",
+]
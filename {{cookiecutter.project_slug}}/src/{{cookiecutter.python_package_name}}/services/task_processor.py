@@ -3,91 +3,793 @@ from __future__ import annotations
 """Simple example task processor consuming from Redis Streams."""
 
 import asyncio
+import inspect
+import math
+import time
+from collections import deque
+from hashlib import sha256
 
 # Preserve the original sleep function so tests can monkeypatch ``asyncio.sleep``
 # without causing recursive calls. All internal awaits use ``_yield_sleep`` which
 # always references the unpatched implementation.
 _yield_sleep = asyncio.sleep
-import json
-from typing import Any, Dict
+from typing import Any, Callable, Deque, Dict, List, Sequence, Tuple, cast
 
+from ..core import codec
+from ..core.compression import payload_codec
+from ..repository.blob_store import FileBlobStore, create_blob_store
 from ..core.config import settings
-from ..utils import DEAD_LETTER_STREAM_NAME, TASKS_STREAM_NAME, tracer
+from ..utils import (
+    DEAD_LETTER_STREAM_NAME,
+    PRIORITIES,
+    PRIORITY_STREAMS,
+    SCHEDULED_SET_NAME,
+    consumer_name,
+    statsd_client,
+    tracer,
+)
+from ..utils.sanitize import sanitize
 
-from ..repository.redis_repo import RedisRepository
+from ..repository.redis_repo import PendingAck, RedisRepository, StatusWrite
 from ..core.logging_config import get_logger
+from .batch_writer import BatchWriter
+from .concurrency_limiter import AdaptiveLimiter
+from .delayed_tasks import DelayedTaskScheduler
+from .fair_scheduler import WeightedFairScheduler
+from .pending_reclaimer import PendingReclaimer
+from .process_pool import TaskProcessPool, check_pool_handler, is_cpu_bound
+from .task_handlers import TaskHandler, task_handlers
+from .task_status import COMPLETION_CHANNEL, TaskState, TaskStatusCodec
+from .task_types import task_types
+from .thread_pool import TaskThreadPool, is_blocking
 
 log = get_logger(__name__)
 
+LANE_LAG_INTERVAL: float = 1.0
+MAX_ATTEMPTS: int = 3
+
+
+def _run_sync_handler(handler: Callable[[Any], Any], body: str, encoding: str) -> Any:
+    """Decode a stored payload in a pool worker and pass it to ``handler``."""
+    payload = TaskProcessor.decode_payload(
+        {"payload": body, "payload_encoding": encoding}
+    )
+    return handler(TaskProcessor.load_types(payload))
+
+
+class _Reader:
+    """Consumer name and local lane buffers of one reader coroutine."""
+
+    def __init__(self, consumer: str) -> None:
+        self.consumer = consumer
+        self.buffers: Dict[str, Deque[Tuple[str, Dict[str, Any]]]] = {
+            lane: deque() for lane in PRIORITIES
+        }
+        # when the messages of each buffer were last delivered or refreshed
+        self.fetched: Dict[str, float] = dict.fromkeys(PRIORITIES, 0.0)
+        self.refill = True
+
 
 class TaskProcessor:
-    """Consume tasks from Redis and handle them asynchronously."""
+    """
+    Consume tasks from Redis and handle them asynchronously.
+
+    Every priority lane has its own stream. All lanes are read with a single
+    ``XREADGROUP`` into small per-lane buffers, and a
+    :class:`WeightedFairScheduler` decides which buffered task takes the
+    next free concurrency slot. Tasks are only taken from the buffers once
+    a slot is available, so a high-priority task arriving behind a
+    low-priority backlog waits for one slot rather than for the backlog.
+    Each read takes as many tasks per lane as there are free slots, but at
+    least ``prefetch_count`` and at most ``fetch_batch_max``; lanes are
+    read again once one of the buffers runs dry. Acknowledgements from
+    concurrent tasks are sent together in pipelined batches.
+
+    ``STREAM_READERS`` reader coroutines share the concurrency slots. Each
+    reads as its own consumer, named after the host, the process and the
+    reader (see :func:`consumer_name`), so pending messages always belong
+    to the reader that fetched them, across workers and replicas. Idle
+    consumers without pending messages are removed from the groups at
+    start-up, and the processor removes its own when it stops.
+
+    Messages left pending by a consumer that died are claimed by a
+    :class:`PendingReclaimer` and handled by the first reader.
+
+    Tasks whose ``type`` has a handler in :data:`task_handlers` are routed
+    to it by the ``type`` stream field, before the payload is decoded; the
+    handler's own concurrency limit, timeout and retry policy apply, and
+    its call durations are recorded. Other tasks go to :meth:`handle`.
+
+    A ``handle`` marked with :func:`cpu_bound` is a plain function of the
+    decoded payload and runs in a :class:`TaskProcessPool`. Only the stored
+    payload text crosses the process boundary; it is decoded in the worker.
+    A ``handle`` marked with :func:`blocking` has the same signature and
+    runs in a :class:`TaskThreadPool`, keeping blocking client libraries
+    off the event loop.
+
+    A failed task does not hold its slot while it waits to be retried: it is
+    acknowledged and put into the delayed-task set with exponential backoff,
+    carrying its ``attempts`` count, and a :class:`DelayedTaskScheduler`
+    returns it to its stream when the backoff has passed.
+
+    Tasks carrying a client ``deadline`` are dropped with the ``expired``
+    status once it has passed, before they take a slot, and every handler
+    call is bounded by ``task_timeout``.
+    """
 
     def __init__(self, repo: RedisRepository) -> None:
         self.repo = repo
+        self.blob_store = create_blob_store(repo)
+        self.claim_check_ttl = settings.claim_check.ttl
+        self.prune_interval = settings.claim_check.prune_interval
         self._running = False
-        self._task: asyncio.Task[None] | None = None
+        self._tasks: List[asyncio.Task[None]] = []
+        self._pruner: asyncio.Task[None] | None = None
         self._background_tasks: set[asyncio.Task[Any]] = set()
-        self._semaphore = asyncio.Semaphore(settings.performance.max_concurrent_tasks)
+        self._parked: Dict[str, int] = {}
+        self.limiter = AdaptiveLimiter()
+        perf = settings.performance
+        self.scheduler = WeightedFairScheduler(
+            {
+                "high": perf.lane_weight_high,
+                "normal": perf.lane_weight_normal,
+                "low": perf.lane_weight_low,
+            }
+        )
+        self._lanes: Dict[str, str] = {
+            PRIORITY_STREAMS[lane]: lane for lane in PRIORITIES
+        }
+        self.readers = [
+            _Reader(consumer_name(index))
+            for index in range(max(1, perf.stream_readers))
+        ]
+        self._lag_reported: Dict[str, float] = dict.fromkeys(PRIORITIES, 0.0)
+        self.fetch_batch_max = max(1, perf.fetch_batch_max)
+        self.prefetch_count = max(1, min(perf.prefetch_count, self.fetch_batch_max))
+        # Acks never wait for company: everything finished during one loop
+        # iteration shares a pipeline, so the size limit is the only bound.
+        self.acks: BatchWriter[PendingAck, int] = BatchWriter(
+            self._send_acks,
+            max_batch=perf.ack_batch_max,
+            max_delay=0,
+            target_rtt=float("inf"),
+            metric="ack.batch.size",
+        )
+        self.statuses = TaskStatusCodec()
+        self.delayed = DelayedTaskScheduler(repo)
+        self.pool = TaskProcessPool()
+        self.threads = TaskThreadPool()
+        self.retry_backoff = settings.scheduler.retry_backoff
+        self.task_timeout = settings.performance.task_timeout
+        self.consumer_idle_ms = settings.redis.consumer_idle_timeout * 1000
+        self.reclaimer: PendingReclaimer | None = (
+            PendingReclaimer(
+                repo,
+                self._lanes,
+                self.readers[0].consumer,
+                self._reclaimed,
+                self._reclaim_room,
+                bury=self._bury,
+            )
+            if settings.reclaim.enabled
+            else None
+        )
+        self.refresh_after = float("inf")
+
+    def _longest_pending(self) -> float:
+        """
+        Return how long a task may stay pending here without being refreshed.
+
+        Buffered tasks have their idle time reset by :meth:`_refresh` once
+        they waited ``refresh_after``, however long the buffers take to
+        drain. The reader checks at least every time a slot frees up, which
+        takes at most the longest timeout, either ``task_timeout`` or that of
+        a registered handler. The task then runs for at most that timeout,
+        plus one more if it is parked behind its handler's concurrency limit.
+        """
+        longest = max(
+            [
+                self.task_timeout,
+                *(h.timeout for h in task_handlers if h.timeout is not None),
+            ]
+        )
+        rounds = 2
+        if any(h.limit is not None for h in task_handlers):
+            rounds += 1
+        return float(longest * rounds)
 
     async def start(self) -> None:
-        """Start processing tasks in the background."""
+        """
+        Start processing tasks in the background.
+
+        Raises:
+            TypeError: If a CPU-bound handler is not a module-level function.
+            ValueError: If ``RECLAIM_MIN_IDLE`` is too short to tell dead
+                consumers from busy ones.
+        """
+        task_handlers.discover()
+        funcs = [self.handle, *(handler.func for handler in task_handlers)]
+        cpu_bound = [func for func in funcs if is_cpu_bound(func)]
+        for func in cpu_bound:
+            check_pool_handler(func)
+        if self.reclaimer is not None:
+            busy = self._longest_pending()
+            self.reclaimer.check_min_idle(busy)
+            # half of the margin left, so a refresh is never late
+            self.refresh_after = (self.reclaimer.min_idle_ms / 1000 - busy) / 2
         self._running = True
-        await self.repo.create_group(TASKS_STREAM_NAME)
-        self._task = asyncio.create_task(self._run())
+        for stream in self._lanes:
+            await self.repo.create_group(stream)
+        await self._delete_consumers(self.consumer_idle_ms)
+        if isinstance(self.blob_store, FileBlobStore):
+            self._pruner = asyncio.create_task(self._prune_blobs(self.blob_store))
+        self._tasks = [
+            asyncio.create_task(self._run(reader)) for reader in self.readers
+        ]
+        await self.delayed.start()
+        if cpu_bound:
+            await self.pool.start([func.__module__ for func in cpu_bound])
+        if any(is_blocking(func) for func in funcs):
+            self.threads.start()
+        if self.reclaimer is not None:
+            await self.reclaimer.start()
         # ensure the processing loop has a chance to start before returning
         await _yield_sleep(0)
 
-    async def _run(self) -> None:
+    async def _prune_blobs(self, store: FileBlobStore) -> None:
+        """Delete expired payload bodies every ``prune_interval`` seconds."""
+        while True:
+            try:
+                removed = await asyncio.to_thread(store.prune)
+            except Exception as exc:  # pragma: no cover - filesystem errors
+                log.warning("Failed to prune payload blobs", exc_info=exc)
+            else:
+                if removed:
+                    log.info(f"Pruned {removed} expired payload blobs")
+            await _yield_sleep(self.prune_interval)
+
+    def _reclaimed(self, stream: str, msg_id: str, fields: Dict[str, Any]) -> None:
+        """Queue a claimed message on the reader that now owns it."""
+        reader, lane = self.readers[0], self._lanes[stream]
+        if not reader.buffers[lane]:
+            reader.fetched[lane] = time.monotonic()
+        reader.buffers[lane].append((msg_id, fields))
+
+    async def _bury(
+        self, stream: str, msg_id: str, fields: Dict[str, Any], deliveries: int
+    ) -> None:
+        """Dead-letter a claimed message that was delivered too often."""
+        task_id = fields.get("task_id")
+        await statsd_client.incr("tasks.poisoned")
+        final = await self._dead_letter(
+            fields,
+            f"Delivered {deliveries} times without being acknowledged",
+            int(fields.get("attempts", 0)),
+        )
+        try:
+            await self._finish(stream, msg_id, task_id, final)
+        except Exception as exc:  # pragma: no cover - network errors
+            log.error("Failed to acknowledge dead-lettered task", exc_info=exc)
+
+    async def _refresh(self, reader: _Reader) -> None:
+        """
+        Keep buffered tasks from being reclaimed while they wait for a slot.
+
+        Every buffer whose messages waited ``refresh_after`` seconds since
+        they were delivered or last refreshed is refreshed with one call.
+        Messages another consumer has taken over in the meantime are dropped
+        from the buffer, so they are not processed twice.
+        """
+        now = time.monotonic()
+        for lane, buf in reader.buffers.items():
+            if not buf or now - reader.fetched[lane] < self.refresh_after:
+                continue
+            owned = set(
+                await self.repo.refresh_pending(
+                    PRIORITY_STREAMS[lane],
+                    reader.consumer,
+                    [msg_id for msg_id, _ in buf],
+                )
+            )
+            reader.fetched[lane] = now
+            if len(owned) < len(buf):
+                log.warning(f"{len(buf) - len(owned)} buffered tasks were reclaimed")
+                kept = [entry for entry in buf if entry[0] in owned]
+                buf.clear()
+                buf.extend(kept)
+                reader.refill = reader.refill or not buf
+
+    def _reclaim_room(self) -> int:
+        """Room for claimed messages in the first reader's buffers."""
+        buffered = sum(len(buf) for buf in self.readers[0].buffers.values())
+        return self.fetch_batch_max - buffered
+
+    async def _delete_consumers(
+        self, idle_ms: int, names: Sequence[str] | None = None
+    ) -> None:
+        """Remove idle consumers without pending messages from every lane."""
+        for stream in self._lanes:
+            try:
+                removed = await self.repo.delete_idle_consumers(stream, idle_ms, names)
+            except Exception as exc:  # pragma: no cover - network errors
+                log.warning("Failed to clean up consumers", exc_info=exc)
+                continue
+            if removed:
+                log.info(f"Removed {len(removed)} idle consumers from {stream}")
+
+    async def _fill(self, reader: _Reader) -> None:
+        """Read new tasks for every lane whose buffer is empty."""
+        buffers = reader.buffers
+        empty = [PRIORITY_STREAMS[lane] for lane, buf in buffers.items() if not buf]
+        if not empty or not (reader.refill or len(empty) == len(buffers)):
+            return
+        # block only when there is nothing buffered at all
+        block_ms = 1000 if len(empty) == len(buffers) else None
+        # the slot held by the caller is free for the first task read
+        free = -(-(self.limiter.available + 1) // len(self.readers))
+        count = min(self.fetch_batch_max, max(self.prefetch_count, free))
+        reader.refill = False
+        fetched = time.monotonic()
+        for stream, msg_id, fields in await self.repo.fetch_lanes(
+            empty, count=count, block_ms=block_ms, consumer=reader.consumer
+        ):
+            lane = self._lanes[stream]
+            buffers[lane].append((msg_id, fields))
+            reader.fetched[lane] = fetched
+
+    async def _report_lag(self, lane: str, msg_id: str) -> None:
+        """Send the age of the task taken from ``lane`` at most once a second."""
+        now = time.time()
+        if now - self._lag_reported[lane] < LANE_LAG_INTERVAL:
+            return
+        self._lag_reported[lane] = now
+        try:
+            created_ms = int(msg_id.split("-", 1)[0])
+        except ValueError:  # pragma: no cover - ids are generated by Redis
+            return
+        await statsd_client.gauge(
+            f"lane.{lane}.lag_ms", max(0.0, now * 1000 - created_ms)
+        )
+
+    def _spawn(self, coro: Any) -> None:
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    @staticmethod
+    def _deadline(fields: Dict[str, Any]) -> float | None:
+        """Return the client deadline of a task as a Unix timestamp, if any."""
+        value = fields.get("deadline")
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):  # pragma: no cover - written by the API
+            return None
+
+    async def _run(self, reader: _Reader) -> None:
+        buffers = reader.buffers
         while self._running:
-            msgs = await self.repo.fetch(TASKS_STREAM_NAME, count=1)
-            if not msgs:
+            await self.limiter.acquire()
+            dispatched = expired = failed = False
+            try:
+                await self._fill(reader)
+                await self._refresh(reader)
+                while not dispatched:
+                    ready = [lane for lane, buf in buffers.items() if buf]
+                    if not ready:
+                        break
+                    lane = self.scheduler.pick(ready)
+                    msg_id, fields = buffers[lane].popleft()
+                    if not buffers[lane]:
+                        reader.refill = True
+                    stream = PRIORITY_STREAMS[lane]
+                    deadline = self._deadline(fields)
+                    if deadline is not None and deadline <= time.time():
+                        # Nobody waits for the result any more: drop the
+                        # task without spending the slot on it.
+                        self._spawn(self._expire(stream, msg_id, fields))
+                        expired = True
+                        continue
+                    self._spawn(self._process(stream, msg_id, fields))
+                    dispatched = True
+                    await self._report_lag(lane, msg_id)
+            except Exception as exc:  # pragma: no cover - network errors
+                log.warning("Failed to read tasks", exc_info=exc)
+                failed = True
+            finally:
+                if not dispatched:
+                    self.limiter.release()
+            if failed:
                 await _yield_sleep(0.1)
-                continue
-            msg_id, fields = msgs[0]
-            task = asyncio.create_task(self._process(msg_id, fields))
-            self._background_tasks.add(task)
-            task.add_done_callback(self._background_tasks.discard)
+            elif not dispatched and not expired:
+                # the blocking read already waited; just let others run
+                await _yield_sleep(0)
 
-    async def handle(self, fields: Dict[str, Any]) -> None:
-        """Placeholder task handler."""
+    @staticmethod
+    def decode_payload(fields: Dict[str, Any]) -> Any:
+        """
+        Decode the task payload stored in a stream message.
+
+        Compressed payloads are inflated according to ``payload_encoding``.
+        Strings are HTML-escaped here when ``SANITIZE_MODE`` is ``lazy``, so
+        the cost is paid by the consumer instead of the ingest request.
+        """
+        stored = payload_codec.decode(
+            fields.get("payload", "{}"), fields.get("payload_encoding", "")
+        )
+        payload = codec.loads(stored)
+        if settings.performance.sanitize_mode == "lazy":
+            payload = sanitize(payload)
+        return payload
+
+    @staticmethod
+    def load_types(payload: Any) -> Any:
+        """
+        Turn the ``data`` of a typed task into an instance of its schema.
+
+        Types that only have a handler keep their data as decoded.
+        """
+        if not isinstance(payload, dict):
+            return payload
+        task = cast(Dict[str, Any], payload)
+        if task.get("type") in task_types:
+            task["data"] = task_types.load(task["type"], task.get("data"))
+        return task
+
+    async def _stored_payload(self, fields: Dict[str, Any]) -> str:
+        """Return the stored payload text, fetching it if it was offloaded."""
+        ref = fields.get("payload_ref")
+        if ref is None:
+            return fields.get("payload", "{}")
+        with tracer.start_as_current_span("загрузка_тела_задачи"):
+            body = await self.blob_store.get(ref)
+            if sha256(body.encode()).hexdigest() != fields.get("payload_sha256"):
+                raise ValueError(f"Checksum mismatch for payload {ref}")
+            return body
+
+    async def load_payload(self, fields: Dict[str, Any]) -> Any:
+        """
+        Return the decoded payload, fetching it from the blob store if offloaded.
+
+        The ``data`` of a typed task is returned as an instance of the schema
+        registered for its ``type``.
+
+        Raises:
+            BlobNotFoundError: If the offloaded body has expired.
+            ValueError: If the fetched body does not match its checksum, or
+                the task type is unknown or its data no longer validates.
+        """
+        body = await self._stored_payload(fields)
+        return self.load_types(self.decode_payload({**fields, "payload": body}))
+
+    async def handle(self, fields: Dict[str, Any]) -> Any:
+        """
+        Placeholder task handler.
+
+        Returns:
+            Optional result stored in the task status when
+            ``TASK_STATUS_ENABLED`` is set.
+        """
         with tracer.start_as_current_span("обработка_задачи"):
-            payload = json.loads(fields.get("payload", "{}"))
+            payload = await self.load_payload(fields)
             log.info("Handled task %s", payload)
             await _yield_sleep(0)
+            return None
 
-    async def _process(self, msg_id: str, fields: Dict[str, Any]) -> None:
-        async with self._semaphore:
-            attempts = 0
-            while attempts < 3:
-                try:
-                    await self.handle(fields)
-                except Exception as exc:  # pragma: no cover - handler failures
-                    attempts += 1
-                    log.error(
-                        "Task handling failed (attempt %s)", attempts, exc_info=exc
-                    )
-                    if attempts >= 3:
-                        try:
-                            await self.repo.add_to_stream(
-                                DEAD_LETTER_STREAM_NAME, fields
-                            )
-                        except (
-                            Exception
-                        ) as dead_exc:  # pragma: no cover - network errors
-                            log.error(
-                                "Failed to enqueue to dead-letter", exc_info=dead_exc
-                            )
-                        break
-                    await _yield_sleep(2 ** (attempts - 1))
-                else:
-                    break
-            await self.repo.ack(TASKS_STREAM_NAME, msg_id)
+    async def _call_handler(
+        self, fields: Dict[str, Any], route: TaskHandler | None = None
+    ) -> Any:
+        """
+        Run the handler of a task on the loop or in one of the pools.
+
+        Without a registered ``route`` the task goes to :meth:`handle`,
+        which receives the raw stream fields unless it is a pool handler.
+        """
+        handler = self.handle if route is None else route.func
+        encoding = fields.get("payload_encoding", "")
+        if is_cpu_bound(handler):
+            check_pool_handler(handler)
+            if not self.pool.running:
+                await self.pool.start([handler.__module__])
+            body = await self._stored_payload(fields)
+            with tracer.start_as_current_span("обработка_задачи_в_процессе"):
+                return await self.pool.run(_run_sync_handler, handler, body, encoding)
+        if is_blocking(handler):
+            self.threads.start()
+            body = await self._stored_payload(fields)
+            with tracer.start_as_current_span("обработка_задачи_в_потоке"):
+                return await self.threads.run(
+                    _run_sync_handler, handler, body, encoding
+                )
+        if route is None:
+            return await handler(fields)
+        result = handler(await self.load_payload(fields))
+        return await result if inspect.isawaitable(result) else result
+
+    async def _record(
+        self, route: TaskHandler | None, started: float, failed: bool
+    ) -> None:
+        """Add one call to the statistics of the registered handler, if any."""
+        if route is None:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+        stats = task_handlers.stats.get(route.name)
+        if stats is not None:
+            stats.record(duration_ms, failed)
+        await statsd_client.gauge(f"handler.{route.name}.duration_ms", duration_ms)
+        if failed:
+            await statsd_client.incr(f"handler.{route.name}.failed")
+
+    async def _set_status(
+        self, task_id: str | None, state: TaskState, **extra: Any
+    ) -> None:
+        """Record a transition that has no stream command to ride along with."""
+        status = self.statuses.entry(task_id, state, **extra)
+        if status is None:
+            return
+        try:
+            await self.repo.set_status(status)
+        except Exception as exc:  # pragma: no cover - network errors
+            log.warning(f"Failed to record status of task {task_id}", exc_info=exc)
+
+    async def _retry_later(
+        self,
+        stream: str,
+        msg_id: str,
+        fields: Dict[str, Any],
+        attempts: int,
+        exc: Exception,
+        *,
+        backoff: float | None = None,
+    ) -> None:
+        """
+        Acknowledge a failed task and schedule its next attempt.
+
+        An offloaded body is kept for ``CLAIM_CHECK_TTL`` after the retry is
+        due, so a long backoff does not outlive it.
+        """
+        if backoff is None:
+            backoff = self.retry_backoff
+        delay = backoff * 2 ** (attempts - 1)
+        due = time.time() + delay
+        ref = fields.get("payload_ref")
+        if ref is not None:
+            try:
+                await self.blob_store.touch(
+                    ref, self.claim_check_ttl + math.ceil(delay)
+                )
+            except Exception as touch_exc:  # pragma: no cover - network errors
+                log.warning(f"Failed to extend payload {ref}", exc_info=touch_exc)
+        status = self.statuses.entry(
+            fields.get("task_id"), "failed", error=str(exc), attempts=attempts
+        )
+        try:
+            await self.repo.reschedule(
+                stream,
+                msg_id,
+                SCHEDULED_SET_NAME,
+                {**fields, "attempts": str(attempts)},
+                due,
+                status=status,
+            )
+        except Exception as resched_exc:  # pragma: no cover - network errors
+            # The message stays pending in the consumer group.
+            log.error("Failed to schedule retry", exc_info=resched_exc)
+
+    async def _send_acks(self, acks: Sequence[PendingAck]) -> List[int | Exception]:
+        return await self.repo.ack_many(acks)
+
+    async def _finish(
+        self, stream: str, msg_id: str, task_id: str | None, final: StatusWrite | None
+    ) -> None:
+        """Acknowledge a task, writing and publishing its final status."""
+        notify = (
+            (COMPLETION_CHANNEL, self.statuses.event(task_id, final))
+            if final is not None and task_id
+            else None
+        )
+        await self.acks.write((stream, msg_id, final, notify))
+
+    async def _expire(self, stream: str, msg_id: str, fields: Dict[str, Any]) -> None:
+        """Drop a task whose deadline passed before it was handled."""
+        task_id = fields.get("task_id")
+        await statsd_client.incr("tasks.expired")
+        try:
+            await self._finish(
+                stream, msg_id, task_id, self.statuses.entry(task_id, "expired")
+            )
+        except Exception as exc:  # pragma: no cover - network errors
+            # The message stays pending and is dropped on redelivery.
+            log.error("Failed to acknowledge expired task", exc_info=exc)
+
+    async def _fail(
+        self,
+        stream: str,
+        msg_id: str,
+        fields: Dict[str, Any],
+        exc: Exception,
+        route: TaskHandler | None,
+    ) -> StatusWrite | None:
+        """
+        Schedule a retry of a failed task, or dead-letter it.
+
+        Returns:
+            The final status to write with the acknowledgement, or ``None``
+            if the task was scheduled to run again.
+        """
+        attempts = int(fields.get("attempts", 0)) + 1
+        log.error("Task handling failed (attempt %s)", attempts, exc_info=exc)
+        max_attempts = MAX_ATTEMPTS
+        backoff = None
+        if route is not None:
+            max_attempts = route.max_attempts or MAX_ATTEMPTS
+            backoff = route.retry_backoff
+        if attempts < max_attempts:
+            await self._retry_later(
+                stream, msg_id, fields, attempts, exc, backoff=backoff
+            )
+            return None
+        return await self._dead_letter(fields, str(exc), attempts)
+
+    async def _dead_letter(
+        self, fields: Dict[str, Any], error: str, attempts: int
+    ) -> StatusWrite | None:
+        """Copy a task to the dead-letter stream and return its final status."""
+        try:
+            await self.repo.add_to_stream(DEAD_LETTER_STREAM_NAME, fields)
+        except Exception as dead_exc:  # pragma: no cover - network errors
+            log.error("Failed to enqueue to dead-letter", exc_info=dead_exc)
+        return self.statuses.entry(
+            fields.get("task_id"), "dead_lettered", error=error, attempts=attempts
+        )
+
+    async def _take_limit(self, route: TaskHandler) -> bool:
+        """
+        Take a slot of the route's concurrency limit.
+
+        If the limit is reached, the processor-wide slot is given back while
+        the task waits, so tasks of other types keep running, and taken
+        again afterwards. At most ``concurrency`` tasks of a type wait at
+        once, which bounds the wait to one handler timeout.
+
+        Returns:
+            Whether both slots are held. On ``False``, because too many tasks
+            of the type are already waiting, or on an exception, neither is.
+        """
+        limit = cast(asyncio.Semaphore, route.limit)
+        if not limit.locked():
+            await limit.acquire()
+            return True
+        self.limiter.release()
+        parked = self._parked.get(route.name, 0)
+        if parked >= route.concurrency:
+            return False
+        self._parked[route.name] = parked + 1
+        try:
+            await limit.acquire()
+        finally:
+            self._parked[route.name] -= 1
+        try:
+            await self.limiter.acquire()
+        except BaseException:
+            limit.release()
+            raise
+        return True
+
+    async def _defer(
+        self, stream: str, msg_id: str, fields: Dict[str, Any], route: TaskHandler
+    ) -> None:
+        """Put back a task whose handler is saturated, without an attempt."""
+        backoff = route.retry_backoff
+        if backoff is None:
+            backoff = self.retry_backoff
+        await statsd_client.incr(f"handler.{route.name}.deferred")
+        try:
+            await self.repo.reschedule(
+                stream, msg_id, SCHEDULED_SET_NAME, fields, time.time() + backoff
+            )
+        except Exception as exc:  # pragma: no cover - network errors
+            # The message stays pending and is reclaimed later.
+            log.error("Failed to defer task", exc_info=exc)
+
+    async def _process(self, stream: str, msg_id: str, fields: Dict[str, Any]) -> None:
+        """
+        Handle one task, holding the slot acquired by :meth:`_run`.
+
+        The handler gets at most ``task_timeout`` seconds, and never more than
+        is left until the task's deadline. A task cut off by its deadline
+        expires; one cut off by ``task_timeout`` fails and is retried. A
+        registered handler may override the timeout and the retry policy.
+
+        A task whose handler is at its concurrency limit gives its slot back
+        while it waits, so one saturated type cannot starve the others. If
+        the type already has as many tasks waiting as it may run at once,
+        the task is put back in the scheduled set for one retry backoff.
+        Neither clock starts before the handler's limit is taken.
+
+        The handler's latency, and whether it failed, are passed to the
+        :class:`AdaptiveLimiter` with the slot.
+        """
+        task_id = fields.get("task_id")
+        route = task_handlers.get(fields.get("type"))
+        limit: asyncio.Semaphore | None = None
+        held = True
+        latency: float | None = None
+        failed = False
+        try:
+            if route is not None and route.limit is not None:
+                held = False
+                if not await self._take_limit(route):
+                    await self._defer(stream, msg_id, fields, route)
+                    return
+                held = True
+                limit = route.limit
+            await self._set_status(task_id, "running")
+            deadline = self._deadline(fields)
+            budget = float(
+                route.timeout
+                if route is not None and route.timeout is not None
+                else self.task_timeout
+            )
+            # whichever bound is nearer decides what a timeout means
+            expires = deadline is not None and deadline - time.time() <= budget
+            if expires:
+                budget = cast(float, deadline) - time.time()
+            final: StatusWrite | None = None
+            timeout = asyncio.timeout(budget)
+            started = time.perf_counter()
+            try:
+                async with timeout:
+                    result = await self._call_handler(fields, route)
+            except Exception as exc:
+                latency = time.perf_counter() - started
+                failed = True
+                await self._record(route, started, failed=True)
+                if timeout.expired():
+                    if expires:
+                        # the client gave up; says nothing about the handler
+                        latency = None
+                        await self._expire(stream, msg_id, fields)
+                        return
+                    await statsd_client.incr("tasks.timed_out")
+                    exc = TimeoutError(f"Task timed out after {budget:g}s")
+                final = await self._fail(stream, msg_id, fields, exc, route)
+                if final is None:
+                    return
+            else:
+                latency = time.perf_counter() - started
+                await self._record(route, started, failed=False)
+                final = self.statuses.entry(task_id, "succeeded", result=result)
+            await self._finish(stream, msg_id, task_id, final)
+        finally:
+            if limit is not None:
+                limit.release()
+            if held:
+                self.limiter.release(latency, failed)
+                await self.limiter.report()
 
     async def stop(self) -> None:
-        """Stop background processing."""
+        """
+        Stop background processing.
+
+        Tasks still buffered stay pending in their consumer group under the
+        reader's consumer name. Consumers left without pending messages are
+        removed from the groups.
+        """
         self._running = False
-        if self._task is not None:
-            await self._task
+        if self.reclaimer is not None:
+            await self.reclaimer.stop()
+        await self.delayed.stop()
+        pruner, self._pruner = self._pruner, None
+        if pruner is not None:
+            pruner.cancel()
+            await asyncio.gather(pruner, return_exceptions=True)
+        tasks, self._tasks = self._tasks, []
+        await asyncio.gather(*tasks)
         if self._background_tasks:
             await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        await self.acks.close()
+        await self.pool.stop()
+        await self.threads.stop()
+        await self._delete_consumers(0, [reader.consumer for reader in self.readers])
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+"""Task state tracking in short-lived Redis hashes."""
+
+from datetime import UTC, datetime
+from typing import Any, Dict, Literal, cast
+
+from ..core import codec
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from ..repository.redis_repo import StatusWrite
+from ..utils import TASKS_STREAM_NAME
+
+log = get_logger(__name__)
+
+TaskState = Literal[
+    "scheduled", "queued", "running", "failed", "succeeded", "dead_lettered", "expired"
+]
+FINAL_STATES: frozenset[str] = frozenset({"succeeded", "dead_lettered", "expired"})
+STATUS_KEY_PREFIX: str = f"{TASKS_STREAM_NAME}:status:"
+COMPLETION_CHANNEL: str = f"{TASKS_STREAM_NAME}:completed"
+
+
+class TaskStatusCodec:
+    """
+    Build and decode the status hash kept for every task.
+
+    Each hash holds ``state`` and ``updated_at`` and, depending on the state,
+    ``error``, ``attempts`` and the JSON-encoded handler ``result``. States
+    move from ``queued`` (or ``scheduled`` for delayed tasks) to ``running``
+    and end in ``succeeded``, ``dead_lettered`` or ``expired`` (the
+    client's deadline passed before the task finished); ``failed`` marks an
+    attempt that will be retried.
+
+    Writes are returned as :data:`StatusWrite` tuples so callers can put them
+    in the same pipeline as the stream command that causes the transition.
+    When tracking is disabled no status is produced.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.task_status.enabled,
+        ttl: int = settings.task_status.ttl,
+        max_result_size: int = settings.task_status.max_result_size,
+    ) -> None:
+        """
+        Initialize the codec.
+
+        Args:
+            enabled: Whether statuses are recorded.
+            ttl: Seconds a status is kept after its last update.
+            max_result_size: Larger handler results are not stored.
+        """
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_result_size = max_result_size
+
+    @staticmethod
+    def key(task_id: str) -> str:
+        """Return the Redis key of the status hash for ``task_id``."""
+        return f"{STATUS_KEY_PREFIX}{task_id}"
+
+    def entry(
+        self,
+        task_id: str | None,
+        state: TaskState,
+        *,
+        result: Any = None,
+        error: str | None = None,
+        attempts: int | None = None,
+    ) -> StatusWrite | None:
+        """
+        Return the status write for a transition, or ``None`` if not tracked.
+
+        Args:
+            task_id: Task id; messages without one are not tracked.
+            state: New state.
+            result: Handler result stored as JSON.
+            error: Error message of the last failed attempt.
+            attempts: Number of failed attempts so far.
+        """
+        if not self.enabled or not task_id:
+            return None
+        fields: Dict[str, str] = {
+            "state": state,
+            "updated_at": datetime.now(UTC).isoformat(),
+        }
+        if result is not None:
+            encoded = codec.dumps(result)
+            if len(encoded) <= self.max_result_size:
+                fields["result"] = encoded
+            else:
+                log.warning(f"Result of task {task_id} is too large to store")
+        if error is not None:
+            fields["error"] = error
+        if attempts is not None:
+            fields["attempts"] = str(attempts)
+        return self.key(task_id), fields, self.ttl
+
+    @staticmethod
+    def event(task_id: str, status: StatusWrite) -> str:
+        """Return the completion message published for a final ``status``."""
+        return codec.dumps({"task_id": task_id, **status[1]})
+
+    @classmethod
+    def decode_event(cls, message: str) -> Dict[str, Any]:
+        """Return the status carried by a completion message."""
+        fields = codec.loads(message)
+        task_id = fields.pop("task_id")
+        return cast(Dict[str, Any], cls.decode(task_id, fields))
+
+    @staticmethod
+    def decode(task_id: str, fields: Dict[str, str]) -> Dict[str, Any] | None:
+        """
+        Return the API representation of a status hash.
+
+        Returns:
+            The status with ``result`` decoded, or ``None`` for an empty hash
+            of an unknown or expired task.
+        """
+        if not fields:
+            return None
+        status: Dict[str, Any] = {"task_id": task_id, **fields}
+        if "result" in status:
+            status["result"] = codec.loads(status["result"])
+        if "attempts" in status:
+            status["attempts"] = int(status["attempts"])
+        return status
+
+
+__all__ = [
+    "COMPLETION_CHANNEL",
+    "FINAL_STATES",
+    "STATUS_KEY_PREFIX",
+    "TaskState",
+    "TaskStatusCodec",
+]
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+"""Registry of task types and their payload schemas."""
+
+from typing import Any, Callable, Dict, NamedTuple
+
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import InitErrorDetails, PydanticCustomError
+
+try:
+    import msgspec  # type: ignore[import-not-found]  # pyright: ignore[reportMissingImports]
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+class UnknownTaskTypeError(ValueError):
+    """Raised for a ``type`` that has no registered schema."""
+
+
+class _TaskType(NamedTuple):
+    """Validator and serializer compiled once for a registered schema."""
+
+    schema: type
+    validate: Callable[[Any], Any]
+    dump: Callable[[Any], Any]
+
+
+def _compile_struct(schema: type) -> _TaskType:
+    """Build the validator and serializer for a ``msgspec.Struct`` schema."""
+    if msgspec is None:  # pragma: no cover - only called with msgspec installed
+        raise TypeError(f"{schema!r} needs msgspec, which is not installed")
+    convert: Callable[..., Any] = msgspec.convert
+    struct_error = msgspec.ValidationError
+
+    def validate_struct(data: Any) -> Any:
+        try:
+            return convert(data, type=schema)
+        except struct_error as exc:
+            raise ValidationError.from_exception_data(
+                "TaskPayload",
+                [
+                    InitErrorDetails(
+                        type=PydanticCustomError(
+                            "task_data", "{error}", {"error": str(exc)}
+                        ),
+                        loc=("data",),
+                        input=data,
+                    )
+                ],
+            ) from exc
+
+    return _TaskType(schema, validate_struct, msgspec.to_builtins)
+
+
+def _compile(schema: type) -> _TaskType:
+    """Build the validator and serializer for a pydantic or msgspec schema."""
+    if msgspec is not None and issubclass(schema, msgspec.Struct):
+        return _compile_struct(schema)
+
+    adapter: TypeAdapter[Any] = TypeAdapter(schema)
+
+    def validate_model(data: Any) -> Any:
+        try:
+            return adapter.validate_python(data)
+        except ValidationError as exc:
+            raise ValidationError.from_exception_data(
+                "TaskPayload",
+                [
+                    InitErrorDetails(
+                        type=error["type"],  # type: ignore[typeddict-item]
+                        loc=("data", *error["loc"]),
+                        input=error["input"],
+                        ctx=error.get("ctx", {}),
+                    )
+                    for error in exc.errors()
+                ],
+            ) from exc
+
+    def dump_model(value: Any) -> Any:
+        return adapter.dump_python(value, mode="json")
+
+    return _TaskType(schema, validate_model, dump_model)
+
+
+class TaskTypeRegistry:
+    """
+    Map task ``type`` names to the schema of their ``data``.
+
+    A schema is a pydantic model (or any type ``TypeAdapter`` accepts) or a
+    ``msgspec.Struct``. Its validator is compiled when the type is
+    registered, so requests never build a ``TypeAdapter``. Tasks are
+    validated at ingest and stored in the normalized JSON form of their
+    schema; the processor turns them back into typed objects with the same
+    validator.
+    """
+
+    def __init__(self) -> None:
+        self._types: Dict[str, _TaskType] = {}
+
+    def register[S: type](self, name: str) -> Callable[[S], S]:
+        """
+        Register the decorated class as the schema of task type ``name``.
+
+        Example:
+            >>> @task_types.register("resize_image")
+            ... class ResizeImage(BaseModel):
+            ...     url: str
+            ...     width: int
+
+        Raises:
+            ValueError: If ``name`` is already registered.
+        """
+
+        def decorator(schema: S) -> S:
+            if name in self._types:
+                raise ValueError(f"Task type {name!r} is already registered")
+            self._types[name] = _compile(schema)
+            return schema
+
+        return decorator
+
+    def unregister(self, name: str) -> None:
+        """Forget task type ``name`` if it is registered."""
+        self._types.pop(name, None)
+
+    def __contains__(self, name: object) -> bool:
+        """Return whether task type ``name`` is registered."""
+        return name in self._types
+
+    def _get(self, name: str) -> _TaskType:
+        try:
+            return self._types[name]
+        except KeyError:
+            raise UnknownTaskTypeError(f"Unknown task type {name!r}") from None
+
+    def normalize(self, name: str, data: Any) -> Any:
+        """
+        Validate ``data`` against the schema of ``name`` for storage.
+
+        Returns:
+            The validated data in the JSON form of the schema.
+
+        Raises:
+            UnknownTaskTypeError: If ``name`` is not registered.
+            ValidationError: If ``data`` does not match the schema; error
+                locations start with ``data``.
+        """
+        task_type = self._get(name)
+        return task_type.dump(task_type.validate(data))
+
+    def load(self, name: str, data: Any) -> Any:
+        """
+        Return ``data`` of a stored task as an instance of its schema.
+
+        Raises:
+            UnknownTaskTypeError: If ``name`` is not registered.
+            ValidationError: If ``data`` does not match the schema.
+        """
+        return self._get(name).validate(data)
+
+
+task_types = TaskTypeRegistry()
+
+__all__ = ["TaskTypeRegistry", "UnknownTaskTypeError", "task_types"]
@@ -2,11 +2,15 @@ from __future__ import annotations
 
 """Service providing task queueing and metric collection."""
 
+import math
+import time
+from collections import deque
 from datetime import UTC, datetime
-from typing import Any, Dict, List, Tuple, cast
+from functools import partial
+from hashlib import sha256
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple, TypeVar, cast
 from uuid import uuid4
 
-import json
 import psutil
 
 try:
@@ -18,17 +22,33 @@ GPU_AVAILABLE: bool = GPUtil is not None
 
 import asyncio
 
-from ..repository.redis_repo import RedisRepository
+from ..repository.blob_store import create_blob_store
+from ..repository.redis_repo import RedisRepository, ScheduledEntry, StatusWrite
+from ..core import codec
+from ..core.compression import payload_codec
+from ..core.config import settings
 from ..core.logging_config import get_logger
+from .batch_writer import BatchWriter
+from .task_status import TaskStatusCodec
 from ..utils import (
     TASKS_STREAM_NAME,
     DEAD_LETTER_STREAM_NAME,
+    PRIORITY_STREAMS,
+    SCHEDULED_SET_NAME,
+    Priority,
     statsd_client,
     tracer,
 )
+from ..utils.lru import LRUCache
 
 log = get_logger(__name__)
 
+_EMPTY_TRACE_CONTEXT: str = codec.dumps({"trace_id": "", "span_id": ""})
+_SAMPLE_WINDOW: int = 1000
+IDEMPOTENCY_KEY_PREFIX: str = f"{TASKS_STREAM_NAME}:idempotency:"
+
+T = TypeVar("T")
+
 
 class TasksService:
     """Service handling task enqueueing and metrics reporting."""
@@ -36,13 +56,35 @@ class TasksService:
     def __init__(self, repo: RedisRepository) -> None:
         """Initialize the service with a repository instance."""
         self.repo = repo
-        self.cpu_samples: List[float] = []
-        self.mem_samples: List[float] = []
-        self.gpu_load_samples: List[float] = []
-        self.gpu_mem_samples: List[float] = []
+        perf = settings.performance
+        # One writer per lane: a batch is one pipeline into one stream.
+        self.writers: Dict[str, BatchWriter[Dict[str, Any], str]] = (
+            {
+                stream: BatchWriter(
+                    partial(self._write_batch, stream),
+                    max_batch=perf.enqueue_batch_max,
+                    max_delay=perf.enqueue_batch_delay_ms / 1000,
+                    target_rtt=perf.enqueue_batch_target_rtt_ms / 1000,
+                )
+                for stream in PRIORITY_STREAMS.values()
+            }
+            if perf.enqueue_batching
+            else {}
+        )
+        self.blob_store = create_blob_store(repo)
+        self.claim_check_threshold = settings.claim_check.threshold
+        self.claim_check_ttl = settings.claim_check.ttl
+        self.statuses = TaskStatusCodec()
+        self.idempotency_cache: LRUCache[str, str] = LRUCache(
+            perf.idempotency_cache_size, ttl=settings.redis.idempotency_ttl
+        )
+        self.cpu_samples: deque[float] = deque(maxlen=_SAMPLE_WINDOW)
+        self.mem_samples: deque[float] = deque(maxlen=_SAMPLE_WINDOW)
+        self.gpu_load_samples: deque[float] = deque(maxlen=_SAMPLE_WINDOW)
+        self.gpu_mem_samples: deque[float] = deque(maxlen=_SAMPLE_WINDOW)
 
     @staticmethod
-    def _calculate_metrics(values: List[float]) -> Tuple[float, float, float]:
+    def _calculate_metrics(values: Sequence[float]) -> Tuple[float, float, float]:
         """Return average, min and max for provided values."""
         with tracer.start_as_current_span("расчет_метрик"):
             if not values:
@@ -51,46 +93,386 @@ class TasksService:
             avg = sum(values) / len(values)
             return avg, min(values), max(values)
 
-    async def enqueue_task(self, payload: Dict[str, Any]) -> str:
-        """Serialize payload and push it to Redis."""
+    @staticmethod
+    def _build_message(
+        payload: Dict[str, Any],
+        task_id: str | None = None,
+        deadline: float | None = None,
+    ) -> Dict[str, Any]:
+        """
+        Return the stream message for ``payload``, generating a task id if needed.
+
+        A ``deadline`` is stored as a Unix timestamp next to the payload, so
+        the processor can drop an expired task without decoding it. The task
+        ``type`` is copied into a field of its own for the same reason: the
+        processor picks the handler before it decodes the payload.
+        """
+        stored, encoding = payload_codec.encode(codec.dumps(payload))
+        message = {
+            "task_id": task_id or str(uuid4()),
+            "timestamp": datetime.now(UTC).isoformat(),
+            "payload": stored,
+            "trace_context": _EMPTY_TRACE_CONTEXT,
+        }
+        if encoding:
+            message["payload_encoding"] = encoding
+        if deadline is not None:
+            message["deadline"] = repr(deadline)
+        if payload.get("type") is not None:
+            message["type"] = payload["type"]
+        return message
+
+    async def _offload(self, message: Dict[str, Any], ttl: int | None = None) -> None:
+        """
+        Move a large payload to the blob store, leaving a reference behind.
+
+        The stream entry keeps ``payload_ref`` and ``payload_sha256`` instead of
+        ``payload``. If the store is unavailable the payload stays inline.
+        ``ttl`` overrides ``CLAIM_CHECK_TTL`` for tasks that start later.
+        """
+        payload = message.get("payload")
+        if (
+            self.claim_check_threshold <= 0
+            or payload is None
+            or len(payload) < self.claim_check_threshold
+        ):
+            return
+        digest = sha256(payload.encode()).hexdigest()
+        try:
+            ref = await self.blob_store.put(digest, payload, ttl)
+        except Exception as exc:  # pragma: no cover - network errors
+            log.warning("Payload offload failed, keeping it inline", exc_info=exc)
+            return
+        del message["payload"]
+        message["payload_ref"] = ref
+        message["payload_sha256"] = digest
+        await statsd_client.incr("tasks.offloaded")
+
+    def _queued(self, messages: Sequence[Dict[str, Any]]) -> List[StatusWrite] | None:
+        """Return ``queued`` status writes for ``messages`` if tracking is on."""
+        if not self.statuses.enabled:
+            return None
+        return [
+            cast(StatusWrite, self.statuses.entry(m["task_id"], "queued"))
+            for m in messages
+        ]
+
+    async def _write_batch(
+        self, stream: str, messages: Sequence[Dict[str, Any]]
+    ) -> List[str | Exception]:
+        return await self.repo.add_many_to_stream(
+            stream, messages, statuses=self._queued(messages)
+        )
+
+    async def _write(
+        self, message: Dict[str, Any], stream: str = TASKS_STREAM_NAME
+    ) -> str:
+        """
+        Write one message to ``stream``.
+
+        Writes are coalesced with concurrent writes to the same lane when
+        batching is enabled.
+        """
+        writer = self.writers.get(stream)
+        if writer is not None:
+            return await writer.write(message)
+        return await self.repo.add_to_stream(
+            stream, message, status=self.statuses.entry(message["task_id"], "queued")
+        )
+
+    async def _write_with_retry(
+        self, message: Dict[str, Any], write: Callable[[], Awaitable[T]]
+    ) -> T | None:
+        """
+        Run ``write`` up to three times, dead-lettering ``message`` on failure.
+
+        Returns:
+            The result of ``write``, or ``None`` if every attempt failed.
+        """
+        attempts = 0
+        while attempts < 3:
+            try:
+                result = await write()
+            except Exception as exc:  # pragma: no cover - network errors
+                attempts += 1
+                log.error("Failed to enqueue task (attempt %s)", attempts, exc_info=exc)
+                if attempts >= 3:
+                    try:
+                        await self.repo.add_to_stream(DEAD_LETTER_STREAM_NAME, message)
+                    except Exception as dead_exc:  # pragma: no cover - network errors
+                        log.error("Failed to enqueue to dead-letter", exc_info=dead_exc)
+                    return None
+                await asyncio.sleep(2 ** (attempts - 1))
+                continue
+            else:
+                await self._record_usage()
+                return result
+
+        return None
+
+    async def enqueue_task(
+        self,
+        payload: Dict[str, Any],
+        task_id: str | None = None,
+        priority: Priority = "normal",
+        deadline: float | None = None,
+    ) -> str:
+        """Serialize payload and push it to the stream of its priority lane."""
         with tracer.start_as_current_span("постановка_задачи"):
-            message = {
-                "task_id": str(uuid4()),
-                "timestamp": datetime.now(UTC).isoformat(),
-                "payload": json.dumps(payload),
-                "trace_context": json.dumps({"trace_id": "", "span_id": ""}),
-            }
+            message = self._build_message(payload, task_id, deadline)
+            await self._offload(message)
+            stream = PRIORITY_STREAMS[priority]
+            result = await self._write_with_retry(
+                message, lambda: self._write(message, stream)
+            )
+            return result or ""
+
+    async def enqueue_task_once(
+        self,
+        payload: Dict[str, Any],
+        key: str,
+        priority: Priority = "normal",
+        deadline: float | None = None,
+    ) -> Tuple[str, str, bool]:
+        """
+        Enqueue ``payload`` unless a task with idempotency ``key`` exists.
+
+        The key is looked up in a bounded in-process LRU first and then
+        checked and recorded in Redis atomically with the ``XADD``.
+
+        Args:
+            payload: Validated task payload.
+            key: Client supplied idempotency key.
+            priority: Lane the task is routed to.
+            deadline: Unix time after which the task is dropped unprocessed.
+
+        Returns:
+            ``(task_id, stream_id, created)``. For a duplicate ``task_id`` is
+            the id of the original task and ``stream_id`` is empty. If the
+            task could not be enqueued both ids are empty.
+        """
+        with tracer.start_as_current_span("однократная_постановка_задачи"):
+            original = self.idempotency_cache.get(key)
+            if original is not None:
+                await statsd_client.incr("tasks.duplicate")
+                return original, "", False
+
+            message = self._build_message(payload, deadline=deadline)
+            await self._offload(message)
+            outcome = await self._write_with_retry(
+                message,
+                lambda: self.repo.add_to_stream_once(
+                    PRIORITY_STREAMS[priority],
+                    f"{IDEMPOTENCY_KEY_PREFIX}{key}",
+                    message,
+                    settings.redis.idempotency_ttl,
+                    status=self.statuses.entry(message["task_id"], "queued"),
+                ),
+            )
+            if outcome is None:
+                return "", "", False
+            created, value = outcome
+            task_id = message["task_id"] if created else value
+            self.idempotency_cache.set(key, task_id)
+            if not created:
+                await statsd_client.incr("tasks.duplicate")
+                return task_id, "", False
+            return task_id, value, True
+
+    async def enqueue_tasks(
+        self,
+        payloads: Sequence[Dict[str, Any]],
+        priorities: Sequence[Priority] | None = None,
+        deadlines: Sequence[float | None] | None = None,
+    ) -> List[Tuple[str, str]]:
+        """
+        Push several payloads to Redis using one pipeline per lane and attempt.
+
+        Messages that fail are retried with the same backoff as
+        :meth:`enqueue_task` and moved to the dead-letter stream after the
+        last attempt.
+
+        Args:
+            payloads: Validated task payloads.
+            priorities: Lane of each payload; all go to ``normal`` if omitted.
+            deadlines: Deadline of each payload as a Unix timestamp, if any.
+
+        Returns:
+            ``(task_id, stream_id)`` pairs in input order. ``stream_id`` is an
+            empty string for messages that could not be enqueued.
+        """
+        with tracer.start_as_current_span("пакетная_постановка_задач"):
+            messages = [
+                self._build_message(payload, deadline=deadline)
+                for payload, deadline in zip(
+                    payloads, deadlines or [None] * len(payloads), strict=True
+                )
+            ]
+            if self.claim_check_threshold > 0:
+                await asyncio.gather(*(self._offload(m) for m in messages))
+            streams = [
+                PRIORITY_STREAMS[priority]
+                for priority in (priorities or ["normal"] * len(messages))
+            ]
+            stream_ids: List[str] = [""] * len(messages)
+            pending = list(range(len(messages)))
             attempts = 0
-            while attempts < 3:
+            while pending and attempts < 3:
+                lanes: Dict[str, List[int]] = {}
+                for index in pending:
+                    lanes.setdefault(streams[index], []).append(index)
+                batches = {
+                    stream: [messages[i] for i in indexes]
+                    for stream, indexes in lanes.items()
+                }
+                outcomes = await asyncio.gather(
+                    *(
+                        self.repo.add_many_to_stream(
+                            stream, batch, statuses=self._queued(batch)
+                        )
+                        for stream, batch in batches.items()
+                    ),
+                    return_exceptions=True,
+                )
+
+                failed: List[int] = []
+                for indexes, outcome in zip(lanes.values(), outcomes, strict=True):
+                    results = (
+                        [outcome] * len(indexes)
+                        if isinstance(outcome, BaseException)
+                        else outcome
+                    )
+                    for index, result in zip(indexes, results, strict=True):
+                        if isinstance(result, BaseException):
+                            failed.append(index)
+                        else:
+                            stream_ids[index] = result
+                pending = sorted(failed)
+                if not pending:
+                    break
+
+                attempts += 1
+                log.error(
+                    "Failed to enqueue %s tasks (attempt %s)", len(pending), attempts
+                )
+                if attempts >= 3:
+                    try:
+                        await self.repo.add_many_to_stream(
+                            DEAD_LETTER_STREAM_NAME, [messages[i] for i in pending]
+                        )
+                    except Exception as dead_exc:  # pragma: no cover - network errors
+                        log.error("Failed to enqueue to dead-letter", exc_info=dead_exc)
+                    break
+                await asyncio.sleep(2 ** (attempts - 1))
+
+            if any(stream_ids):
+                await self._record_usage()
+            return [
+                (message["task_id"], stream_id)
+                for message, stream_id in zip(messages, stream_ids, strict=True)
+            ]
+
+    async def schedule_tasks(
+        self,
+        payloads: Sequence[Dict[str, Any]],
+        run_at: Sequence[float],
+        priorities: Sequence[Priority] | None = None,
+        deadlines: Sequence[float | None] | None = None,
+    ) -> List[str]:
+        """
+        Store payloads in the delayed-task set until they are due.
+
+        All tasks are written with one ``ZADD``. A
+        :class:`~.delayed_tasks.DelayedTaskScheduler` moves each of them to
+        the stream of its lane once its due time has passed. Failed writes
+        are retried with the same backoff as :meth:`enqueue_task`.
+
+        Args:
+            payloads: Validated task payloads.
+            run_at: Due time of each payload as a Unix timestamp.
+            priorities: Lane of each payload; all go to ``normal`` if omitted.
+            deadlines: Deadline of each payload as a Unix timestamp, if any.
+
+        Returns:
+            Task ids in input order, or empty strings if the tasks could not
+            be scheduled.
+        """
+        with tracer.start_as_current_span("планирование_задач"):
+            messages = [
+                self._build_message(payload, deadline=deadline)
+                for payload, deadline in zip(
+                    payloads, deadlines or [None] * len(payloads), strict=True
+                )
+            ]
+            if self.claim_check_threshold > 0:
+                # The body must outlive the delay, not just CLAIM_CHECK_TTL.
+                now = time.time()
+                await asyncio.gather(
+                    *(
+                        self._offload(
+                            m, self.claim_check_ttl + max(0, math.ceil(due - now))
+                        )
+                        for m, due in zip(messages, run_at, strict=True)
+                    )
+                )
+            entries: List[ScheduledEntry] = [
+                (PRIORITY_STREAMS[priority], message, due)
+                for message, due, priority in zip(
+                    messages,
+                    run_at,
+                    priorities or ["normal"] * len(messages),
+                    strict=True,
+                )
+            ]
+            statuses = (
+                [
+                    cast(StatusWrite, self.statuses.entry(m["task_id"], "scheduled"))
+                    for m in messages
+                ]
+                if self.statuses.enabled
+                else None
+            )
+            for attempt in range(1, 4):
                 try:
-                    result = await self.repo.add_to_stream(
-                        TASKS_STREAM_NAME, message
+                    await self.repo.add_to_schedule(
+                        SCHEDULED_SET_NAME, entries, statuses=statuses
                     )
                 except Exception as exc:  # pragma: no cover - network errors
-                    attempts += 1
                     log.error(
-                        "Failed to enqueue task (attempt %s)",
-                        attempts,
-                        exc_info=exc,
+                        "Failed to schedule tasks (attempt %s)", attempt, exc_info=exc
                     )
-                    if attempts >= 3:
-                        try:
-                            await self.repo.add_to_stream(
-                                DEAD_LETTER_STREAM_NAME, message
-                            )
-                        except Exception as dead_exc:  # pragma: no cover - network errors
-                            log.error(
-                                "Failed to enqueue to dead-letter", exc_info=dead_exc
-                            )
-                        return ""
-                    await asyncio.sleep(2 ** (attempts - 1))
+                    if attempt < 3:
+                        await asyncio.sleep(2 ** (attempt - 1))
                     continue
-                else:
-                    await self._record_usage()
-                    return result
+                await statsd_client.incr("tasks.scheduled", len(messages))
+                return [message["task_id"] for message in messages]
+            return [""] * len(messages)
+
+    async def get_task_statuses(
+        self, task_ids: Sequence[str]
+    ) -> List[Dict[str, Any] | None]:
+        """
+        Look up the status of several tasks in one pipelined round trip.
+
+        Args:
+            task_ids: Task ids returned by the enqueue methods.
 
-            return ""
+        Returns:
+            Status dicts in input order; unknown or expired tasks give
+            ``None``.
+        """
+        with tracer.start_as_current_span("получение_статусов_задач"):
+            hashes = await self.repo.get_statuses(
+                [self.statuses.key(task_id) for task_id in task_ids]
+            )
+            return [
+                self.statuses.decode(task_id, fields)
+                for task_id, fields in zip(task_ids, hashes, strict=True)
+            ]
 
+    async def close(self) -> None:
+        """Wait for the batches still being written to Redis."""
+        await asyncio.gather(*(writer.close() for writer in self.writers.values()))
 
     async def _record_usage(self) -> None:
         """Record CPU, memory and GPU usage to StatsD."""
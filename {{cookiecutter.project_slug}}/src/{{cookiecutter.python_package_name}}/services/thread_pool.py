@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+"""Thread pool for task handlers that call blocking libraries."""
+
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from ..utils import statsd_client
+
+BLOCKING_ATTR = "__blocking__"
+
+log = get_logger(__name__)
+
+
+def blocking[F: Callable[..., Any]](func: F) -> F:
+    """
+    Mark a task handler as blocking so it runs in the thread pool.
+
+    The handler is a plain function taking the decoded payload. Use it for
+    handlers built on client libraries without an asyncio API.
+
+    Example:
+        >>> @blocking
+        ... def upload(payload: dict) -> None:
+        ...     ...
+    """
+    setattr(func, BLOCKING_ATTR, True)
+    return func
+
+
+def is_blocking(func: Any) -> bool:
+    """Return whether ``func`` was marked with :func:`blocking`."""
+    return bool(getattr(func, BLOCKING_ATTR, False))
+
+
+def gil_enabled() -> bool:
+    """Return ``False`` on a free-threaded CPython build running without the GIL."""
+    check = getattr(sys, "_is_gil_enabled", None)
+    return True if check is None else bool(check())
+
+
+def default_workers() -> int:
+    """
+    Return the pool size used when ``THREAD_POOL_WORKERS`` is ``0``.
+
+    This is ``ThreadPoolExecutor``'s own default of the CPU count plus four,
+    capped at 32 while the GIL serializes Python code. Without the GIL the
+    threads also run Python code in parallel, so the cap is lifted.
+    """
+    workers = (os.cpu_count() or 1) + 4
+    return min(32, workers) if gil_enabled() else workers
+
+
+class TaskThreadPool:
+    """
+    Run blocking handlers in a ``ThreadPoolExecutor``.
+
+    At most ``max_pending`` calls are submitted at once; further callers
+    wait on the event loop. A slot is released only when the thread
+    finishes, even if the caller stopped waiting, because a running thread
+    cannot be interrupted.
+
+    The number of calls waiting for a thread and the number running are
+    sent as the ``thread_pool.queue_depth`` and ``thread_pool.active``
+    gauges whenever a call starts or finishes.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.thread_pool.workers,
+        max_pending: int = settings.thread_pool.max_pending,
+    ) -> None:
+        """
+        Initialize the pool.
+
+        Args:
+            workers: Number of threads; ``0`` uses :func:`default_workers`.
+            max_pending: Calls submitted at once; ``0`` means twice the
+                number of threads.
+        """
+        self.workers = workers or default_workers()
+        self.max_pending = max_pending or 2 * self.workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the executor has been started."""
+        return self._executor is not None
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls accepted by :meth:`run` that have not started in a thread."""
+        return self._queued
+
+    @property
+    def active(self) -> int:
+        """Calls currently running in a thread."""
+        return self._active
+
+    def start(self) -> None:
+        """Create the executor; threads are started as calls arrive."""
+        if self._executor is not None:
+            return
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="task-handler"
+        )
+        mode = "with" if gil_enabled() else "without"
+        log.info(f"Started handler thread pool of {self.workers} threads {mode} GIL")
+
+    def _call(self, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _done(self, loop: asyncio.AbstractEventLoop, future: Future[Any]) -> None:
+        if future.cancelled():
+            # dropped from the queue by ``stop`` before a thread took it
+            with self._lock:
+                self._queued -= 1
+        loop.call_soon_threadsafe(self._slots.release)
+
+    async def _report(self) -> None:
+        await statsd_client.gauge("thread_pool.queue_depth", self._queued)
+        await statsd_client.gauge("thread_pool.active", self._active)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Call ``func(*args)`` in a thread and return its result.
+
+        Raises:
+            RuntimeError: If the pool has not been started.
+        """
+        if self._executor is None:
+            raise RuntimeError("Thread pool is not running")
+        with self._lock:
+            self._queued += 1
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            raise
+        loop = asyncio.get_running_loop()
+        try:
+            future: Future[Any] = self._executor.submit(self._call, func, *args)
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda done: self._done(loop, done))
+        await self._report()
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            await self._report()
+
+    async def stop(self) -> None:
+        """Wait for running calls and stop the threads."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+
+__all__ = [
+    "TaskThreadPool",
+    "blocking",
+    "default_workers",
+    "gil_enabled",
+    "is_blocking",
+]
@@ -4,8 +4,13 @@ from ..core.config import settings
 from .metrics import statsd_client
 from .redis_stream import (
     DEAD_LETTER_STREAM_NAME,
+    PRIORITIES,
+    PRIORITY_STREAMS,
+    Priority,
     RedisStream,
+    SCHEDULED_SET_NAME,
     TASKS_STREAM_NAME,
+    consumer_name,
     redis_stream,
 )
 from .tracing import tracer
@@ -15,9 +20,14 @@ __all__ = [
     "CircuitBreaker",
     "CircuitBreakerError",
     "DEAD_LETTER_STREAM_NAME",
+    "PRIORITIES",
+    "PRIORITY_STREAMS",
+    "Priority",
     "RedisStream",
+    "SCHEDULED_SET_NAME",
     "TASKS_ENDPOINT_PATH",
     "TASKS_STREAM_NAME",
+    "consumer_name",
     "redis_stream",
     "statsd_client",
     "tracer",
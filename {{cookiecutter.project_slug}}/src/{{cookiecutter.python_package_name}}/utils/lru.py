@@ -0,0 +1,51 @@
+"""Bounded least-recently-used cache with optional entry expiry."""
+
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+
+class LRUCache[K, V]:
+    """Mapping that keeps at most ``maxsize`` entries, evicting the oldest."""
+
+    def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries.
+            ttl: Seconds an entry stays valid, or ``None`` to keep it until
+                evicted.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, Tuple[V, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of entries, including expired ones not yet evicted."""
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        """Return the value for ``key`` and mark it as recently used."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if self.ttl is not None and expires < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        """Store ``value`` under ``key``, evicting the oldest entry if full."""
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+__all__ = ["LRUCache"]
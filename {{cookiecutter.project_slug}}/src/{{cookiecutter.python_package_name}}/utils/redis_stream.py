@@ -2,7 +2,10 @@
 
 # pyright: reportUnknownMemberType=false, reportUnknownVariableType=false, reportArgumentType=false
 
-from typing import Any, Dict, cast
+import os
+import secrets
+import socket
+from typing import Any, Dict, Literal, Tuple, cast
 
 from redis.asyncio import Redis  # pyright: ignore[reportMissingImports]
 
@@ -32,12 +35,51 @@ class RedisStream:
 
 TASKS_STREAM_NAME = settings.redis.stream_name
 DEAD_LETTER_STREAM_NAME = f"{settings.redis.stream_name}:dlq"
+SCHEDULED_SET_NAME = f"{settings.redis.stream_name}:scheduled"
+
+Priority = Literal["high", "normal", "low"]
+PRIORITIES: Tuple[Priority, ...] = ("high", "normal", "low")
+# ``normal`` keeps the original stream name so existing producers and
+# consumers are unaffected; the other lanes get their own streams.
+PRIORITY_STREAMS: Dict[str, str] = {
+    "high": f"{TASKS_STREAM_NAME}:high",
+    "normal": TASKS_STREAM_NAME,
+    "low": f"{TASKS_STREAM_NAME}:low",
+}
+
+# Random token of the running process by process id, refreshed after fork.
+_instance: Dict[int, str] = {}
+
+
+def consumer_name(reader: int = 0) -> str:
+    """
+    Return a consumer name unique to this process and reader.
+
+    The name is ``REDIS_CONSUMER_NAME`` followed by the host name, the
+    process id, a random token and the reader index. The token tells apart
+    containers that all run as pid 1 on the same host name and processes
+    that reuse the pid of a dead one.
+    """
+    pid = os.getpid()
+    token = _instance.get(pid)
+    if token is None:
+        _instance.clear()
+        token = _instance[pid] = secrets.token_hex(4)
+    return (
+        f"{settings.redis.consumer_name}:{socket.gethostname()}:{pid}:{token}:{reader}"
+    )
+
 
 redis_stream = RedisStream(settings.redis.url)
 
 __all__ = [
     "DEAD_LETTER_STREAM_NAME",
+    "PRIORITIES",
+    "PRIORITY_STREAMS",
+    "Priority",
     "RedisStream",
+    "SCHEDULED_SET_NAME",
     "TASKS_STREAM_NAME",
+    "consumer_name",
     "redis_stream",
 ]
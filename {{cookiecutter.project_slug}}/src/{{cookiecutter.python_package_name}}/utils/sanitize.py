@@ -0,0 +1,99 @@
+"""Iterative HTML-escaping sanitizer for task payloads."""
+
+from collections.abc import Mapping, Sequence
+from html import escape
+from typing import Any, Dict, List, Tuple
+
+from ..core.config import settings
+
+_LEAF, _STR, _MAP, _SEQ = 0, 1, 2, 3
+_SCALARS = (int, float, bool, type(None))
+_FAST_KINDS: Dict[type, int] = {
+    str: _STR,
+    dict: _MAP,
+    list: _SEQ,
+    tuple: _SEQ,
+    **dict.fromkeys(_SCALARS, _LEAF),
+}
+
+
+class SanitizationError(ValueError):
+    """Raised when a payload exceeds the sanitizer depth or node limits."""
+
+
+def _kind(value: Any) -> int:
+    kind = _FAST_KINDS.get(value.__class__)
+    if kind is not None:
+        return kind
+    if isinstance(value, _SCALARS):
+        return _LEAF
+    if isinstance(value, str):
+        return _STR
+    if isinstance(value, Sequence) and not isinstance(value, bytes | bytearray):
+        return _SEQ
+    if isinstance(value, Mapping):
+        return _MAP
+    return _LEAF
+
+
+def sanitize(
+    value: Any,
+    max_depth: int = settings.performance.sanitize_max_depth,
+    max_nodes: int = settings.performance.sanitize_max_nodes,
+) -> Any:
+    """
+    Return a copy of ``value`` with every string HTML-escaped.
+
+    The payload is walked once with an explicit stack instead of recursion, so
+    deeply nested input cannot exhaust the Python stack. Mappings become
+    ``dict`` with ``str`` keys and other sequences become ``list``.
+
+    Args:
+        value: Decoded JSON-like payload.
+        max_depth: Maximum container nesting depth.
+        max_nodes: Maximum number of values visited.
+
+    Returns:
+        The sanitized copy.
+
+    Raises:
+        SanitizationError: If either limit is exceeded.
+    """
+    kind = _kind(value)
+    if kind == _STR:
+        return escape(value)
+    if kind == _LEAF:
+        return value
+
+    root: Dict[str, Any] | List[Any] = {} if kind == _MAP else []
+    stack: List[Tuple[Any, Any, int]] = [(value, root, 1)]
+    nodes = 1
+    fast_kinds = _FAST_KINDS
+    while stack:
+        source, target, depth = stack.pop()
+        if depth > max_depth:
+            raise SanitizationError(f"Payload nesting exceeds {max_depth} levels")
+        nodes += len(source)
+        if nodes > max_nodes:
+            raise SanitizationError(f"Payload exceeds {max_nodes} values")
+        is_map = isinstance(target, dict)
+        pairs = source.items() if is_map else enumerate(source)
+        for key, item in pairs:
+            item_kind = fast_kinds.get(item.__class__)
+            if item_kind is None:
+                item_kind = _kind(item)
+            if item_kind == _STR:
+                clean: Any = escape(item)
+            elif item_kind == _LEAF:
+                clean = item
+            else:
+                clean = {} if item_kind == _MAP else []
+                stack.append((item, clean, depth + 1))
+            if is_map:
+                target[str(key)] = clean
+            else:
+                target.append(clean)
+    return root
+
+
+__all__ = ["SanitizationError", "sanitize"]
@@ -1,11 +1,14 @@
 import asyncio
+import json
+import time
 import uvloop
 import os
-from typing import AsyncGenerator, Generator
+from typing import AsyncGenerator, Collection, Generator
 
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
+from redis.exceptions import ResponseError
 from starlette.routing import Router
 
 # Ensure test environment
@@ -17,21 +20,263 @@ from {{cookiecutter.python_package_name}}.api import health, tasks, main as api_
 from {{cookiecutter.python_package_name}}.middleware import MetricsMiddleware
 from {{cookiecutter.python_package_name}} import utils
 from {{cookiecutter.python_package_name}}.core.config import settings
+from {{cookiecutter.python_package_name}}.repository.redis_repo import (
+    ADD_ONCE_SCRIPT,
+    PROMOTE_SCRIPT,
+    REFRESH_SCRIPT,
+    TOKEN_BUCKET_SCRIPT,
+)
 from collections import defaultdict
 
 
+class FakePipeline:
+    """Buffer commands and replay them against ``FakeRedis`` on execute."""
+
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.commands: list[tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        """Return a callable that queues the ``name`` command."""
+
+        def queue(*args, **kwargs) -> "FakePipeline":
+            self.commands.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self, raise_on_error: bool = True) -> list:
+        results = []
+        commands, self.commands = self.commands, []
+        for name, args, kwargs in commands:
+            try:
+                results.append(await getattr(self.redis, name)(*args, **kwargs))
+            except Exception as exc:
+                if raise_on_error:
+                    raise
+                results.append(exc)
+        return results
+
+
+class FakeScript:
+    """Python stand-in for a Lua script registered with ``FakeRedis``."""
+
+    def __init__(self, redis: "FakeRedis", source: str) -> None:
+        self.redis = redis
+        self.source = source
+
+    async def __call__(self, keys: list | None = None, args: list | None = None):
+        keys, args = keys or [], args or []
+        if self.source == ADD_ONCE_SCRIPT:
+            key, stream_name, *status_key = keys
+            _ttl, _maxlen, task_id, status_ttl, status_size, *rest = args
+            status_fields, fields = rest[:status_size], rest[status_size:]
+            status = None
+            if status_key:
+                mapping = dict(
+                    zip(status_fields[::2], status_fields[1::2], strict=True)
+                )
+                status = (status_key[0], mapping, int(status_ttl))
+            added, value = await self.redis.add_to_stream_once(
+                stream_name,
+                key,
+                dict(zip(fields[::2], fields[1::2], strict=True))
+                | {"task_id": task_id},
+                int(_ttl),
+                status=status,
+            )
+            return [int(added), value]
+        if self.source == TOKEN_BUCKET_SCRIPT:
+            rate, burst, count = args
+            granted, remaining, wait = await self.redis.take_tokens(
+                keys[0], float(rate), int(burst), int(count)
+            )
+            return [granted, str(remaining), str(wait)]
+        if self.source == PROMOTE_SCRIPT:
+            now = int(time.time() * 1000)
+            moved, next_due = await self.redis.promote_due(
+                keys[0], int(args[0]), keys[1:]
+            )
+            head = -1 if next_due is None else now + int(next_due * 1000)
+            return [moved, str(head), str(now)]
+        if self.source == REFRESH_SCRIPT:
+            stream_name, (_group, consumer, *message_ids) = keys[0], args
+            pending = self.redis.pending[stream_name]
+            owned = [
+                msg_id for msg_id in message_ids if pending.get(msg_id) == consumer
+            ]
+            for msg_id in owned:
+                self.redis.delivered[stream_name][msg_id] = time.time()
+            return owned
+        raise NotImplementedError(self.source)
+
+
 class FakeRedis:
     def __init__(self) -> None:
         self.streams = defaultdict(list)
         self.groups = defaultdict(lambda: defaultdict(int))
+        self.values: dict[str, str] = {}
+        self.ttls: dict[str, int] = {}
+        self.hashes: dict[str, dict[str, str]] = defaultdict(dict)
+        self.buckets: dict[str, tuple[float, float]] = {}
+        self.subscribers: dict[str, list[asyncio.Queue]] = defaultdict(list)
+        self.zsets: dict[str, dict[str, float]] = defaultdict(dict)
+        # stream -> consumer -> last read time, and stream -> id -> consumer
+        self.consumers: dict[str, dict[str, float]] = defaultdict(dict)
+        self.pending: dict[str, dict[str, str]] = defaultdict(dict)
+        self.delivered: dict[str, dict[str, float]] = defaultdict(dict)
+        self.deliveries: dict[str, dict[str, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+
+    def register_script(self, source: str) -> FakeScript:
+        return FakeScript(self, source)
+
+    async def get(self, key: str) -> str | None:
+        return self.values.get(key)
+
+    async def set(
+        self, key: str, value: str, nx: bool = False, ex: int | None = None, **_: dict
+    ) -> bool:
+        if nx and key in self.values:
+            return False
+        self.values[key] = value
+        if ex is not None:
+            self.ttls[key] = ex
+        return True
+
+    async def exists(self, key: str) -> int:
+        return int(key in self.values)
+
+    async def hset(self, key: str, mapping: dict) -> int:
+        self.hashes[key].update(mapping)
+        return len(mapping)
+
+    async def hgetall(self, key: str) -> dict:
+        return dict(self.hashes.get(key, {}))
+
+    async def expire(self, key: str, ttl: int, gt: bool = False) -> bool:
+        if gt and (key not in self.values or ttl <= self.ttls.get(key, 0)):
+            return False
+        self.ttls[key] = ttl
+        return True
 
     async def xadd(self, stream_name: str, fields: dict, **_: dict) -> str:
         self.streams[stream_name].append(fields)
         return str(len(self.streams[stream_name]))
 
-    async def add_to_stream(self, stream_name: str, message: dict) -> str:
+    async def add_to_stream(
+        self, stream_name: str, message: dict, status: tuple | None = None
+    ) -> str:
+        if status is not None:
+            await self.set_status(status)
         return await self.xadd(stream_name, message)
 
+    async def add_many_to_stream(
+        self, stream_name: str, messages: list[dict], statuses: list | None = None
+    ) -> list:
+        pipe = self.pipeline(transaction=False)
+        for message in messages:
+            pipe.xadd(stream_name, message)
+        results = await pipe.execute(raise_on_error=False)
+        for status in statuses or []:
+            await self.set_status(status)
+        return results
+
+    async def add_to_stream_once(
+        self,
+        stream_name: str,
+        key: str,
+        message: dict,
+        ttl: int,
+        status: tuple | None = None,
+    ) -> tuple[bool, str]:
+        if key in self.values:
+            return False, self.values[key]
+        stream_id = await self.xadd(stream_name, message)
+        self.values[key] = message["task_id"]
+        if status is not None:
+            await self.set_status(status)
+        return True, stream_id
+
+    async def set_status(self, status: tuple) -> None:
+        key, fields, _ttl = status
+        await self.hset(key, mapping=dict(fields))
+
+    async def get_statuses(self, keys: list[str]) -> list[dict]:
+        return [await self.hgetall(key) for key in keys]
+
+    async def zadd(self, key: str, mapping: dict) -> int:
+        added = len(mapping.keys() - self.zsets[key].keys())
+        self.zsets[key].update(mapping)
+        return added
+
+    async def add_to_schedule(
+        self, set_name: str, entries: list, statuses: list | None = None
+    ) -> int:
+        for status in statuses or []:
+            await self.set_status(status)
+        return await self.zadd(
+            set_name,
+            {
+                json.dumps([stream, [p for i in message.items() for p in i]]): due
+                * 1000
+                for stream, message, due in entries
+            },
+        )
+
+    async def promote_due(
+        self, set_name: str, limit: int, streams: Collection[str] | None = None
+    ) -> tuple[int, float | None]:
+        now = time.time() * 1000
+        zset = self.zsets[set_name]
+        due = sorted((m for m, s in zset.items() if s <= now), key=zset.get)[:limit]
+        entries = [json.loads(member) for member in due]
+        for stream, _ in entries:
+            if streams is not None and stream not in streams:
+                raise ResponseError(f"undeclared stream {stream}")
+        for member, (stream, fields) in zip(due, entries, strict=True):
+            await self.xadd(stream, dict(zip(fields[::2], fields[1::2], strict=True)))
+            del zset[member]
+        if not zset:
+            return len(due), None
+        return len(due), max(0.0, (min(zset.values()) - now) / 1000)
+
+    async def reschedule(
+        self,
+        stream_name: str,
+        message_id: str,
+        set_name: str,
+        message: dict,
+        due: float,
+        *,
+        status: tuple | None = None,
+    ) -> None:
+        await self.add_to_schedule(
+            set_name, [(stream_name, message, due)], [status] if status else None
+        )
+        await self.xack(stream_name, settings.redis.consumer_group, message_id)
+
+    async def take_tokens(
+        self, key: str, rate: float, burst: int, count: int
+    ) -> tuple[int, float, float]:
+        now = time.monotonic()
+        tokens, ts = self.buckets.get(key, (float(burst), now))
+        tokens = min(burst, tokens + (now - ts) * rate)
+        granted = min(count, int(tokens))
+        tokens -= granted
+        self.buckets[key] = (tokens, now)
+        return granted, tokens, (1 - tokens) / rate if granted == 0 else 0.0
+
+    async def put_blob(self, key: str, value: str, ttl: int) -> None:
+        self.values[key] = value
+
+    async def get_blob(self, key: str) -> str | None:
+        return self.values.get(key)
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
     async def ping(self) -> bool:
         return True
 
@@ -39,11 +284,15 @@ class FakeRedis:
         await self.xgroup_create(stream_name, settings.redis.consumer_group)
 
     async def fetch(
-        self, stream_name: str, count: int = 1, block_ms: int = 1000
+        self,
+        stream_name: str,
+        count: int = 1,
+        block_ms: int = 1000,
+        consumer: str | None = None,
     ) -> list[tuple[str, dict]]:
         result = await self.xreadgroup(
             settings.redis.consumer_group,
-            settings.redis.consumer_name,
+            consumer or settings.redis.consumer_name,
             streams={stream_name: ">"},
             count=count,
             block=block_ms,
@@ -54,13 +303,43 @@ class FakeRedis:
                 messages.append((msg_id, data))
         return messages
 
-    async def ack(self, stream_name: str, message_id: str) -> int:
-        return await self.xack(
-            stream_name, settings.redis.consumer_group, message_id
+    async def fetch_lanes(
+        self,
+        stream_names: list[str],
+        count: int = 1,
+        block_ms: int | None = 1000,
+        consumer: str | None = None,
+    ) -> list[tuple[str, str, dict]]:
+        result = await self.xreadgroup(
+            settings.redis.consumer_group,
+            consumer or settings.redis.consumer_name,
+            streams=dict.fromkeys(stream_names, ">"),
+            count=count,
+            block=block_ms,
         )
+        return [
+            (stream, msg_id, data) for stream, msgs in result for msg_id, data in msgs
+        ]
+
+    async def ack(
+        self,
+        stream_name: str,
+        message_id: str,
+        status: tuple | None = None,
+        notify: tuple | None = None,
+    ) -> int:
+        if status is not None:
+            await self.set_status(status)
+        if notify is not None:
+            await self.publish(*notify)
+        return await self.xack(stream_name, settings.redis.consumer_group, message_id)
+
+    async def ack_many(self, acks: list[tuple]) -> list[int]:
+        return [await self.ack(*ack) for ack in acks]
 
     async def xgroup_create(self, stream_name: str, group_name: str, **_: dict) -> None:
-        self.groups[stream_name][group_name] = 0
+        # like BUSYGROUP, an existing group keeps its position
+        self.groups[stream_name].setdefault(group_name, 0)
 
     async def xreadgroup(
         self,
@@ -70,22 +349,135 @@ class FakeRedis:
         count: int = 1,
         block: int | None = None,
     ) -> list[tuple[str, list[tuple[str, dict]]]]:
-        stream_name = next(iter(streams))
-        index = self.groups[stream_name][group_name]
-        if index >= len(self.streams[stream_name]):
+        result = []
+        for stream_name in streams:
+            self.consumers[stream_name][consumer_name] = time.time()
+            index = self.groups[stream_name][group_name]
+            messages = self.streams[stream_name][index : index + count]
+            if not messages:
+                continue
+            self.groups[stream_name][group_name] += len(messages)
+            for i in range(index, index + len(messages)):
+                self.pending[stream_name][str(i + 1)] = consumer_name
+                self.delivered[stream_name][str(i + 1)] = time.time()
+                self.deliveries[stream_name][str(i + 1)] += 1
+            result.append(
+                (
+                    stream_name,
+                    [(str(i + 1), msg) for i, msg in enumerate(messages, start=index)],
+                )
+            )
+        if not result:
             await asyncio.sleep(0)
-            return []
-        messages = self.streams[stream_name][index : index + count]
-        self.groups[stream_name][group_name] += len(messages)
+        return result
+
+    async def publish(self, channel: str, message: str) -> int:
+        for queue in self.subscribers[channel]:
+            queue.put_nowait(message)
+        return len(self.subscribers[channel])
+
+    async def listen(self, channel: str):
+        queue: asyncio.Queue = asyncio.Queue()
+        self.subscribers[channel].append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.subscribers[channel].remove(queue)
+
+    async def xack(self, stream_name: str, group_name: str, *message_ids: str) -> int:
+        for message_id in message_ids:
+            self.pending[stream_name].pop(message_id, None)
+        return len(message_ids)
+
+    async def xautoclaim(
+        self,
+        stream_name: str,
+        group_name: str,
+        consumer_name: str,
+        min_idle_time: int,
+        *,
+        start_id: str = "0-0",
+        count: int | None = None,
+    ) -> list:
+        now = time.time()
+        start = int(start_id.split("-", 1)[0])
+        ids = sorted(
+            (msg_id for msg_id in self.pending[stream_name] if int(msg_id) >= start),
+            key=int,
+        )
+        scanned, rest = ids[: count or 100], ids[count or 100 :]
+        claimed = []
+        for msg_id in scanned:
+            if (now - self.delivered[stream_name][msg_id]) * 1000 < min_idle_time:
+                continue
+            self.pending[stream_name][msg_id] = consumer_name
+            self.delivered[stream_name][msg_id] = now
+            self.deliveries[stream_name][msg_id] += 1
+            claimed.append((msg_id, self.streams[stream_name][int(msg_id) - 1]))
+        return [rest[0] if rest else "0-0", claimed, []]
+
+    async def xpending(self, stream_name: str, group_name: str) -> dict:
+        return {"pending": len(self.pending[stream_name])}
+
+    async def xpending_range(
+        self, stream_name: str, group_name: str, min: str, max: str, count: int
+    ) -> list[dict]:
+        now = time.time()
         return [
-            (
-                stream_name,
-                [(str(i + 1), msg) for i, msg in enumerate(messages, start=index)],
+            {
+                "message_id": msg_id,
+                "consumer": owner,
+                "time_since_delivered": int(
+                    (now - self.delivered[stream_name][msg_id]) * 1000
+                ),
+                "times_delivered": self.deliveries[stream_name][msg_id],
+            }
+            for msg_id, owner in sorted(
+                self.pending[stream_name].items(), key=lambda item: int(item[0])
             )
+            if int(min) <= int(msg_id) <= int(max)
+        ][:count]
+
+    async def xinfo_consumers(self, stream_name: str, group_name: str) -> list[dict]:
+        now = time.time()
+        return [
+            {
+                "name": name,
+                "pending": sum(
+                    owner == name for owner in self.pending[stream_name].values()
+                ),
+                "idle": int((now - seen) * 1000),
+            }
+            for name, seen in self.consumers[stream_name].items()
+        ]
+
+    async def xgroup_delconsumer(
+        self, stream_name: str, group_name: str, consumer_name: str
+    ) -> int:
+        self.consumers[stream_name].pop(consumer_name, None)
+        owned = [
+            msg_id
+            for msg_id, owner in self.pending[stream_name].items()
+            if owner == consumer_name
         ]
+        for msg_id in owned:
+            del self.pending[stream_name][msg_id]
+        return len(owned)
 
-    async def xack(self, stream_name: str, group_name: str, message_id: str) -> int:
-        return 1
+    async def delete_idle_consumers(
+        self, stream_name: str, idle_ms: int, names: list[str] | None = None
+    ) -> list[str]:
+        removed = [
+            consumer["name"]
+            for consumer in await self.xinfo_consumers(stream_name, "")
+            if consumer["pending"] == 0
+            and consumer["idle"] >= idle_ms
+            and (names is None or consumer["name"] in names)
+        ]
+        for name in removed:
+            await self.xgroup_delconsumer(stream_name, "", name)
+        return removed
 
     async def xlen(self, stream_name: str) -> int:
         return len(self.streams[stream_name])
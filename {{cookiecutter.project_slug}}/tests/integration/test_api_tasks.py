@@ -1,10 +1,20 @@
 import pytest
 from httpx import AsyncClient
+from pydantic import BaseModel
 from starlette import status
 import asyncio
+import gzip
 import json
+import time
 
+from {{cookiecutter.python_package_name}}.api import tasks
+from {{cookiecutter.python_package_name}}.api.tasks import BATCH_ENDPOINT_PATH
+from {{cookiecutter.python_package_name}}.services.ingest_queue import IngestQueue
+from {{cookiecutter.python_package_name}}.services.task_status import COMPLETION_CHANNEL
+from {{cookiecutter.python_package_name}}.services.task_types import task_types
 from {{cookiecutter.python_package_name}}.utils import (
+    PRIORITY_STREAMS,
+    SCHEDULED_SET_NAME,
     TASKS_ENDPOINT_PATH,
     TASKS_STREAM_NAME,
     statsd_client,
@@ -14,7 +24,9 @@ from {{cookiecutter.python_package_name}}.utils import (
 pytestmark = pytest.mark.asyncio
 
 
-async def test_should_return_202_and_store_message(async_client: AsyncClient, fake_redis):
+async def test_should_return_202_and_store_message(
+    async_client: AsyncClient, fake_redis
+):
     fake_redis.streams.clear()
     statsd_client.reset()
     tracer.spans.clear()
@@ -32,6 +44,93 @@ async def test_should_return_202_and_store_message(async_client: AsyncClient, fa
     assert tracer.spans and tracer.spans[0].name == "создание_задачи"
 
 
+async def test_should_return_503_when_ingest_queue_full(
+    async_client: AsyncClient, monkeypatch
+):
+    def full(*_: object, **__: object) -> None:
+        raise tasks.IngestQueueFullError("Ingest queue is full")
+
+    monkeypatch.setattr(IngestQueue, "submit", full)
+
+    response = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={"data": "x", "metadata": {}}
+    )
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["retry-after"] == tasks.RETRY_AFTER
+
+
+async def test_should_return_stream_id_in_sync_mode(
+    async_client: AsyncClient, fake_redis, monkeypatch
+):
+    monkeypatch.setattr(tasks, "INGEST_SYNC", True)
+
+    response = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={"data": "x", "metadata": {}}
+    )
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    body = response.json()
+    stored = fake_redis.streams[TASKS_STREAM_NAME][-1]
+    assert body["task_id"] == stored["task_id"]
+    assert body["stream_id"]
+
+
+async def test_should_not_enqueue_duplicate_idempotency_key(
+    async_client: AsyncClient, fake_redis
+):
+    fake_redis.streams.clear()
+    payload = {"data": "x", "metadata": {}}
+    headers = {"Idempotency-Key": "order-42"}
+
+    first = await async_client.post(TASKS_ENDPOINT_PATH, json=payload, headers=headers)
+    second = await async_client.post(TASKS_ENDPOINT_PATH, json=payload, headers=headers)
+
+    assert first.status_code == status.HTTP_202_ACCEPTED
+    assert second.status_code == status.HTTP_200_OK
+    assert second.json() == {"status": "duplicate", "task_id": first.json()["task_id"]}
+    assert len(fake_redis.streams[TASKS_STREAM_NAME]) == 1
+
+
+async def test_should_dedupe_batch_items_by_metadata_key(
+    async_client: AsyncClient, fake_redis
+):
+    fake_redis.streams.clear()
+    item = {"data": "x", "metadata": {"idempotency_key": "batch-key"}}
+
+    response = await async_client.post(BATCH_ENDPOINT_PATH, json=[item, item])
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    body = response.json()
+    assert sorted(r["status"] for r in body["results"]) == ["accepted", "duplicate"]
+    assert len({r["task_id"] for r in body["results"]}) == 1
+    assert len(fake_redis.streams[TASKS_STREAM_NAME]) == 1
+
+
+async def test_should_accept_gzip_body(async_client: AsyncClient, fake_redis):
+    fake_redis.streams.clear()
+    payload = {"data": "x" * 1000, "metadata": {}}
+
+    response = await async_client.post(
+        TASKS_ENDPOINT_PATH,
+        content=gzip.compress(json.dumps(payload).encode()),
+        headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+    )
+    await asyncio.sleep(0)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert json.loads(fake_redis.streams[TASKS_STREAM_NAME][-1]["payload"]) == payload
+
+
+async def test_should_return_415_for_unknown_encoding(async_client: AsyncClient):
+    response = await async_client.post(
+        TASKS_ENDPOINT_PATH, content=b"{}", headers={"Content-Encoding": "br"}
+    )
+
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    assert "gzip" in response.headers["accept-encoding"]
+
+
 async def test_should_return_400_when_payload_invalid(async_client: AsyncClient):
     response = await async_client.post(TASKS_ENDPOINT_PATH, json={"foo": "bar"})
 
@@ -41,8 +140,357 @@ async def test_should_return_400_when_payload_invalid(async_client: AsyncClient)
 async def test_should_return_413_when_payload_too_large(async_client: AsyncClient):
     big_data = "x" * (1024 * 1024 + 1)
     response = await async_client.post(
-        TASKS_ENDPOINT_PATH,
-        json={"data": big_data, "metadata": {}},
+        TASKS_ENDPOINT_PATH, json={"data": big_data, "metadata": {}}
     )
 
     assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
+async def test_should_escape_strings_at_ingest(async_client: AsyncClient, fake_redis):
+    fake_redis.streams.clear()
+
+    response = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={"data": {"html": "<b>"}, "metadata": {}}
+    )
+    await asyncio.sleep(0)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    stored = json.loads(fake_redis.streams[TASKS_STREAM_NAME][-1]["payload"])
+    assert stored["data"] == {"html": "&lt;b&gt;"}
+
+
+async def test_should_return_400_when_payload_too_deep(async_client: AsyncClient):
+    data: list = []
+    for _ in range(100):
+        data = [data]
+
+    response = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={"data": data, "metadata": {}}
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "nesting" in response.json()["detail"]
+
+
+async def test_should_skip_sanitizing_when_lazy(
+    async_client: AsyncClient, fake_redis, monkeypatch
+):
+    fake_redis.streams.clear()
+    monkeypatch.setattr("{{cookiecutter.python_package_name}}.api.tasks.SANITIZE_MODE", "lazy")
+
+    await async_client.post(TASKS_ENDPOINT_PATH, json={"data": "<b>", "metadata": {}})
+    await asyncio.sleep(0)
+
+    stored = json.loads(fake_redis.streams[TASKS_STREAM_NAME][-1]["payload"])
+    assert stored["data"] == "<b>"
+
+
+async def test_should_return_413_for_oversized_batch(async_client: AsyncClient):
+    response = await async_client.post(
+        BATCH_ENDPOINT_PATH, json=[{"data": "x" * (1024 * 1024)}]
+    )
+
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
+async def test_should_enqueue_batch_and_report_per_item(
+    async_client: AsyncClient, fake_redis
+):
+    fake_redis.streams.clear()
+    statsd_client.reset()
+    items = [{"data": 1, "metadata": {}}, {"foo": "bar"}, {"data": 3}]
+
+    response = await async_client.post(BATCH_ENDPOINT_PATH, json=items)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    body = response.json()
+    assert body["accepted"] == 2
+    assert body["rejected"] == 1
+    assert [r["status"] for r in body["results"]] == [
+        "accepted",
+        "rejected",
+        "accepted",
+    ]
+    stored = fake_redis.streams[TASKS_STREAM_NAME]
+    assert [json.loads(m["payload"])["data"] for m in stored] == [1, 3]
+    assert [m["task_id"] for m in stored] == [
+        body["results"][0]["task_id"],
+        body["results"][2]["task_id"],
+    ]
+    assert statsd_client.counters["tasks.batch.accepted"] == 2
+
+
+async def test_should_accept_ndjson_batch_with_bad_line(
+    async_client: AsyncClient, fake_redis
+):
+    fake_redis.streams.clear()
+    body = b'{"data": "a"}\n{not json}\n\n{"data": "b"}\n'
+
+    response = await async_client.post(
+        BATCH_ENDPOINT_PATH,
+        content=body,
+        headers={"content-type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["accepted", "rejected", "accepted"]
+    assert results[1]["detail"] == "Invalid JSON"
+    assert len(fake_redis.streams[TASKS_STREAM_NAME]) == 2
+
+
+async def test_should_reject_batch_that_is_not_an_array(async_client: AsyncClient):
+    response = await async_client.post(BATCH_ENDPOINT_PATH, json={"data": 1})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+async def test_should_return_413_when_batch_too_long(
+    async_client: AsyncClient, monkeypatch
+):
+    monkeypatch.setattr("{{cookiecutter.python_package_name}}.api.tasks.MAX_BATCH_SIZE", 2)
+    response = await async_client.post(
+        BATCH_ENDPOINT_PATH, json=[{"data": i} for i in range(3)]
+    )
+
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
+async def test_should_route_task_to_priority_lane(
+    async_client: AsyncClient, fake_redis, monkeypatch
+):
+    monkeypatch.setattr(tasks, "INGEST_SYNC", True)
+    fake_redis.streams.clear()
+
+    response = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={"data": "x", "metadata": {}, "priority": "high"}
+    )
+    invalid = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={"data": "x", "priority": "urgent"}
+    )
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    stored = fake_redis.streams[PRIORITY_STREAMS["high"]][-1]
+    assert json.loads(stored["payload"]) == {"data": "x", "metadata": {}}
+    assert not fake_redis.streams[TASKS_STREAM_NAME]
+    assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+
+
+async def test_should_report_task_status(
+    async_client: AsyncClient, fake_redis, monkeypatch
+):
+    monkeypatch.setattr(tasks, "INGEST_SYNC", True)
+    monkeypatch.setattr(tasks.tasks_service.statuses, "enabled", True)
+
+    created = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={"data": "x", "metadata": {}}
+    )
+    task_id = created.json()["task_id"]
+
+    single = await async_client.get(f"{TASKS_ENDPOINT_PATH}/{task_id}")
+    missing = await async_client.get(f"{TASKS_ENDPOINT_PATH}/unknown")
+    many = await async_client.get(
+        TASKS_ENDPOINT_PATH, params={"ids": f"{task_id},unknown"}
+    )
+    empty = await async_client.get(TASKS_ENDPOINT_PATH)
+
+    assert single.status_code == status.HTTP_200_OK
+    assert single.json()["state"] == "queued"
+    assert single.json()["task_id"] == task_id
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+    assert many.status_code == status.HTTP_200_OK
+    assert many.json()["tasks"][task_id]["state"] == "queued"
+    assert many.json()["tasks"]["unknown"] is None
+    assert empty.status_code == status.HTTP_400_BAD_REQUEST
+
+
+async def test_should_report_status_of_task_accepted_asynchronously(
+    async_client: AsyncClient, fake_redis, monkeypatch
+):
+    monkeypatch.setattr(tasks.tasks_service.statuses, "enabled", True)
+
+    created = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={"data": "x", "metadata": {}}
+    )
+    task_id = created.json()["task_id"]
+    for _ in range(100):
+        polled = await async_client.get(f"{TASKS_ENDPOINT_PATH}/{task_id}")
+        if polled.status_code == status.HTTP_200_OK:
+            break
+        await asyncio.sleep(0.01)
+
+    assert created.status_code == status.HTTP_202_ACCEPTED
+    assert polled.status_code == status.HTTP_200_OK
+    assert polled.json()["state"] == "queued"
+    assert polled.json()["task_id"] == task_id
+    stored = fake_redis.streams[TASKS_STREAM_NAME][-1]
+    assert stored["task_id"] == task_id
+
+
+async def test_should_wait_for_task_completion(
+    async_client: AsyncClient, fake_redis, monkeypatch
+):
+    monkeypatch.setattr(tasks, "INGEST_SYNC", True)
+    statuses = tasks.tasks_service.statuses
+    monkeypatch.setattr(statuses, "enabled", True)
+    created = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={"data": "x", "metadata": {}}
+    )
+    task_id = created.json()["task_id"]
+
+    async def complete() -> None:
+        while not fake_redis.subscribers[COMPLETION_CHANNEL]:
+            await asyncio.sleep(0)
+        final = statuses.entry(task_id, "succeeded", result={"n": 1})
+        await fake_redis.ack(
+            TASKS_STREAM_NAME,
+            "1",
+            status=final,
+            notify=(COMPLETION_CHANNEL, statuses.event(task_id, final)),
+        )
+
+    try:
+        waited, _ = await asyncio.gather(
+            async_client.get(
+                tasks.WAIT_ENDPOINT_PATH, params={"ids": task_id, "timeout": "5"}
+            ),
+            complete(),
+        )
+        streamed = await async_client.get(
+            tasks.WAIT_ENDPOINT_PATH,
+            params={"ids": f"{task_id},unknown", "timeout": "0"},
+            headers={"Accept": "text/event-stream"},
+        )
+    finally:
+        await tasks.completion_hub.stop()
+
+    assert waited.status_code == status.HTTP_200_OK
+    assert waited.json()["tasks"][task_id]["result"] == {"n": 1}
+    assert waited.json()["pending"] == []
+    assert streamed.headers["content-type"].startswith("text/event-stream")
+    assert "event: status" in streamed.text
+    assert '"pending":["unknown"]' in streamed.text.replace(" ", "")
+
+
+@pytest.fixture
+def resize_type():
+    @task_types.register("resize")
+    class Resize(BaseModel):
+        url: str
+        width: int
+
+    yield Resize
+    task_types.unregister("resize")
+
+
+async def test_should_validate_typed_task_at_ingest(
+    async_client: AsyncClient, fake_redis, resize_type
+):
+    fake_redis.streams.clear()
+    task = {"type": "resize", "data": {"url": "a.png", "width": "10"}}
+
+    accepted = await async_client.post(TASKS_ENDPOINT_PATH, json=task)
+    invalid = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={**task, "data": {"url": "a.png"}}
+    )
+    unknown = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={**task, "type": "crop"}
+    )
+    batch = await async_client.post(
+        BATCH_ENDPOINT_PATH, json=[task, {**task, "data": {"width": 1}}]
+    )
+    await asyncio.sleep(0)
+
+    assert accepted.status_code == status.HTTP_202_ACCEPTED
+    assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+    assert invalid.json()["detail"][0]["loc"] == ["data", "width"]
+    assert unknown.status_code == status.HTTP_400_BAD_REQUEST
+    assert "Unknown task type" in unknown.json()["detail"][0]["msg"]
+    results = batch.json()["results"]
+    assert [r["status"] for r in results] == ["accepted", "rejected"]
+    stored = [json.loads(m["payload"]) for m in fake_redis.streams[TASKS_STREAM_NAME]]
+    assert (
+        stored
+        == [{"type": "resize", "data": {"url": "a.png", "width": 10}, "metadata": {}}]
+        * 2
+    )
+
+
+async def test_should_schedule_delayed_tasks(async_client: AsyncClient, fake_redis):
+    fake_redis.streams.clear()
+
+    delayed = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={"data": 1, "delay": 60, "priority": "high"}
+    )
+    past = await async_client.post(
+        TASKS_ENDPOINT_PATH,
+        json={"data": 2, "run_at": "2000-01-01T00:00:00", "metadata": {}},
+    )
+    both = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={"data": 3, "delay": 1, "run_at": "2000-01-01"}
+    )
+    too_far = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={"data": 4, "delay": 10**9}
+    )
+    keyed = await async_client.post(
+        TASKS_ENDPOINT_PATH,
+        json={"data": 5, "delay": 60},
+        headers={"Idempotency-Key": "k"},
+    )
+    batch = await async_client.post(
+        BATCH_ENDPOINT_PATH, json=[{"data": 6, "delay": 60}, {"data": 7}]
+    )
+    await asyncio.sleep(0)
+
+    assert delayed.status_code == status.HTTP_202_ACCEPTED
+    assert delayed.json()["status"] == "scheduled"
+    assert past.status_code == status.HTTP_202_ACCEPTED
+    assert past.json()["status"] == "accepted"
+    assert both.status_code == status.HTTP_400_BAD_REQUEST
+    assert too_far.status_code == status.HTTP_400_BAD_REQUEST
+    assert keyed.status_code == status.HTTP_400_BAD_REQUEST
+    body = batch.json()
+    assert (body["accepted"], body["scheduled"], body["rejected"]) == (1, 1, 0)
+    stored = fake_redis.streams[TASKS_STREAM_NAME]
+    assert [json.loads(m["payload"])["data"] for m in stored] == [2, 7]
+    members = [json.loads(m) for m in fake_redis.zsets[SCHEDULED_SET_NAME]]
+    assert [stream for stream, _ in members] == [
+        f"{TASKS_STREAM_NAME}:high",
+        TASKS_STREAM_NAME,
+    ]
+    fields = dict(zip(members[0][1][::2], members[0][1][1::2], strict=True))
+    assert fields["task_id"] == delayed.json()["task_id"]
+    assert json.loads(fields["payload"]) == {"data": 1, "metadata": {}}
+
+
+async def test_should_store_client_deadline(async_client: AsyncClient, fake_redis):
+    fake_redis.streams.clear()
+    soon = time.time() + 60
+
+    by_header = await async_client.post(
+        TASKS_ENDPOINT_PATH,
+        json={"data": 1, "metadata": {}},
+        headers={"Task-Deadline": str(soon)},
+    )
+    by_metadata = await async_client.post(
+        TASKS_ENDPOINT_PATH,
+        json={"data": 2, "metadata": {"deadline": "2999-01-01T00:00:00Z"}},
+    )
+    passed = await async_client.post(
+        TASKS_ENDPOINT_PATH,
+        json={"data": 3, "metadata": {}},
+        headers={"Task-Deadline": "2000-01-01T00:00:00Z"},
+    )
+    malformed = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={"data": 4, "metadata": {"deadline": "soon"}}
+    )
+    await asyncio.sleep(0)
+
+    assert by_header.status_code == status.HTTP_202_ACCEPTED
+    assert by_metadata.status_code == status.HTTP_202_ACCEPTED
+    assert passed.status_code == status.HTTP_400_BAD_REQUEST
+    assert malformed.status_code == status.HTTP_400_BAD_REQUEST
+    stored = fake_redis.streams[TASKS_STREAM_NAME]
+    assert [json.loads(m["payload"])["data"] for m in stored] == [1, 2]
+    assert float(stored[0]["deadline"]) == pytest.approx(soon, abs=0.001)
+    assert float(stored[1]["deadline"]) == 32472144000.0
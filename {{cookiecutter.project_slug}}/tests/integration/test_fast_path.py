@@ -0,0 +1,49 @@
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from {{cookiecutter.python_package_name}}.api import app
+from {{cookiecutter.python_package_name}}.api.tasks import ACCEPTED_BODY
+from {{cookiecutter.python_package_name}}.middleware import FastPathMiddleware
+from {{cookiecutter.python_package_name}}.utils import TASKS_ENDPOINT_PATH
+
+pytestmark = pytest.mark.asyncio
+
+
+def fast_path() -> FastPathMiddleware:
+    layer = app.middleware_stack
+    while not isinstance(layer, FastPathMiddleware):
+        layer = layer.app
+    return layer
+
+
+async def test_should_serve_hot_routes_without_router(
+    async_client: AsyncClient,
+) -> None:
+    assert set(fast_path().handlers) == {
+        ("POST", TASKS_ENDPOINT_PATH),
+        ("GET", TASKS_ENDPOINT_PATH),
+        ("HEAD", TASKS_ENDPOINT_PATH),
+        ("GET", "/health"),
+        ("HEAD", "/health"),
+    }
+
+    accepted = await async_client.post(
+        TASKS_ENDPOINT_PATH, json={"data": "x", "metadata": {}}
+    )
+    health = await async_client.get("/health")
+
+    assert accepted.status_code == status.HTTP_202_ACCEPTED
+    task_id = accepted.json()["task_id"]
+    assert accepted.content == ACCEPTED_BODY % task_id.encode()
+    assert accepted.json() == {"status": "accepted", "task_id": task_id}
+    assert accepted.headers["content-type"] == "application/json"
+    assert health.status_code == status.HTTP_200_OK
+
+
+async def test_should_fall_through_to_router(async_client: AsyncClient) -> None:
+    wrong_method = await async_client.post("/health")
+    missing = await async_client.get("/missing")
+
+    assert wrong_method.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
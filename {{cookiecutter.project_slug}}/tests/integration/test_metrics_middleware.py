@@ -28,3 +28,23 @@ async def test_should_collect_duration_and_queue_size(
     assert statsd_client.gauges["task_queue_size"] == len(
         fake_redis.streams[TASKS_STREAM_NAME]
     )
+
+
+async def test_should_sample_queue_size_once_per_interval(
+    async_client: AsyncClient, fake_redis, monkeypatch
+) -> None:
+    calls = 0
+    length = fake_redis.length
+
+    async def counting_length(stream_name: str) -> int:
+        nonlocal calls
+        calls += 1
+        return await length(stream_name)
+
+    monkeypatch.setattr(fake_redis, "length", counting_length)
+
+    for _ in range(3):
+        await async_client.get("/health")
+    await asyncio.sleep(0)
+
+    assert calls == 1
@@ -0,0 +1,127 @@
+import time
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette import status
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from {{cookiecutter.python_package_name}}.api.tasks import ACCEPTED_BODY, EncodedResponse
+from {{cookiecutter.python_package_name}}.middleware import RateLimitMiddleware
+from {{cookiecutter.python_package_name}}.repository.redis_repo import RedisRepository
+from {{cookiecutter.python_package_name}}.services.rate_limiter import RateLimiter
+from {{cookiecutter.python_package_name}}.utils import TASKS_ENDPOINT_PATH
+from tests.conftest import FakeRedis
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_app() -> Starlette:
+    async def ok(_request):
+        return PlainTextResponse("ok")
+
+    repo = RedisRepository(client=FakeRedis())
+    app = Starlette(
+        routes=[
+            Route(TASKS_ENDPOINT_PATH, ok, methods=["POST", "GET"]),
+            Route(TASKS_ENDPOINT_PATH + "/{task_id}", ok),
+            Route(f"{TASKS_ENDPOINT_PATH}-archive", ok, methods=["POST"]),
+            Route("/health", ok),
+        ]
+    )
+    app.add_middleware(
+        RateLimitMiddleware,
+        repo=repo,
+        limiter=RateLimiter(repo, rate=0.1, burst=2, lease_size=1),
+    )
+    return app
+
+
+async def test_should_return_429_with_rate_limit_headers() -> None:
+    transport = ASGITransport(app=make_app())
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        headers = {"X-API-Key": "producer-1"}
+        first = await client.post(TASKS_ENDPOINT_PATH, headers=headers)
+        await client.post(TASKS_ENDPOINT_PATH, headers=headers)
+        throttled = await client.post(TASKS_ENDPOINT_PATH, headers=headers)
+        other = await client.post(TASKS_ENDPOINT_PATH, headers={"X-API-Key": "p-2"})
+        health = await client.get("/health", headers=headers)
+
+    assert first.status_code == status.HTTP_200_OK
+    assert first.headers["x-ratelimit-limit"] == "2"
+    assert throttled.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(throttled.headers["retry-after"]) >= 1
+    assert throttled.headers["x-ratelimit-remaining"] == "0"
+    assert other.status_code == status.HTTP_200_OK
+    assert health.status_code == status.HTTP_200_OK
+
+
+async def test_should_not_leak_headers_between_encoded_responses() -> None:
+    sent: list[EncodedResponse] = []
+
+    async def accepted(_request):
+        sent.append(EncodedResponse(ACCEPTED_BODY % b"1"))
+        return sent[-1]
+
+    repo = RedisRepository(client=FakeRedis())
+    app = Starlette(routes=[Route(TASKS_ENDPOINT_PATH, accepted, methods=["POST"])])
+    app.add_middleware(RateLimitMiddleware, repo=repo)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        first = await client.post(TASKS_ENDPOINT_PATH)
+        second = await client.post(TASKS_ENDPOINT_PATH)
+
+    assert first.headers.get_list("x-ratelimit-limit") == ["100"]
+    assert second.headers.get_list("x-ratelimit-limit") == ["100"]
+    assert sent[0].raw_headers is not sent[1].raw_headers
+    assert len(EncodedResponse(ACCEPTED_BODY % b"1").raw_headers) == 2
+
+
+async def test_should_only_limit_task_submissions() -> None:
+    transport = ASGITransport(app=make_app())
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        for _ in range(3):
+            await client.post(TASKS_ENDPOINT_PATH)
+        throttled = await client.post(TASKS_ENDPOINT_PATH)
+        lookup = await client.get(TASKS_ENDPOINT_PATH, params={"ids": "1"})
+        single = await client.get(f"{TASKS_ENDPOINT_PATH}/1")
+        similar = await client.post(f"{TASKS_ENDPOINT_PATH}-archive")
+
+    assert throttled.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    for response in (lookup, single, similar):
+        assert response.status_code == status.HTTP_200_OK
+        assert "x-ratelimit-limit" not in response.headers
+
+
+async def test_should_pace_websocket_frames() -> None:
+    received: list[str] = []
+
+    async def app(_scope, receive, _send) -> None:
+        while (message := await receive())["type"] == "websocket.receive":
+            received.append(message["text"])
+
+    async def send(_message) -> None:
+        return None
+
+    repo = RedisRepository(client=FakeRedis())
+    ws_path = f"{TASKS_ENDPOINT_PATH}/ws"
+    middleware = RateLimitMiddleware(
+        app,
+        repo=repo,
+        limiter=RateLimiter(repo, rate=20, burst=1, lease_size=1),
+        ws_paths=(ws_path,),
+    )
+    frames = [{"type": "websocket.receive", "text": str(i)} for i in range(3)]
+    frames.append({"type": "websocket.disconnect"})
+
+    async def receive():
+        return frames.pop(0)
+
+    scope = {"type": "websocket", "path": ws_path, "headers": [], "client": None}
+    started = time.monotonic()
+    await middleware(scope, receive, send)
+
+    assert received == ["0", "1", "2"]
+    assert time.monotonic() - started >= 0.09
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from {{cookiecutter.python_package_name}}.api import app as fastapi_app
+from {{cookiecutter.python_package_name}}.api import tasks
+from {{cookiecutter.python_package_name}}.utils import TASKS_STREAM_NAME
+
+
+def test_should_ack_streamed_tasks_in_batches(fake_redis) -> None:
+    fake_redis.streams.clear()
+    client = TestClient(fastapi_app)
+
+    with client.websocket_connect(tasks.WS_ENDPOINT_PATH) as ws:
+        hello = ws.receive_json()
+        ws.send_text(
+            json.dumps(
+                [
+                    {"id": 1, "data": "a"},
+                    {"id": 2, "data": "b", "priority": "low"},
+                    {"id": 3, "priority": "urgent"},
+                ]
+            )
+        )
+        first = ws.receive_json()
+        second = ws.receive_json()
+
+    frames = {frame["type"]: frame for frame in (first, second)}
+    assert hello == {"type": "credit", "credit": tasks.WS_CREDIT}
+    assert frames["nack"]["nacks"][0]["id"] == 3
+    assert frames["nack"]["credit"] == 1
+    acks = frames["ack"]["acks"]
+    assert [ack["id"] for ack in acks] == [1, 2]
+    assert all(ack["status"] == "accepted" for ack in acks)
+    assert frames["ack"]["credit"] == 2
+    stored = fake_redis.streams[TASKS_STREAM_NAME][-1]
+    assert json.loads(stored["payload"]) == {"data": "a", "metadata": {}}
+
+
+def test_should_nack_batch_and_keep_flushing_after_enqueue_error(
+    fake_redis, monkeypatch
+) -> None:
+    enqueue = tasks._enqueue_validated
+    calls = 0
+
+    async def fail_once(service, items):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ConnectionError("redis down")
+        return await enqueue(service, items)
+
+    monkeypatch.setattr(tasks, "_enqueue_validated", fail_once)
+    client = TestClient(fastapi_app)
+
+    with client.websocket_connect(tasks.WS_ENDPOINT_PATH) as ws:
+        ws.receive_json()
+        ws.send_text(json.dumps([{"id": 1, "data": "a"}, {"id": 2, "data": "b"}]))
+        failed = ws.receive_json()
+        ws.send_text(json.dumps({"id": 3, "data": "c"}))
+        retried = ws.receive_json()
+
+    assert failed["type"] == "nack"
+    assert [nack["id"] for nack in failed["nacks"]] == [1, 2]
+    assert failed["credit"] == 2
+    assert retried["type"] == "ack"
+    assert retried["acks"][0]["id"] == 3
+    assert retried["acks"][0]["status"] == "accepted"
+
+
+def test_should_disconnect_producer_exceeding_credit(fake_redis, monkeypatch) -> None:
+    monkeypatch.setattr(tasks, "WS_CREDIT", 1)
+    client = TestClient(fastapi_app)
+
+    with client.websocket_connect(tasks.WS_ENDPOINT_PATH) as ws:
+        assert ws.receive_json()["credit"] == 1
+        ws.send_text(json.dumps([{"data": 1}, {"data": 2}]))
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+
+    assert exc.value.code == 1008
+
+
+def test_should_reject_binary_and_oversized_frames(fake_redis, monkeypatch) -> None:
+    monkeypatch.setattr(tasks, "MAX_BODY_SIZE", 18)
+    client = TestClient(fastapi_app)
+
+    with client.websocket_connect(tasks.WS_ENDPOINT_PATH) as ws:
+        ws.receive_json()
+        ws.send_bytes(b'{"data": 1}')
+        with pytest.raises(WebSocketDisconnect) as binary:
+            ws.receive_json()
+
+    with client.websocket_connect(tasks.WS_ENDPOINT_PATH) as ws:
+        ws.receive_json()
+        # 16 characters, but 20 bytes once encoded
+        ws.send_text(json.dumps({"data": "яяяя"}, ensure_ascii=False))
+        with pytest.raises(WebSocketDisconnect) as oversized:
+            ws.receive_json()
+
+    assert binary.value.code == 1003
+    assert oversized.value.code == 1009
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from {{cookiecutter.python_package_name}}.core.config import settings
+from {{cookiecutter.python_package_name}}.repository.redis_repo import RedisRepository
+from {{cookiecutter.python_package_name}}.services.batch_writer import BatchWriter
+from {{cookiecutter.python_package_name}}.services.tasks_service import TasksService
+from {{cookiecutter.python_package_name}}.utils import PRIORITY_STREAMS, TASKS_STREAM_NAME
+from tests.conftest import FakeRedis
+
+
+class RecordingSend:
+    def __init__(self, fail: set[str] | None = None) -> None:
+        self.batches: list[list[dict]] = []
+        self.fail = fail or set()
+
+    async def __call__(self, messages):
+        self.batches.append(list(messages))
+        await asyncio.sleep(0)
+        return [
+            ValueError(m["id"]) if m["id"] in self.fail else f"{m['id']}-0"
+            for m in messages
+        ]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_share_one_batch() -> None:
+    send = RecordingSend()
+    writer = BatchWriter(send, max_batch=64, max_delay=0.01, target_rtt=1)
+
+    ids = await asyncio.gather(*(writer.write({"id": str(i)}) for i in range(10)))
+
+    assert ids == [f"{i}-0" for i in range(10)]
+    assert len(send.batches) == 1
+
+
+@pytest.mark.asyncio
+async def test_each_caller_gets_its_own_error() -> None:
+    send = RecordingSend(fail={"1"})
+    writer = BatchWriter(send, max_batch=64, max_delay=0.001, target_rtt=1)
+
+    results = await asyncio.gather(
+        *(writer.write({"id": str(i)}) for i in range(3)), return_exceptions=True
+    )
+
+    assert results[0] == "0-0" and results[2] == "2-0"
+    assert isinstance(results[1], ValueError)
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_without_delay_and_size_grows() -> None:
+    send = RecordingSend()
+    writer = BatchWriter(send, max_batch=64, max_delay=60, target_rtt=1)
+
+    await asyncio.wait_for(
+        asyncio.gather(*(writer.write({"id": str(i)}) for i in range(16))), 1
+    )
+
+    assert [len(b) for b in send.batches] == [16]
+    assert writer.batch_size == 32
+
+
+def test_batch_size_shrinks_when_rtt_exceeds_budget() -> None:
+    writer = BatchWriter(RecordingSend(), max_batch=64, max_delay=0, target_rtt=0.005)
+    writer.batch_size, writer.min_rtt, writer.rtt = 32, 0.001, 0.02
+
+    writer._adapt(32, 0.02)
+
+    assert writer.batch_size == 16
+
+
+@pytest.mark.asyncio
+async def test_close_waits_for_queued_and_in_flight_batches() -> None:
+    send = RecordingSend()
+    writer = BatchWriter(send, max_batch=2, max_delay=60, target_rtt=1, max_in_flight=1)
+    writes = [asyncio.ensure_future(writer.write({"id": str(i)})) for i in range(5)]
+    await asyncio.sleep(0)
+
+    await asyncio.wait_for(writer.close(), 1)
+
+    assert all(write.done() for write in writes)
+    assert sum(len(b) for b in send.batches) == 5
+    assert not writer._sending
+
+
+@pytest.mark.asyncio
+async def test_enqueue_task_batches_every_lane_when_enabled(monkeypatch) -> None:
+    monkeypatch.setattr(settings.performance, "enqueue_batching", True)
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    service = TasksService(repo)
+    batches: list[str] = []
+    add_many = repo.add_many_to_stream
+
+    async def record(stream_name: str, messages: list[dict], statuses=None):
+        batches.append(stream_name)
+        return await add_many(stream_name, messages, statuses)
+
+    monkeypatch.setattr(repo, "add_many_to_stream", record)
+
+    ids = await asyncio.gather(
+        *(
+            service.enqueue_task({"data": i, "metadata": {}}, priority=priority)
+            for i in range(5)
+            for priority in ("high", "normal")
+        )
+    )
+    await service.close()
+
+    assert all(ids)
+    assert sorted(batches) == sorted(
+        [PRIORITY_STREAMS["high"], PRIORITY_STREAMS["normal"]]
+    )
+    assert len(fake.streams[TASKS_STREAM_NAME]) == 5
+    assert len(fake.streams[PRIORITY_STREAMS["high"]]) == 5
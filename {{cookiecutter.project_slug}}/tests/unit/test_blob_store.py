@@ -0,0 +1,102 @@
+import os
+import time
+from hashlib import sha256
+
+import pytest
+
+from {{cookiecutter.python_package_name}}.repository.blob_store import (
+    BlobNotFoundError,
+    FileBlobStore,
+    RedisBlobStore,
+)
+from {{cookiecutter.python_package_name}}.repository.redis_repo import RedisRepository
+from tests.conftest import FakeRedis
+
+
+def digest(data: str) -> str:
+    return sha256(data.encode()).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_file_store_round_trip_and_dedupe(tmp_path) -> None:
+    store = FileBlobStore(tmp_path, ttl=60)
+    data = '{"data": "x"}'
+
+    ref = await store.put(digest(data), data)
+    again = await store.put(digest(data), data)
+
+    assert ref == again == digest(data)
+    assert await store.get(ref) == data
+    assert len(list(tmp_path.glob("??/*"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_file_store_rejects_unsafe_and_missing_refs(tmp_path) -> None:
+    store = FileBlobStore(tmp_path, ttl=60)
+
+    with pytest.raises(BlobNotFoundError):
+        await store.get("../../etc/passwd")
+    with pytest.raises(BlobNotFoundError):
+        await store.get("0" * 64)
+
+
+@pytest.mark.asyncio
+async def test_file_store_prunes_expired_blobs(tmp_path) -> None:
+    store = FileBlobStore(tmp_path, ttl=60)
+    old = await store.put(digest("old"), "old")
+    await store.put(digest("new"), "new")
+    path = tmp_path / old[:2] / old
+    os.utime(path, (0, 0))
+
+    assert store.prune() == 1
+    assert not path.exists()
+
+
+@pytest.mark.asyncio
+async def test_file_store_keeps_the_longest_requested_lifetime(tmp_path) -> None:
+    store = FileBlobStore(tmp_path, ttl=60)
+    ref = await store.put(digest("body"), "body", ttl=3600)
+    await store.put(digest("body"), "body")
+    path = tmp_path / ref[:2] / ref
+
+    assert path.stat().st_mtime > time.time() + 3000
+    assert store.prune() == 0
+
+    os.utime(path, (0, 0))
+    await store.touch(ref, 60)
+    assert store.prune() == 0
+    with pytest.raises(BlobNotFoundError):
+        await store.touch(digest("other"), 60)
+
+
+@pytest.mark.asyncio
+async def test_file_store_removes_temp_file_on_failed_write(
+    tmp_path, monkeypatch
+) -> None:
+    store = FileBlobStore(tmp_path, ttl=60)
+
+    def fail(*_: object) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        await store.put(digest("body"), "body")
+
+    assert not list(tmp_path.glob("??/*"))
+
+
+@pytest.mark.asyncio
+async def test_redis_store_round_trip() -> None:
+    fake = FakeRedis()
+    store = RedisBlobStore(RedisRepository(client=fake), ttl=60)
+
+    ref = await store.put(digest("body"), "body")
+
+    assert ref.endswith(digest("body"))
+    assert await store.get(ref) == "body"
+    assert fake.ttls[ref] == 60
+    await store.put(digest("body"), "body", ttl=3600)
+    await store.put(digest("body"), "body")
+    assert fake.ttls[ref] == 3600
+    with pytest.raises(BlobNotFoundError):
+        await store.get(f"{store.prefix}{digest('other')}")
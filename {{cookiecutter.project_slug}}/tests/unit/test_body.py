@@ -0,0 +1,81 @@
+import gzip
+
+import pytest
+from starlette.requests import Request
+
+from {{cookiecutter.python_package_name}}.api.body import (
+    InvalidContentLengthError,
+    PayloadTooLargeError,
+    read_body,
+)
+
+
+def make_request(chunks: list[bytes], headers: dict[str, str] | None = None):
+    calls = {"receive": 0}
+    pending = list(chunks)
+
+    async def receive() -> dict:
+        calls["receive"] += 1
+        body = pending.pop(0) if pending else b""
+        return {"type": "http.request", "body": body, "more_body": bool(pending)}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/",
+        "headers": [
+            (k.lower().encode(), v.encode()) for k, v in (headers or {}).items()
+        ],
+    }
+    return Request(scope, receive), calls
+
+
+@pytest.mark.asyncio
+async def test_should_read_body_in_chunks() -> None:
+    request, _ = make_request([b"ab", b"cd", b"e"])
+
+    assert await read_body(request, limit=5) == b"abcde"
+
+
+@pytest.mark.asyncio
+async def test_should_reject_declared_length_without_reading() -> None:
+    request, calls = make_request([b"x"], {"content-length": "500000000"})
+
+    with pytest.raises(PayloadTooLargeError):
+        await read_body(request, limit=10)
+    assert calls["receive"] == 0
+
+
+@pytest.mark.asyncio
+async def test_should_stop_reading_once_limit_is_passed() -> None:
+    request, calls = make_request([b"x" * 6, b"x" * 6, b"x" * 6, b"x" * 6])
+
+    with pytest.raises(PayloadTooLargeError):
+        await read_body(request, limit=10)
+    assert calls["receive"] == 2
+
+
+@pytest.mark.asyncio
+async def test_should_reject_malformed_content_length() -> None:
+    request, _ = make_request([b"x"], {"content-length": "abc"})
+
+    with pytest.raises(InvalidContentLengthError):
+        await read_body(request, limit=10)
+
+
+@pytest.mark.asyncio
+async def test_should_decompress_gzip_body() -> None:
+    request, _ = make_request(
+        [gzip.compress(b'{"a": 1}')], {"content-encoding": "gzip"}
+    )
+
+    assert await read_body(request, limit=100) == b'{"a": 1}'
+
+
+@pytest.mark.asyncio
+async def test_should_limit_decompressed_size() -> None:
+    bomb = gzip.compress(b"0" * 100_000)
+    request, _ = make_request([bomb], {"content-encoding": "gzip"})
+
+    with pytest.raises(PayloadTooLargeError):
+        await read_body(request, limit=1000)
@@ -0,0 +1,63 @@
+import importlib.util
+import json
+
+import pytest
+
+from {{cookiecutter.python_package_name}}.core import codec
+
+BACKENDS = [
+    pytest.param(
+        name,
+        marks=pytest.mark.skipif(
+            name != "json" and importlib.util.find_spec(name) is None,
+            reason=f"{name} is not installed",
+        ),
+    )
+    for name in ("orjson", "msgspec", "json")
+]
+
+
+@pytest.fixture
+def restore_backend():
+    original = codec.backend()
+    yield
+    codec.use_backend(original)  # type: ignore[arg-type]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_should_round_trip_with_backend(backend: str, restore_backend) -> None:
+    assert codec.use_backend(backend) == backend  # type: ignore[arg-type]
+    value = {"data": ["x", 1, 2.5, None, True], "metadata": {"ключ": "значение"}}
+
+    encoded = codec.dumps(value)
+
+    assert isinstance(encoded, str)
+    assert json.loads(encoded) == value
+    assert codec.loads(encoded) == value
+    assert codec.loads(codec.dumpb(value)) == value
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_should_raise_value_error_on_invalid_json(
+    backend: str, restore_backend
+) -> None:
+    codec.use_backend(backend)  # type: ignore[arg-type]
+
+    with pytest.raises(ValueError):
+        codec.loads(b"{not json")
+    with pytest.raises(ValueError):
+        codec.loads(b"\xff\xfe")
+
+
+def test_auto_prefers_installed_fast_backend(restore_backend) -> None:
+    expected = next(
+        (n for n in ("orjson", "msgspec") if importlib.util.find_spec(n)), "json"
+    )
+
+    assert codec.use_backend("auto") == expected
+
+
+def test_should_encode_wide_integers(restore_backend) -> None:
+    codec.use_backend("auto")
+
+    assert codec.loads(codec.dumps({"n": 2**70}))["n"] in (2**70, float(2**70))
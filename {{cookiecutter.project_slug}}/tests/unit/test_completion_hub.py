@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from {{cookiecutter.python_package_name}}.services.completion_hub import CompletionHub
+from {{cookiecutter.python_package_name}}.services.task_status import COMPLETION_CHANNEL, TaskStatusCodec
+from {{cookiecutter.python_package_name}}.services.tasks_service import TasksService
+from tests.conftest import FakeRedis
+
+
+def _event(task_id: str) -> str:
+    status = TaskStatusCodec(enabled=True).entry(task_id, "succeeded", result=1)
+    assert status is not None
+    return TaskStatusCodec.event(task_id, status)
+
+
+@pytest.mark.asyncio
+async def test_completion_reaches_every_waiter_over_one_subscription() -> None:
+    fake = FakeRedis()
+    hub = CompletionHub(TasksService(fake))  # type: ignore[arg-type]
+
+    first = hub.register(["t-1", "t-2"])
+    second = hub.register(["t-1"])
+    await asyncio.sleep(0)
+    await fake.publish(COMPLETION_CHANNEL, _event("t-1"))
+    await asyncio.sleep(0)
+
+    assert len(fake.subscribers[COMPLETION_CHANNEL]) == 1
+    assert first["t-1"].result()["result"] == 1
+    assert second["t-1"].result()["state"] == "succeeded"
+    assert not first["t-2"].done()
+
+    hub.release(first)
+    hub.release(second)
+    assert hub.waiting == 0
+    await hub.stop()
+    assert not fake.subscribers[COMPLETION_CHANNEL]
+
+
+@pytest.mark.asyncio
+async def test_malformed_events_are_ignored() -> None:
+    fake = FakeRedis()
+    hub = CompletionHub(TasksService(fake))  # type: ignore[arg-type]
+
+    futures = hub.register(["t-1"])
+    await asyncio.sleep(0)
+    await fake.publish(COMPLETION_CHANNEL, "not json")
+    await fake.publish(COMPLETION_CHANNEL, _event("t-1"))
+    await asyncio.sleep(0)
+
+    assert futures["t-1"].done()
+    hub.release(futures)
+    await hub.stop()
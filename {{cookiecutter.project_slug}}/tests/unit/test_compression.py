@@ -0,0 +1,94 @@
+import gzip
+import json
+import zlib
+
+import pytest
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+from {{cookiecutter.python_package_name}}.core.compression import (
+    ZSTD_AVAILABLE,
+    DecompressedSizeError,
+    PayloadCodec,
+    UnsupportedEncodingError,
+    decompress,
+    train_zstd_dictionary,
+)
+
+needs_zstd = pytest.mark.skipif(not ZSTD_AVAILABLE, reason="zstandard not installed")
+PAYLOAD = json.dumps(
+    {
+        "data": {
+            "items": [{"id": i, "name": f"item-{i}", "tags": ["a"]} for i in range(100)]
+        },
+        "metadata": {},
+    }
+)
+
+
+def test_decompress_gzip_and_deflate() -> None:
+    raw = PAYLOAD.encode()
+
+    assert decompress(gzip.compress(raw), "gzip", len(raw)) == raw
+    assert decompress(zlib.compress(raw), "deflate", len(raw)) == raw
+    assert decompress(raw, "identity", 0) == raw
+
+
+def test_decompress_stops_at_limit() -> None:
+    with pytest.raises(DecompressedSizeError):
+        decompress(gzip.compress(b"0" * 1_000_000), "gzip", 1024)
+
+
+@needs_zstd
+def test_decompress_zstd_stops_at_limit() -> None:
+    bomb = zstandard.ZstdCompressor().compress(b"0" * 1_000_000)
+
+    assert decompress(bomb, "zstd", 1_000_000) == b"0" * 1_000_000
+    with pytest.raises(DecompressedSizeError):
+        decompress(bomb, "zstd", 1024)
+
+
+def test_decompress_rejects_unknown_and_corrupt_bodies() -> None:
+    with pytest.raises(UnsupportedEncodingError):
+        decompress(b"x", "br", 10)
+    with pytest.raises(ValueError):
+        decompress(b"not gzip", "gzip", 10)
+
+
+def test_payload_codec_zlib_round_trip() -> None:
+    codec = PayloadCodec("zlib", min_size=10)
+
+    stored, encoding = codec.encode(PAYLOAD)
+
+    assert encoding == "zlib+b64"
+    assert len(stored) < len(PAYLOAD)
+    assert codec.decode(stored, encoding) == PAYLOAD
+
+
+def test_payload_codec_keeps_small_payloads_plain() -> None:
+    codec = PayloadCodec("zlib", min_size=1024)
+
+    assert codec.encode('{"data": 1}') == ('{"data": 1}', "")
+    assert codec.decode('{"data": 1}') == '{"data": 1}'
+
+
+@needs_zstd
+def test_payload_codec_zstd_with_dictionary() -> None:
+    samples = [PAYLOAD.replace("item", f"v{i}").encode() for i in range(200)]
+    dictionary = train_zstd_dictionary(samples, size=4096)
+    codec = PayloadCodec("zstd", min_size=10, dictionary=dictionary)
+    plain = PayloadCodec("zstd", min_size=10)
+
+    stored, encoding = codec.encode(PAYLOAD)
+
+    assert encoding == "zstd+b64"
+    assert len(stored) < len(plain.encode(PAYLOAD)[0])
+    assert codec.decode(stored, encoding) == PAYLOAD
+
+
+def test_payload_codec_rejects_unknown_encoding() -> None:
+    with pytest.raises(ValueError):
+        PayloadCodec().decode("abc", "lz4+b64")
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from {{cookiecutter.python_package_name}}.services.concurrency_limiter import AdaptiveLimiter
+from {{cookiecutter.python_package_name}}.utils import statsd_client
+
+pytestmark = pytest.mark.asyncio
+
+
+async def cycle(limiter: AdaptiveLimiter, latency: float, failed: bool = False) -> None:
+    """Run one limit's worth of tasks with the same outcome, keeping slots busy."""
+    tasks = int(limiter.limit)
+    for _ in range(tasks):
+        await limiter.acquire()
+    for _ in range(tasks):
+        limiter.release(latency, failed)
+        if limiter.available:
+            await limiter.acquire()
+    while limiter.in_flight:
+        limiter.release()
+
+
+async def test_should_grow_while_latency_holds() -> None:
+    limiter = AdaptiveLimiter(max_limit=40, initial_limit=4)
+
+    await cycle(limiter, 0.01)
+    assert limiter.limit == 8
+
+    for _ in range(5):
+        await cycle(limiter, 0.01)
+    assert limiter.limit == 40
+
+
+async def test_should_back_off_once_per_latency_on_slow_tasks() -> None:
+    limiter = AdaptiveLimiter(max_limit=100, initial_limit=20)
+    await cycle(limiter, 0.01)
+    grown = limiter.limit
+
+    await cycle(limiter, 0.2)
+    await cycle(limiter, 0.2)
+
+    assert limiter.limit == pytest.approx(grown * 0.9)
+
+    limiter._decreased_at = 0.0
+    await cycle(limiter, 0.2)
+    assert limiter.limit == pytest.approx(grown * 0.81)
+
+
+async def test_should_back_off_on_errors_and_stay_fixed_when_disabled() -> None:
+    limiter = AdaptiveLimiter(max_limit=100, initial_limit=20)
+    await cycle(limiter, 0.01, failed=True)
+    assert limiter.limit == 18
+
+    fixed = AdaptiveLimiter(max_limit=5, initial_limit=1, adaptive=False)
+    await cycle(fixed, 10.0, failed=True)
+    assert fixed.limit == 5
+
+
+async def test_should_queue_waiters_and_report_limit() -> None:
+    limiter = AdaptiveLimiter(max_limit=1, adaptive=False)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    cancelled = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    limiter.release()
+    await waiter
+    assert limiter.in_flight == 1
+    assert cancelled.cancelled()
+
+    statsd_client.reset()
+    await limiter.report()
+    assert statsd_client.gauges["concurrency.limit"] == 1
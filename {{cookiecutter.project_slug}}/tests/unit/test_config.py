@@ -1,10 +1,6 @@
 from pathlib import Path
 
-from {{cookiecutter.python_package_name}}.core.config import (
-    AppSettings,
-    DATA_DIR,
-    LogSettings,
-)
+from {{cookiecutter.python_package_name}}.core.config import AppSettings, DATA_DIR, LogSettings
 
 
 def test_log_settings_instantiation():
@@ -21,8 +17,6 @@ def test_log_settings_env_override(monkeypatch):
     assert log_settings.console_level == "WARNING"
 
 
-
-
 def test_app_settings_instantiation(monkeypatch):
     # Prevent modification of actual .env for tests if loaded
     monkeypatch.setenv("APP_APP_ENV", "test")  # Respect env_prefix
@@ -50,6 +44,8 @@ def test_redis_settings_defaults():
     assert redis.stream_name == "{{cookiecutter.redis_stream_name}}"
     assert redis.consumer_group == "{{cookiecutter.redis_consumer_group}}"
     assert redis.consumer_name == "{{cookiecutter.redis_consumer_name}}"
+    assert redis.consumer_idle_timeout == 3600
+    assert redis.idempotency_ttl == 86_400
 
 
 def test_redis_settings_env_override(monkeypatch):
@@ -96,13 +92,99 @@ def test_service_defaults():
     assert svc.port == {{cookiecutter.internal_app_port}}
 
 
+def test_claim_check_defaults():
+    cfg = AppSettings()
+    claim = cfg.claim_check
+    assert claim.threshold == 0
+    assert claim.store == "redis"
+    assert claim.ttl == 86_400
+    assert claim.path.name == "blobs"
+    assert claim.prune_interval == 3600.0
+
+
+def test_rate_limit_defaults():
+    cfg = AppSettings()
+    limit = cfg.rate_limit
+    assert limit.enabled is False
+    assert limit.rate == 50.0
+    assert limit.burst == 100
+    assert limit.lease_size == 10
+    assert limit.identity_header == "x-api-key"
+
+
+def test_task_status_defaults():
+    cfg = AppSettings()
+    status = cfg.task_status
+    assert status.enabled is False
+    assert status.ttl == 86_400
+    assert status.max_result_size == 65_536
+    assert status.max_lookup == 100
+    assert status.max_wait == 30
+    assert status.heartbeat == 15
+
+
+def test_scheduler_defaults():
+    cfg = AppSettings()
+    scheduler = cfg.scheduler
+    assert scheduler.batch_size == 500
+    assert scheduler.poll_interval == 0.1
+    assert scheduler.max_delay == 604_800
+    assert scheduler.retry_backoff == 1.0
+
+
+def test_reclaim_defaults():
+    reclaim = AppSettings().reclaim
+    assert reclaim.enabled is True
+    assert reclaim.min_idle == 300.0
+    assert reclaim.batch_size == 100
+    assert reclaim.interval == 5.0
+
+
+def test_process_pool_defaults():
+    pool = AppSettings().process_pool
+    assert pool.workers == 0
+    assert pool.max_tasks_per_child == 1000
+    assert pool.max_pending == 0
+    assert pool.start_method == "forkserver"
+
+
+def test_thread_pool_defaults():
+    pool = AppSettings().thread_pool
+    assert pool.workers == 0
+    assert pool.max_pending == 0
+
+
 def test_performance_defaults():
     cfg = AppSettings()
     perf = cfg.performance
     assert perf.uvloop_enabled is True
+    assert perf.asgi_fast_path is True
     assert perf.worker_processes == "auto"
     assert perf.max_concurrent_tasks == 1000
+    assert perf.adaptive_concurrency is True
+    assert perf.min_concurrent_tasks == 1
+    assert perf.initial_concurrent_tasks == 20
+    assert perf.concurrency_latency_tolerance == 2.0
     assert perf.task_timeout == 30
     assert perf.max_payload_size == 1_048_576
+    assert perf.max_batch_size == 1000
+    assert perf.ingest_queue_size == 10_000
+    assert perf.ingest_workers == 16
+    assert perf.ingest_retry_after == 1
+    assert perf.ingest_sync is False
+    assert perf.ws_ingest_credit == 1000
+    assert perf.enqueue_batching is False
+    assert perf.enqueue_batch_max == 256
+    assert perf.payload_compression == "none"
+    assert perf.json_backend == "auto"
+    assert perf.sanitize_mode == "ingest"
+    assert perf.sanitize_max_depth == 64
+    assert perf.sanitize_max_nodes == 100_000
+    assert perf.lane_weight_high == 8
+    assert perf.lane_weight_normal == 4
+    assert perf.lane_weight_low == 1
+    assert perf.stream_readers == 1
+    assert perf.fetch_batch_max == 64
+    assert perf.prefetch_count == 8
+    assert perf.ack_batch_max == 256
     assert perf.shutdown_timeout == 30
-
@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+
+from {{cookiecutter.python_package_name}}.repository.redis_repo import RedisRepository
+from {{cookiecutter.python_package_name}}.services.delayed_tasks import DelayedTaskScheduler
+from {{cookiecutter.python_package_name}}.utils import (
+    SCHEDULED_SET_NAME,
+    TASKS_STREAM_NAME,
+    statsd_client,
+)
+from tests.conftest import FakeRedis
+
+pytestmark = pytest.mark.asyncio
+
+
+async def schedule(repo: RedisRepository, *dues: float) -> None:
+    await repo.add_to_schedule(
+        SCHEDULED_SET_NAME,
+        [(TASKS_STREAM_NAME, {"n": str(i)}, due) for i, due in enumerate(dues)],
+    )
+
+
+async def test_should_sleep_until_next_task_is_due() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    scheduler = DelayedTaskScheduler(repo, batch_size=10, poll_interval=1.0)
+
+    assert await scheduler.promote() == 1.0
+    await schedule(repo, time.time() + 0.3)
+    assert 0.2 < await scheduler.promote() <= 0.3
+    assert not fake.streams[TASKS_STREAM_NAME]
+
+
+async def test_should_continue_immediately_after_full_batch() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    scheduler = DelayedTaskScheduler(repo, batch_size=2, poll_interval=1.0)
+    statsd_client.reset()
+    past = time.time() - 1
+    await schedule(repo, past, past, past)
+
+    assert await scheduler.promote() == 0.0
+    assert await scheduler.promote() == 1.0
+    assert len(fake.streams[TASKS_STREAM_NAME]) == 3
+    assert statsd_client.counters["tasks.scheduled.promoted"] == 3
+
+
+async def test_should_promote_in_background() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    scheduler = DelayedTaskScheduler(repo, poll_interval=0.01)
+    await schedule(repo, time.time() + 0.05)
+
+    await scheduler.start()
+    await _wait_for(lambda: fake.streams[TASKS_STREAM_NAME])
+    await scheduler.stop()
+
+    assert fake.streams[TASKS_STREAM_NAME] == [{"n": "0"}]
+
+
+async def _wait_for(condition) -> None:
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
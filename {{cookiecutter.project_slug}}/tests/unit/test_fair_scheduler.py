@@ -0,0 +1,29 @@
+from collections import Counter
+
+import pytest
+
+from {{cookiecutter.python_package_name}}.services.fair_scheduler import WeightedFairScheduler
+
+
+def test_picks_follow_weights() -> None:
+    scheduler = WeightedFairScheduler({"high": 8, "normal": 4, "low": 1})
+
+    picks = [scheduler.pick(["high", "normal", "low"]) for _ in range(26)]
+
+    assert Counter(picks) == {"high": 16, "normal": 8, "low": 2}
+    # every lane is served within one round of 13 picks
+    assert set(picks[:13]) == {"high", "normal", "low"}
+    assert picks[:2] == ["high", "normal"]
+
+
+def test_idle_lanes_are_skipped() -> None:
+    scheduler = WeightedFairScheduler({"high": 8, "normal": 4, "low": 1})
+
+    assert [scheduler.pick(["low"]) for _ in range(3)] == ["low"] * 3
+
+
+def test_pick_without_ready_lanes_raises() -> None:
+    scheduler = WeightedFairScheduler({"normal": 1})
+
+    with pytest.raises(ValueError):
+        scheduler.pick([])
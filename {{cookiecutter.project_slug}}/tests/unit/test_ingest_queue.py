@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from {{cookiecutter.python_package_name}}.repository.redis_repo import RedisRepository
+from {{cookiecutter.python_package_name}}.services.ingest_queue import IngestQueue, IngestQueueFullError
+from {{cookiecutter.python_package_name}}.services.tasks_service import TasksService
+from {{cookiecutter.python_package_name}}.utils import TASKS_STREAM_NAME
+from tests.conftest import FakeRedis
+
+
+@pytest.mark.asyncio
+async def test_submit_flushes_to_stream_with_given_task_id() -> None:
+    fake = FakeRedis()
+    queue = IngestQueue(TasksService(RedisRepository(client=fake)), 4, 2)
+
+    queue.submit({"data": "x", "metadata": {}}, task_id="t-1")
+    await queue.stop(1)
+
+    stored = fake.streams[TASKS_STREAM_NAME][0]
+    assert stored["task_id"] == "t-1"
+    assert json.loads(stored["payload"]) == {"data": "x", "metadata": {}}
+
+
+@pytest.mark.asyncio
+async def test_submit_raises_when_full() -> None:
+    queue = IngestQueue(TasksService(RedisRepository(client=FakeRedis())), 1, 1)
+
+    queue.submit({"data": 1, "metadata": {}})
+    with pytest.raises(IngestQueueFullError):
+        queue.submit({"data": 2, "metadata": {}})
+    assert queue.depth == 1
+    await queue.stop(1)
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_buffered_payloads() -> None:
+    fake = FakeRedis()
+    queue = IngestQueue(TasksService(RedisRepository(client=fake)), 10, 1)
+    await queue.start()
+
+    for i in range(5):
+        queue.submit({"data": i, "metadata": {}})
+    await queue.stop(1)
+
+    assert len(fake.streams[TASKS_STREAM_NAME]) == 5
+    assert queue.depth == 0
@@ -0,0 +1,27 @@
+from {{cookiecutter.python_package_name}}.utils.lru import LRUCache
+
+
+def test_evicts_least_recently_used() -> None:
+    cache: LRUCache[str, int] = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_expired_entries_are_dropped(monkeypatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr("{{cookiecutter.python_package_name}}.utils.lru.time.monotonic", lambda: now[0])
+    cache: LRUCache[str, int] = LRUCache(2, ttl=10)
+    cache.set("a", 1)
+
+    now[0] = 111.0
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
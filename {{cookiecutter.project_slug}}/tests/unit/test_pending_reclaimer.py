@@ -0,0 +1,117 @@
+import time
+
+import pytest
+
+from {{cookiecutter.python_package_name}}.repository.redis_repo import RedisRepository
+from {{cookiecutter.python_package_name}}.services.pending_reclaimer import PendingReclaimer
+from {{cookiecutter.python_package_name}}.utils import TASKS_STREAM_NAME, statsd_client
+from tests.conftest import FakeRedis
+
+pytestmark = pytest.mark.asyncio
+
+
+async def orphan(
+    fake: FakeRedis, repo: RedisRepository, count: int, age: float
+) -> None:
+    """Leave ``count`` messages pending under a consumer that went away."""
+    for i in range(count):
+        await repo.add_to_stream(TASKS_STREAM_NAME, {"n": str(i)})
+    await repo.fetch_lanes([TASKS_STREAM_NAME], count=count, consumer="dead")
+    for msg_id in fake.delivered[TASKS_STREAM_NAME]:
+        fake.delivered[TASKS_STREAM_NAME][msg_id] -= age
+    fake.consumers[TASKS_STREAM_NAME]["dead"] -= age
+
+
+def reclaimer_for(
+    repo: RedisRepository,
+    claimed: list,
+    room: int = 100,
+    buried: list | None = None,
+    **kwargs,
+):
+    async def bury(stream: str, msg_id: str, fields: dict, deliveries: int) -> None:
+        if buried is not None:
+            buried.append((fields["n"], deliveries))
+
+    return PendingReclaimer(
+        repo,
+        {TASKS_STREAM_NAME: "normal"},
+        "alive",
+        lambda stream, msg_id, fields: claimed.append(fields["n"]),
+        lambda: room - len(claimed),
+        bury=bury,
+        **kwargs,
+    )
+
+
+async def test_should_claim_only_idle_messages() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await orphan(fake, repo, 2, age=600)
+    await repo.add_to_stream(TASKS_STREAM_NAME, {"n": "fresh"})
+    await repo.fetch_lanes([TASKS_STREAM_NAME], consumer="busy")
+    claimed: list[str] = []
+    statsd_client.reset()
+
+    assert await reclaimer_for(repo, claimed, min_idle=60).reclaim() == 2
+
+    assert claimed == ["0", "1"]
+    assert fake.pending[TASKS_STREAM_NAME] == {"1": "alive", "2": "alive", "3": "busy"}
+    assert statsd_client.counters["tasks.reclaimed"] == 2
+    assert statsd_client.gauges["pel.normal.size"] == 3
+
+
+async def test_should_claim_in_bounded_batches() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await orphan(fake, repo, 5, age=600)
+    claimed: list[str] = []
+    reclaimer = reclaimer_for(repo, claimed, room=3, min_idle=60, batch_size=2)
+
+    assert await reclaimer.reclaim() == 3
+    assert claimed == ["0", "1", "2"]
+    assert reclaimer._cursors[TASKS_STREAM_NAME] == "4"
+
+    claimed.clear()
+    assert await reclaimer.reclaim() == 2
+    assert claimed == ["3", "4"]
+    assert reclaimer._cursors[TASKS_STREAM_NAME] == "0-0"
+
+
+async def test_should_remove_dead_consumer_once_drained() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await orphan(fake, repo, 1, age=time.time())
+    claimed: list[str] = []
+    reclaimer = reclaimer_for(repo, claimed, min_idle=60)
+    reclaimer.consumer_idle_ms = 60_000
+
+    await reclaimer.reclaim()
+
+    assert claimed == ["0"]
+    assert "dead" not in fake.consumers[TASKS_STREAM_NAME]
+
+
+async def test_should_bury_messages_delivered_too_often() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await orphan(fake, repo, 2, age=600)
+    fake.deliveries[TASKS_STREAM_NAME]["1"] = 3
+    claimed: list[str] = []
+    buried: list[tuple[str, int]] = []
+    reclaimer = reclaimer_for(
+        repo, claimed, buried=buried, min_idle=60, max_deliveries=3
+    )
+
+    assert await reclaimer.reclaim() == 2
+
+    assert claimed == ["1"]
+    assert buried == [("0", 4)]
+
+
+async def test_should_refuse_min_idle_below_task_timeout() -> None:
+    reclaimer = reclaimer_for(RedisRepository(client=FakeRedis()), [], min_idle=60)
+
+    reclaimer.check_min_idle(59.0)
+    with pytest.raises(ValueError, match="RECLAIM_MIN_IDLE"):
+        reclaimer.check_min_idle(60.0)
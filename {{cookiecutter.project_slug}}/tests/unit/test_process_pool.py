@@ -0,0 +1,94 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from {{cookiecutter.python_package_name}}.repository.redis_repo import RedisRepository
+from {{cookiecutter.python_package_name}}.services.process_pool import (
+    TaskProcessPool,
+    cpu_bound,
+    is_cpu_bound,
+)
+from {{cookiecutter.python_package_name}}.services.task_processor import TaskProcessor
+from {{cookiecutter.python_package_name}}.utils import TASKS_STREAM_NAME
+from tests.conftest import FakeRedis
+
+pytestmark = pytest.mark.asyncio
+
+
+@cpu_bound
+def double(payload: dict) -> dict:
+    return {"pid": os.getpid(), "v": payload["data"] * 2}
+
+
+def pid() -> int:
+    return os.getpid()
+
+
+async def test_should_mark_cpu_bound_handlers() -> None:
+    assert is_cpu_bound(double)
+    assert not is_cpu_bound(pid)
+
+
+async def test_should_reject_cpu_bound_methods() -> None:
+    with pytest.raises(TypeError, match="module-level"):
+
+        class Processor(TaskProcessor):
+            @cpu_bound
+            def handle(self, payload: dict) -> dict:  # type: ignore[override]
+                return payload
+
+    class Patched(TaskProcessor):
+        pass
+
+    Patched.handle = cpu_bound(double)  # type: ignore[assignment]
+    processor = Patched(RedisRepository(client=FakeRedis()))
+
+    with pytest.raises(TypeError, match="module-level"):
+        await processor.start()
+    assert not processor.pool.running
+
+
+async def test_should_replace_worker_after_max_tasks() -> None:
+    pool = TaskProcessPool(workers=1, max_tasks_per_child=1, max_pending=1)
+    with pytest.raises(RuntimeError):
+        await pool.run(pid)
+
+    await pool.start([__name__])
+    try:
+        first = await pool.run(pid)
+        second = await pool.run(pid)
+    finally:
+        await pool.stop()
+
+    assert os.getpid() not in (first, second)
+    assert first != second
+    assert not pool.running
+
+
+async def test_cpu_bound_handler_runs_in_worker_process() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await repo.add_to_stream(
+        TASKS_STREAM_NAME,
+        {"task_id": "t-1", "payload": json.dumps({"data": 21, "metadata": {}})},
+    )
+    processor = TaskProcessor(repo)
+    processor.pool = TaskProcessPool(workers=1)
+    processor.statuses.enabled = True
+    processor.handle = double  # type: ignore[assignment]
+
+    status_key = processor.statuses.key("t-1")
+    await processor.start()
+    for _ in range(500):
+        if fake.hashes[status_key].get("state") == "succeeded":
+            break
+        await asyncio.sleep(0.01)
+    await processor.stop()
+
+    (status,) = await repo.get_statuses([status_key])
+    result = json.loads(status["result"])
+    assert status["state"] == "succeeded"
+    assert result["v"] == 42
+    assert result["pid"] != os.getpid()
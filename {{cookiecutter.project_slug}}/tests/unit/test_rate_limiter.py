@@ -0,0 +1,45 @@
+import pytest
+
+from {{cookiecutter.python_package_name}}.repository.redis_repo import RedisRepository
+from {{cookiecutter.python_package_name}}.services.rate_limiter import RateLimiter
+from tests.conftest import FakeRedis
+
+
+class CountingRedis(FakeRedis):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    async def take_tokens(self, key, rate, burst, count):
+        self.calls += 1
+        return await super().take_tokens(key, rate, burst, count)
+
+
+@pytest.mark.asyncio
+async def test_leased_tokens_are_spent_locally() -> None:
+    fake = CountingRedis()
+    limiter = RateLimiter(
+        RedisRepository(client=fake), rate=1, burst=20, lease_size=5, lease_ttl=60
+    )
+
+    decisions = [await limiter.acquire("key:a") for _ in range(10)]
+
+    assert all(d.allowed for d in decisions)
+    assert fake.calls == 2
+    assert decisions[-1].remaining == 10
+
+
+@pytest.mark.asyncio
+async def test_throttles_when_bucket_is_empty() -> None:
+    fake = CountingRedis()
+    limiter = RateLimiter(
+        RedisRepository(client=fake), rate=0.5, burst=2, lease_size=2, lease_ttl=60
+    )
+
+    results = [await limiter.acquire("ip:1.2.3.4") for _ in range(4)]
+
+    assert [d.allowed for d in results] == [True, True, False, False]
+    assert results[2].retry_after > 0
+    assert fake.calls == 2
+    other = await limiter.acquire("ip:5.6.7.8")
+    assert other.allowed
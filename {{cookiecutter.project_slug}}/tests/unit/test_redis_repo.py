@@ -1,13 +1,13 @@
+import importlib
+import time
+
 import pytest
+from redis.exceptions import ResponseError
 
-from {{cookiecutter.python_package_name}}.utils.circuitbreaker import (
-    CircuitBreakerError,
-)
+from {{cookiecutter.python_package_name}}.utils.circuitbreaker import CircuitBreakerError
 
-from {{cookiecutter.python_package_name}}.repository.redis_repo import (
-    RedisRepository,
-)
-from {{cookiecutter.python_package_name}}.utils import tracer
+from {{cookiecutter.python_package_name}}.repository.redis_repo import RedisRepository
+from {{cookiecutter.python_package_name}}.utils import consumer_name, tracer
 from tests.conftest import FakeRedis
 
 
@@ -21,10 +21,258 @@ async def test_should_add_to_stream_and_ping() -> None:
     assert "mystream" in fake.streams
     assert fake.streams["mystream"][0]["foo"] == "bar"
     assert await repo.ping()
-    assert [s.name for s in tracer.spans] == [
-        "добавление_в_redis_стрим",
-        "пинг_redis",
+    assert [s.name for s in tracer.spans] == ["добавление_в_redis_стрим", "пинг_redis"]
+
+
+@pytest.mark.asyncio
+async def test_should_add_once_per_key() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+
+    first = await repo.add_to_stream_once(
+        "mystream", "k", {"task_id": "t-1", "foo": "bar"}, 60
+    )
+    second = await repo.add_to_stream_once("mystream", "k", {"task_id": "t-2"}, 60)
+
+    assert first == (True, "1")
+    assert second == (False, "t-1")
+    assert fake.streams["mystream"] == [{"foo": "bar", "task_id": "t-1"}]
+
+
+@pytest.mark.asyncio
+async def test_should_record_status_only_for_added_message() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+
+    await repo.add_to_stream_once(
+        "mystream", "k", {"task_id": "t-1"}, 60, status=("s:1", {"state": "queued"}, 60)
+    )
+    await repo.add_to_stream_once(
+        "mystream", "k", {"task_id": "t-2"}, 60, status=("s:2", {"state": "queued"}, 60)
+    )
+
+    assert fake.hashes["s:1"] == {"state": "queued"}
+    assert "s:2" not in fake.hashes
+
+
+@pytest.mark.asyncio
+async def test_should_add_many_in_one_pipeline() -> None:
+    class CountingRedis(FakeRedis):
+        def __init__(self) -> None:
+            super().__init__()
+            self.pipelines = 0
+
+        def pipeline(self, transaction: bool = True):
+            self.pipelines += 1
+            return super().pipeline(transaction)
+
+    fake = CountingRedis()
+    repo = RedisRepository(client=fake)
+
+    ids = await repo.add_many_to_stream("mystream", [{"n": "1"}, {"n": "2"}])
+
+    assert ids == ["1", "2"]
+    assert fake.pipelines == 1
+    assert [m["n"] for m in fake.streams["mystream"]] == ["1", "2"]
+    assert await repo.add_many_to_stream("mystream", []) == []
+
+
+@pytest.mark.asyncio
+async def test_should_write_status_with_stream_commands() -> None:
+    class CountingRedis(FakeRedis):
+        def __init__(self) -> None:
+            super().__init__()
+            self.pipelines = 0
+
+        def pipeline(self, transaction: bool = True):
+            self.pipelines += 1
+            return super().pipeline(transaction)
+
+    fake = CountingRedis()
+    repo = RedisRepository(client=fake)
+
+    stream_id = await repo.add_to_stream(
+        "mystream", {"n": "1"}, status=("s:1", {"state": "queued"}, 60)
+    )
+    ids = await repo.add_many_to_stream(
+        "mystream",
+        [{"n": "2"}, {"n": "3"}],
+        statuses=[("s:2", {"state": "queued"}, 60), ("s:3", {"state": "queued"}, 60)],
+    )
+    await repo.ack("mystream", stream_id, status=("s:1", {"state": "succeeded"}, 60))
+
+    assert stream_id == "1"
+    assert ids == ["2", "3"]
+    assert fake.pipelines == 3
+    assert await repo.get_statuses(["s:1", "s:3", "missing"]) == [
+        {"state": "succeeded"},
+        {"state": "queued"},
+        {},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_should_ack_many_in_one_pipeline() -> None:
+    class CountingRedis(FakeRedis):
+        def __init__(self) -> None:
+            super().__init__()
+            self.pipelines = 0
+
+        def pipeline(self, transaction: bool = True):
+            self.pipelines += 1
+            return super().pipeline(transaction)
+
+        async def xack(self, stream_name: str, group_name: str, message_id: str):
+            return int(message_id)
+
+    fake = CountingRedis()
+    repo = RedisRepository(client=fake)
+
+    results = await repo.ack_many(
+        [
+            ("mystream", "5", None, None),
+            ("mystream", "6", ("s:6", {"state": "succeeded"}, 60), None),
+            ("mystream", "7", ("s:7", {"state": "expired"}, 60), ("done", "7")),
+        ]
+    )
+
+    assert results == [5, 6, 7]
+    assert fake.pipelines == 1
+    assert await repo.get_statuses(["s:6", "s:7"]) == [
+        {"state": "succeeded"},
+        {"state": "expired"},
     ]
+    assert await repo.ack_many([]) == []
+
+
+def test_consumer_names_are_unique_per_process_and_reader(monkeypatch) -> None:
+    redis_stream = importlib.import_module("{{cookiecutter.python_package_name}}.utils.redis_stream")
+    first, second = consumer_name(0), consumer_name(1)
+
+    monkeypatch.setattr(redis_stream.os, "getpid", lambda: -1)
+    forked = consumer_name(0)
+
+    assert first != second
+    assert first.rsplit(":", 1)[0] == second.rsplit(":", 1)[0]
+    assert f":{redis_stream.socket.gethostname()}:" in first
+    assert ":-1:" in forked
+    assert forked.split(":")[-2] != first.split(":")[-2]
+
+
+@pytest.mark.asyncio
+async def test_should_delete_only_idle_consumers_without_pending() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    for consumer in ("busy", "dead", "alive"):
+        fake.streams["mystream"].append({"n": consumer})
+        await repo.fetch_lanes(["mystream"], consumer=consumer)
+    await repo.ack("mystream", "2")
+    await repo.ack("mystream", "3")
+    fake.consumers["mystream"]["busy"] -= 120
+    fake.consumers["mystream"]["dead"] -= 120
+
+    removed = await repo.delete_idle_consumers("mystream", idle_ms=60_000)
+
+    assert removed == ["dead"]
+    assert set(fake.consumers["mystream"]) == {"busy", "alive"}
+    assert await repo.delete_idle_consumers("mystream", 0, names=["other"]) == []
+    assert await repo.delete_idle_consumers("mystream", 0, names=["alive"]) == ["alive"]
+
+
+@pytest.mark.asyncio
+async def test_should_claim_stale_messages_and_drop_trimmed() -> None:
+    class TrimmingRedis(FakeRedis):
+        async def xautoclaim(self, *args, **kwargs):
+            # Redis 6.2 claims entries of trimmed messages without fields
+            cursor, claimed, deleted = await super().xautoclaim(*args, **kwargs)
+            self.pending["mystream"]["9"] = "alive"
+            return [cursor, [*claimed, ("9", None)], deleted]
+
+    fake = TrimmingRedis()
+    repo = RedisRepository(client=fake)
+    await repo.add_to_stream("mystream", {"n": "1"})
+    await repo.fetch_lanes(["mystream"], consumer="dead")
+
+    cursor, messages = await repo.claim_stale("mystream", "alive", 0, count=10)
+
+    assert cursor == "0-0"
+    assert messages == [("1", {"n": "1"}, 2)]
+    assert fake.pending["mystream"] == {"1": "alive"}
+    assert await repo.pending_count("mystream") == 1
+
+
+@pytest.mark.asyncio
+async def test_should_refresh_only_messages_still_owned() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    for n in range(2):
+        await repo.add_to_stream("mystream", {"n": str(n)})
+    await repo.fetch_lanes(["mystream"], count=2, consumer="reader")
+    fake.pending["mystream"]["2"] = "other"
+    fake.delivered["mystream"]["1"] -= 600
+
+    assert await repo.refresh_pending("mystream", "reader", ["1", "2"]) == ["1"]
+    assert time.time() - fake.delivered["mystream"]["1"] < 1
+    assert fake.deliveries["mystream"]["1"] == 1
+
+
+@pytest.mark.asyncio
+async def test_should_promote_due_scheduled_messages() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    now = time.time()
+
+    added = await repo.add_to_schedule(
+        "delayed",
+        [
+            ("mystream", {"n": "1"}, now - 1),
+            ("mystream", {"n": "2"}, now - 2),
+            ("mystream", {"n": "3"}, now + 60),
+        ],
+        statuses=[("s:1", {"state": "scheduled"}, 60)],
+    )
+    first = await repo.promote_due("delayed", 1, ["mystream"])
+    second = await repo.promote_due("delayed", 10, ["mystream"])
+    await repo.reschedule("mystream", "1", "delayed", {"n": "4"}, now - 1)
+    third = await repo.promote_due("delayed", 10, ["mystream"])
+
+    assert added == 3
+    assert first[0] == 1 and first[1] == 0
+    assert second[0] == 1 and 55 < second[1] <= 60
+    assert third[0] == 1
+    assert [m["n"] for m in fake.streams["mystream"]] == ["2", "1", "4"]
+    assert fake.hashes["s:1"] == {"state": "scheduled"}
+
+
+@pytest.mark.asyncio
+async def test_should_reschedule_in_one_transaction(monkeypatch) -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    modes: list[bool] = []
+    pipeline = fake.pipeline
+
+    def record(transaction: bool = True):
+        modes.append(transaction)
+        return pipeline(transaction)
+
+    monkeypatch.setattr(fake, "pipeline", record)
+    await repo.reschedule("mystream", "1", "delayed", {"n": "1"}, time.time())
+
+    assert modes == [True]
+    assert len(fake.zsets["delayed"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_should_refuse_to_promote_into_undeclared_streams() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await repo.add_to_schedule("delayed", [("other", {"n": "1"}, time.time() - 1)])
+
+    with pytest.raises(ResponseError):
+        await repo.promote_due("delayed", 10, ["mystream"])
+
+    assert len(fake.zsets["delayed"]) == 1
+    assert not fake.streams["other"]
 
 
 @pytest.mark.asyncio
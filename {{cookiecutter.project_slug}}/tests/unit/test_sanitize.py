@@ -0,0 +1,62 @@
+import pytest
+
+from {{cookiecutter.python_package_name}}.utils import tracer
+from {{cookiecutter.python_package_name}}.utils.sanitize import SanitizationError, sanitize
+
+
+def test_should_escape_nested_strings_and_keep_scalars() -> None:
+    payload = {
+        "a": "<script>",
+        "b": [1, 2.5, True, None, ("<i>", {"c": "&"})],
+        3: {"d": []},
+    }
+
+    assert sanitize(payload) == {
+        "a": "&lt;script&gt;",
+        "b": [1, 2.5, True, None, ["&lt;i&gt;", {"c": "&amp;"}]],
+        "3": {"d": []},
+    }
+
+
+def test_should_preserve_list_order() -> None:
+    assert sanitize([[1], "x", [2, [3]], 4]) == [[1], "x", [2, [3]], 4]
+
+
+def test_should_handle_top_level_scalars() -> None:
+    assert sanitize("<>") == "&lt;&gt;"
+    assert sanitize(5) == 5
+    assert sanitize(b"<raw>") == b"<raw>"
+
+
+def test_should_not_create_spans() -> None:
+    tracer.spans.clear()
+    sanitize({"items": [{"v": str(i)} for i in range(100)]})
+
+    assert tracer.spans == []
+
+
+def test_should_enforce_depth_limit() -> None:
+    data: list = []
+    for _ in range(10):
+        data = [data]
+
+    assert sanitize(data, max_depth=11) is not None
+    with pytest.raises(SanitizationError):
+        sanitize(data, max_depth=10)
+
+
+def test_should_enforce_node_limit() -> None:
+    with pytest.raises(SanitizationError):
+        sanitize(list(range(100)), max_nodes=50)
+    assert len(sanitize(list(range(49)), max_nodes=50)) == 49
+
+
+def test_should_handle_depth_beyond_recursion_limit() -> None:
+    data: dict = {}
+    for _ in range(5000):
+        data = {"k": data}
+
+    result = sanitize(data, max_depth=10_000)
+    for _ in range(5000):
+        result = result["k"]
+    assert result == {}
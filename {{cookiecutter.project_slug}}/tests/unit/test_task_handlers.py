@@ -0,0 +1,192 @@
+import asyncio
+import importlib
+import json
+from importlib.metadata import EntryPoint
+from typing import Any, Iterator
+
+import pytest
+from pydantic import ValidationError
+
+from {{cookiecutter.python_package_name}}.api.tasks import TaskPayload
+from {{cookiecutter.python_package_name}}.repository.redis_repo import RedisRepository
+from {{cookiecutter.python_package_name}}.services.concurrency_limiter import AdaptiveLimiter
+from {{cookiecutter.python_package_name}}.services.task_handlers import (
+    ENTRY_POINT_GROUP,
+    HandlerRegistry,
+    task_handlers,
+)
+from {{cookiecutter.python_package_name}}.services.task_processor import TaskProcessor
+from {{cookiecutter.python_package_name}}.services.task_types import task_types
+from {{cookiecutter.python_package_name}}.services.tasks_service import TasksService
+from {{cookiecutter.python_package_name}}.utils import (
+    DEAD_LETTER_STREAM_NAME,
+    SCHEDULED_SET_NAME,
+    TASKS_STREAM_NAME,
+    statsd_client,
+)
+from tests.conftest import FakeRedis
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def registered() -> Iterator[list[str]]:
+    names: list[str] = []
+    yield names
+    for name in names:
+        task_handlers.unregister(name)
+        task_types.unregister(name)
+
+
+def plugin(payload: dict) -> str:
+    return "plugin"
+
+
+async def run_until(processor: TaskProcessor, done: Any) -> None:
+    await processor.start()
+    for _ in range(200):
+        if done():
+            break
+        await asyncio.sleep(0.01)
+    await processor.stop()
+
+
+async def test_should_route_by_type_field(registered: list[str]) -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    service = TasksService(repo)
+    await service.enqueue_task({"data": 1, "metadata": {}, "type": "echo"})
+    await service.enqueue_task({"data": 2, "metadata": {}})
+    processor = TaskProcessor(repo)
+    seen: list[Any] = []
+    fallback: list[dict] = []
+
+    @task_handlers.register("echo")
+    async def echo(payload: dict) -> None:
+        seen.append(payload["data"])
+
+    registered.append("echo")
+
+    async def handle(fields: dict) -> None:
+        fallback.append(fields)
+
+    processor.handle = handle  # type: ignore[assignment]
+    statsd_client.reset()
+
+    await run_until(processor, lambda: seen and fallback)
+
+    assert fake.streams[TASKS_STREAM_NAME][0]["type"] == "echo"
+    assert seen == [1]
+    assert [fields.get("type") for fields in fallback] == [None]
+    assert task_handlers.stats["echo"].calls == 1
+    assert "handler.echo.duration_ms" in statsd_client.gauges
+
+
+async def test_should_apply_handler_concurrency_limit(registered: list[str]) -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    for index in range(4):
+        await repo.add_to_stream(
+            TASKS_STREAM_NAME, {"type": "slow", "payload": json.dumps({"data": index})}
+        )
+    processor = TaskProcessor(repo)
+    processor.retry_backoff = 0
+    running = peak = done = 0
+
+    @task_handlers.register("slow", concurrency=1)
+    async def slow(payload: dict) -> None:
+        nonlocal running, peak, done
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        done += 1
+
+    registered.append("slow")
+
+    await run_until(processor, lambda: done == 4)
+
+    assert done == 4
+    assert peak == 1
+
+
+async def test_should_not_starve_other_types_behind_a_saturated_handler(
+    registered: list[str],
+) -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    for index in range(4):
+        await repo.add_to_stream(
+            TASKS_STREAM_NAME, {"type": "slow", "payload": json.dumps({"data": index})}
+        )
+    await repo.add_to_stream(TASKS_STREAM_NAME, {"type": "fast", "payload": "{}"})
+    processor = TaskProcessor(repo)
+    processor.limiter = AdaptiveLimiter(max_limit=2, adaptive=False)
+    processor.reclaimer = None
+    release = asyncio.Event()
+    fast_done = asyncio.Event()
+
+    @task_handlers.register("slow", concurrency=1)
+    async def slow(payload: dict) -> None:
+        await release.wait()
+
+    @task_handlers.register("fast")
+    async def fast(payload: dict) -> None:
+        fast_done.set()
+
+    registered.extend(["slow", "fast"])
+    statsd_client.reset()
+
+    await processor.start()
+    try:
+        await asyncio.wait_for(fast_done.wait(), 2)
+        # one slow task runs, one waits without a slot, two are put back
+        assert len(fake.zsets[SCHEDULED_SET_NAME]) == 2
+        assert statsd_client.counters["handler.slow.deferred"] == 2
+    finally:
+        release.set()
+        await processor.stop()
+
+
+async def test_should_accept_handler_only_types_at_ingest(
+    registered: list[str],
+) -> None:
+    task_handlers.register("notify")(plugin)
+    registered.append("notify")
+
+    task = TaskPayload(type="notify", data={"to": "a@b.c"})
+
+    assert task.data == {"to": "a@b.c"}
+    with pytest.raises(ValidationError, match="Unknown task type"):
+        TaskPayload(type="nobody", data={})
+    assert TaskProcessor.load_types({"type": "notify", "data": 1})["data"] == 1
+
+
+async def test_should_apply_handler_retry_policy(registered: list[str]) -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await repo.add_to_stream(TASKS_STREAM_NAME, {"type": "once", "payload": "{}"})
+    processor = TaskProcessor(repo)
+
+    @task_handlers.register("once", max_attempts=1)
+    def once(payload: dict) -> None:
+        raise RuntimeError("boom")
+
+    registered.append("once")
+
+    await run_until(processor, lambda: fake.streams[DEAD_LETTER_STREAM_NAME])
+
+    assert fake.streams[DEAD_LETTER_STREAM_NAME][0]["type"] == "once"
+    assert task_handlers.stats["once"].failures == 1
+
+
+async def test_should_discover_entry_point_handlers(monkeypatch) -> None:
+    module = importlib.import_module("{{cookiecutter.python_package_name}}.services.task_handlers")
+    found = [EntryPoint("plugged", f"{__name__}:plugin", ENTRY_POINT_GROUP)]
+    monkeypatch.setattr(module, "entry_points", lambda group: found)
+    registry = HandlerRegistry()
+
+    assert registry.discover() == 1
+    assert registry.discover() == 0
+    handler = registry.get("plugged")
+    assert handler is not None and handler.func is plugin
@@ -1,15 +1,28 @@
 import asyncio
 import json
+import os
+import time
 
 import pytest
+from pydantic import BaseModel
 
+from {{cookiecutter.python_package_name}}.core.compression import PayloadCodec
+from {{cookiecutter.python_package_name}}.repository.blob_store import FileBlobStore
 from {{cookiecutter.python_package_name}}.repository.redis_repo import RedisRepository
+from {{cookiecutter.python_package_name}}.services import task_processor
+from {{cookiecutter.python_package_name}}.services.concurrency_limiter import AdaptiveLimiter
 from {{cookiecutter.python_package_name}}.services.task_processor import TaskProcessor
+from {{cookiecutter.python_package_name}}.services.task_types import task_types
+from {{cookiecutter.python_package_name}}.services.tasks_service import TasksService
 from {{cookiecutter.python_package_name}}.utils import (
+    PRIORITY_STREAMS,
     TASKS_STREAM_NAME,
     DEAD_LETTER_STREAM_NAME,
+    SCHEDULED_SET_NAME,
+    statsd_client,
     tracer,
 )
+from {{cookiecutter.python_package_name}}.core.config import settings
 from tests.conftest import FakeRedis
 
 
@@ -38,12 +51,14 @@ async def test_task_processor_handles_message() -> None:
 
 
 @pytest.mark.asyncio
-async def test_task_processor_retries_and_dead_letter(monkeypatch) -> None:
+async def test_task_processor_retries_and_dead_letter() -> None:
     fake = FakeRedis()
     repo = RedisRepository(client=fake)
     await repo.add_to_stream(TASKS_STREAM_NAME, {"payload": json.dumps({"v": 2})})
 
     processor = TaskProcessor(repo)
+    processor.retry_backoff = 0
+    processor.delayed.poll_interval = 0
 
     attempts: int = 0
 
@@ -52,22 +67,511 @@ async def test_task_processor_retries_and_dead_letter(monkeypatch) -> None:
         attempts += 1
         raise RuntimeError("boom")
 
-    original_sleep = asyncio.sleep
+    processor.handle = failing_handle  # type: ignore[assignment]
 
-    async def fast_sleep(_: float) -> None:
-        """Async sleep stub used to yield without delay."""
-        await original_sleep(0)
+    await processor.start()
+    for _ in range(100):
+        if fake.streams[DEAD_LETTER_STREAM_NAME]:
+            break
+        await asyncio.sleep(0.01)
+    await processor.stop()
 
-    monkeypatch.setattr(
-        "{{cookiecutter.python_package_name}}.services.task_processor._yield_sleep",
-        fast_sleep,
-    )
+    assert attempts == 3
+    assert fake.streams[DEAD_LETTER_STREAM_NAME][0]["attempts"] == "2"
+    assert not fake.zsets[SCHEDULED_SET_NAME]
+
+
+@pytest.mark.asyncio
+async def test_retry_waits_in_schedule_without_holding_a_slot() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await repo.add_to_stream(TASKS_STREAM_NAME, {"payload": json.dumps({"v": 3})})
+    processor = TaskProcessor(repo)
+
+    async def failing_handle(_: dict) -> None:
+        raise RuntimeError("boom")
 
     processor.handle = failing_handle  # type: ignore[assignment]
 
     await processor.start()
-    await asyncio.sleep(0)  # allow processing
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
     await processor.stop()
 
-    assert attempts == 3
-    assert fake.streams[DEAD_LETTER_STREAM_NAME]
+    ((member, due_ms),) = fake.zsets[SCHEDULED_SET_NAME].items()
+    stream, fields = json.loads(member)
+    assert stream == TASKS_STREAM_NAME
+    assert dict(zip(fields[::2], fields[1::2], strict=True))["attempts"] == "1"
+    assert due_ms > time.time() * 1000
+    assert processor.limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_tasks_are_fetched_and_acked_in_batches(monkeypatch) -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    for i in range(20):
+        await repo.add_to_stream(TASKS_STREAM_NAME, {"payload": json.dumps({"v": i})})
+    processor = TaskProcessor(repo)
+    processor.fetch_batch_max = 16
+    monkeypatch.setattr(processor, "_report_lag", _noop_lag)
+    reads: list[int] = []
+    ack_batches: list[int] = []
+    fetch_lanes, ack_many = repo.fetch_lanes, repo.ack_many
+
+    async def counting_fetch(streams, **kwargs):
+        messages = await fetch_lanes(streams, **kwargs)
+        if messages:
+            reads.append(len(messages))
+        return messages
+
+    async def counting_ack(acks):
+        ack_batches.append(len(acks))
+        return await ack_many(acks)
+
+    async def handle(_: dict) -> None:
+        return None
+
+    processor.handle = handle  # type: ignore[assignment]
+    monkeypatch.setattr(repo, "fetch_lanes", counting_fetch)
+    monkeypatch.setattr(repo, "ack_many", counting_ack)
+
+    await processor.start()
+    for _ in range(100):
+        if sum(ack_batches) == 20:
+            break
+        await asyncio.sleep(0)
+    await processor.stop()
+
+    assert reads == [16, 4]
+    assert sum(ack_batches) == 20
+    assert len(ack_batches) < 20
+
+
+@pytest.mark.asyncio
+async def test_readers_consume_under_their_own_consumer_names(monkeypatch) -> None:
+    monkeypatch.setattr(settings.performance, "stream_readers", 2)
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    processor = TaskProcessor(repo)
+    processor.fetch_batch_max = processor.prefetch_count = 1
+    release = asyncio.Event()
+    owners: list[str] = []
+
+    async def handle(fields: dict) -> None:
+        owners.append(fake.pending[TASKS_STREAM_NAME][fields["n"]])
+        await release.wait()
+
+    processor.handle = handle  # type: ignore[assignment]
+    fake.consumers[TASKS_STREAM_NAME]["stale"] = time.time() - 7200
+    readers: set[str] = set()
+    fetch_lanes = repo.fetch_lanes
+
+    async def recording_fetch(streams, **kwargs):
+        readers.add(kwargs["consumer"])
+        return await fetch_lanes(streams, **kwargs)
+
+    monkeypatch.setattr(repo, "fetch_lanes", recording_fetch)
+
+    await processor.start()
+    for i in range(2):
+        await repo.add_to_stream(TASKS_STREAM_NAME, {"n": str(i + 1)})
+    for _ in range(100):
+        if len(owners) == 2:
+            break
+        await asyncio.sleep(0)
+    release.set()
+    await processor.stop()
+
+    names = {reader.consumer for reader in processor.readers}
+    assert len(names) == 2
+    assert readers == names
+    assert len(owners) == 2 and set(owners) <= names
+    assert not fake.consumers[TASKS_STREAM_NAME]
+
+
+@pytest.mark.asyncio
+async def test_messages_of_dead_consumer_are_reclaimed_and_handled() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await repo.add_to_stream(TASKS_STREAM_NAME, {"payload": json.dumps({"v": 1})})
+    await repo.fetch_lanes([TASKS_STREAM_NAME], consumer="dead")
+    fake.delivered[TASKS_STREAM_NAME]["1"] -= 3600
+    processor = TaskProcessor(repo)
+    assert processor.reclaimer is not None
+    handled: list[dict] = []
+
+    async def handle(fields: dict) -> None:
+        handled.append(json.loads(fields["payload"]))
+
+    processor.handle = handle  # type: ignore[assignment]
+
+    await processor.start()
+    for _ in range(100):
+        if handled and not fake.pending[TASKS_STREAM_NAME]:
+            break
+        await asyncio.sleep(0.01)
+    await processor.stop()
+
+    assert handled == [{"v": 1}]
+    assert not fake.pending[TASKS_STREAM_NAME]
+
+
+@pytest.mark.asyncio
+async def test_task_delivered_too_often_is_dead_lettered_when_reclaimed() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await repo.add_to_stream(TASKS_STREAM_NAME, {"payload": json.dumps({"v": 1})})
+    await repo.fetch_lanes([TASKS_STREAM_NAME], consumer="dead")
+    fake.delivered[TASKS_STREAM_NAME]["1"] -= 3600
+    fake.deliveries[TASKS_STREAM_NAME]["1"] = settings.reclaim.max_deliveries
+    processor = TaskProcessor(repo)
+    handled: list[dict] = []
+
+    async def handle(fields: dict) -> None:
+        handled.append(fields)
+
+    processor.handle = handle  # type: ignore[assignment]
+
+    await processor.start()
+    for _ in range(100):
+        if not fake.pending[TASKS_STREAM_NAME]:
+            break
+        await asyncio.sleep(0.01)
+    await processor.stop()
+
+    assert not handled
+    assert len(fake.streams[DEAD_LETTER_STREAM_NAME]) == 1
+    assert not fake.pending[TASKS_STREAM_NAME]
+
+
+@pytest.mark.asyncio
+async def test_buffered_tasks_are_refreshed_until_they_start() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    for v in range(2):
+        await repo.add_to_stream(TASKS_STREAM_NAME, {"payload": json.dumps({"v": v})})
+    processor = TaskProcessor(repo)
+    processor.refresh_after = 60
+    reader = processor.readers[0]
+    await processor._fill(reader)
+    buffer = reader.buffers["normal"]
+    assert len(buffer) == 2
+
+    await processor._refresh(reader)
+    delivered = dict(fake.delivered[TASKS_STREAM_NAME])
+    reader.fetched["normal"] -= 120
+    # taken over by another worker while it waited here
+    fake.pending[TASKS_STREAM_NAME]["2"] = "other"
+    await processor._refresh(reader)
+
+    assert [msg_id for msg_id, _ in buffer] == ["1"]
+    assert fake.delivered[TASKS_STREAM_NAME]["1"] > delivered["1"]
+
+
+@pytest.mark.asyncio
+async def test_task_processor_refuses_reclaim_idle_below_task_timeout() -> None:
+    processor = TaskProcessor(RedisRepository(client=FakeRedis()))
+    assert processor.reclaimer is not None
+    processor.task_timeout = settings.reclaim.min_idle
+
+    with pytest.raises(ValueError, match="RECLAIM_MIN_IDLE"):
+        await processor.start()
+
+    assert not processor._tasks
+
+
+@pytest.mark.asyncio
+async def test_expired_task_is_dropped_before_handling() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await repo.add_to_stream(
+        TASKS_STREAM_NAME,
+        {
+            "task_id": "t-old",
+            "payload": json.dumps({"v": 1}),
+            "deadline": repr(time.time() - 1),
+        },
+    )
+    await repo.add_to_stream(TASKS_STREAM_NAME, {"payload": json.dumps({"v": 2})})
+    processor = TaskProcessor(repo)
+    processor.statuses.enabled = True
+    handled: list[dict] = []
+
+    async def handle(fields: dict) -> None:
+        handled.append(json.loads(fields["payload"]))
+
+    processor.handle = handle  # type: ignore[assignment]
+
+    statsd_client.reset()
+    await processor.start()
+    for _ in range(3):
+        await asyncio.sleep(0)
+    await processor.stop()
+
+    (status,) = await repo.get_statuses([processor.statuses.key("t-old")])
+    assert handled == [{"v": 2}]
+    assert status["state"] == "expired"
+    assert statsd_client.counters["tasks.expired"] == 1
+
+
+@pytest.mark.asyncio
+async def test_handler_timeout_fails_the_attempt() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await repo.add_to_stream(TASKS_STREAM_NAME, {"payload": json.dumps({"v": 1})})
+    processor = TaskProcessor(repo)
+    processor.task_timeout = 0.01
+
+    async def slow_handle(_: dict) -> None:
+        await asyncio.Event().wait()
+
+    processor.handle = slow_handle  # type: ignore[assignment]
+
+    statsd_client.reset()
+    await processor.start()
+    for _ in range(100):
+        if fake.zsets[SCHEDULED_SET_NAME]:
+            break
+        await asyncio.sleep(0.01)
+    await processor.stop()
+
+    assert statsd_client.counters["tasks.timed_out"] == 1
+    assert "tasks.expired" not in statsd_client.counters
+    assert len(fake.zsets[SCHEDULED_SET_NAME]) == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_reached_while_handling_expires_the_task() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await repo.add_to_stream(
+        TASKS_STREAM_NAME,
+        {
+            "task_id": "t-1",
+            "payload": json.dumps({"v": 1}),
+            "deadline": repr(time.time() + 0.05),
+        },
+    )
+    processor = TaskProcessor(repo)
+    processor.statuses.enabled = True
+
+    async def slow_handle(_: dict) -> None:
+        await asyncio.Event().wait()
+
+    processor.handle = slow_handle  # type: ignore[assignment]
+
+    statsd_client.reset()
+    await processor.start()
+    for _ in range(100):
+        if "tasks.expired" in statsd_client.counters:
+            break
+        await asyncio.sleep(0.01)
+    await processor.stop()
+
+    (status,) = await repo.get_statuses([processor.statuses.key("t-1")])
+    assert status["state"] == "expired"
+    assert "tasks.timed_out" not in statsd_client.counters
+    assert not fake.zsets[SCHEDULED_SET_NAME]
+
+
+def test_decode_payload_sanitizes_in_lazy_mode(monkeypatch) -> None:
+    fields = {"payload": json.dumps({"data": "<b>"})}
+
+    monkeypatch.setattr(settings.performance, "sanitize_mode", "ingest")
+    assert TaskProcessor.decode_payload(fields) == {"data": "<b>"}
+
+    monkeypatch.setattr(settings.performance, "sanitize_mode", "lazy")
+    assert TaskProcessor.decode_payload(fields) == {"data": "&lt;b&gt;"}
+
+
+def test_decode_payload_inflates_compressed_payload(monkeypatch) -> None:
+    payload = {"data": "x" * 2000, "metadata": {}}
+    codec = PayloadCodec("zlib", min_size=10)
+    monkeypatch.setattr(task_processor, "payload_codec", codec)
+    stored, encoding = codec.encode(json.dumps(payload))
+
+    decoded = TaskProcessor.decode_payload(
+        {"payload": stored, "payload_encoding": encoding}
+    )
+
+    assert decoded == payload
+
+
+@pytest.mark.asyncio
+async def test_offloaded_payload_round_trip() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    service = TasksService(repo)
+    service.claim_check_threshold = 100
+    payload = {"data": "x" * 500, "metadata": {}}
+
+    await service.enqueue_task(payload)
+    fields = fake.streams[TASKS_STREAM_NAME][0]
+    processor = TaskProcessor(repo)
+
+    assert "payload" not in fields and fields["payload_ref"]
+    assert await processor.load_payload(fields) == payload
+    with pytest.raises(ValueError):
+        await processor.load_payload({**fields, "payload_sha256": "0" * 64})
+
+
+@pytest.mark.asyncio
+async def test_offloaded_payload_outlives_schedule_and_retry_delays() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    service = TasksService(repo)
+    service.claim_check_threshold = 100
+    payload = {"data": "x" * 500, "metadata": {}}
+    week = settings.scheduler.max_delay
+    ttl = settings.claim_check.ttl
+
+    await service.schedule_tasks([payload], [time.time() + week])
+    await service.enqueue_task(payload)
+    (member,) = fake.zsets[SCHEDULED_SET_NAME]
+    _, flat = json.loads(member)
+    fields = dict(zip(flat[::2], flat[1::2], strict=True))
+    ref = fields["payload_ref"]
+    scheduled = fake.ttls[ref]
+
+    processor = TaskProcessor(repo)
+    await processor._retry_later(
+        TASKS_STREAM_NAME, "1", fields, 1, RuntimeError("boom"), backoff=2 * week
+    )
+
+    assert week + ttl - 1 <= scheduled <= week + ttl + 1
+    assert fake.ttls[ref] == 2 * week + ttl
+
+
+async def _noop_lag(lane: str, msg_id: str) -> None:
+    return None
+
+
+@pytest.mark.asyncio
+async def test_task_processor_prefers_high_priority_lane(monkeypatch) -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    for i in range(3):
+        await repo.add_to_stream(
+            PRIORITY_STREAMS["low"], {"payload": json.dumps({"lane": "low", "i": i})}
+        )
+    await repo.add_to_stream(
+        PRIORITY_STREAMS["high"], {"payload": json.dumps({"lane": "high", "i": 0})}
+    )
+    processor = TaskProcessor(repo)
+    processor.limiter = AdaptiveLimiter(max_limit=1, adaptive=False)
+    # one slot would let buffered tasks wait longer than RECLAIM_MIN_IDLE
+    processor.reclaimer = None
+    monkeypatch.setattr(processor, "_report_lag", _noop_lag)
+
+    handled: list[str] = []
+    acked: list[str] = []
+
+    async def handle(fields: dict) -> None:
+        handled.append(json.loads(fields["payload"])["lane"])
+
+    async def ack_many(acks: list[tuple]) -> list[int]:
+        acked.extend(stream for stream, *_ in acks)
+        return [1] * len(acks)
+
+    processor.handle = handle  # type: ignore[assignment]
+    monkeypatch.setattr(repo, "ack_many", ack_many)
+
+    await processor.start()
+    for _ in range(100):
+        if len(handled) == 4:
+            break
+        await asyncio.sleep(0)
+    await processor.stop()
+
+    assert handled == ["high", "low", "low", "low"]
+    assert acked[0] == PRIORITY_STREAMS["high"]
+
+
+@pytest.mark.asyncio
+async def test_task_processor_reports_lane_lag(monkeypatch) -> None:
+    processor = TaskProcessor(RedisRepository(client=FakeRedis()))
+    gauges: list[tuple[str, float]] = []
+
+    async def gauge(metric: str, value: float) -> None:
+        gauges.append((metric, value))
+
+    monkeypatch.setattr(statsd_client, "gauge", gauge)
+
+    await processor._report_lag("high", "1700000000000-0")
+    await processor._report_lag("high", "1700000000001-0")
+    await processor._report_lag("low", "1700000000000-0")
+
+    # the second "high" report falls inside the reporting interval
+    assert [metric for metric, _ in gauges] == ["lane.high.lag_ms", "lane.low.lag_ms"]
+    assert all(value > 0 for _, value in gauges)
+
+
+@pytest.mark.asyncio
+async def test_task_processor_records_status_transitions(monkeypatch) -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await repo.add_to_stream(
+        TASKS_STREAM_NAME, {"task_id": "t-1", "payload": json.dumps({"v": 1})}
+    )
+    processor = TaskProcessor(repo)
+    processor.statuses.enabled = True
+    states: list[str] = []
+
+    async def handle(fields: dict) -> dict:
+        status_key = processor.statuses.key("t-1")
+        states.append(fake.hashes[status_key]["state"])
+        return {"ok": True}
+
+    processor.handle = handle  # type: ignore[assignment]
+
+    await processor.start()
+    await asyncio.sleep(0)
+    await processor.stop()
+
+    (status,) = await repo.get_statuses([processor.statuses.key("t-1")])
+    assert states == ["running"]
+    assert status["state"] == "succeeded"
+    assert json.loads(status["result"]) == {"ok": True}
+
+
+@pytest.mark.asyncio
+async def test_load_payload_returns_typed_data() -> None:
+    @task_types.register("resize")
+    class Resize(BaseModel):
+        url: str
+        width: int
+
+    processor = TaskProcessor(RedisRepository(client=FakeRedis()))
+    fields = {
+        "payload": json.dumps(
+            {"type": "resize", "data": {"url": "a.png", "width": 10}, "metadata": {}}
+        )
+    }
+    try:
+        payload = await processor.load_payload(fields)
+    finally:
+        task_types.unregister("resize")
+
+    assert payload["data"] == Resize(url="a.png", width=10)
+
+
+@pytest.mark.asyncio
+async def test_task_processor_prunes_file_blobs_periodically(tmp_path) -> None:
+    processor = TaskProcessor(RedisRepository(client=FakeRedis()))
+    store = FileBlobStore(tmp_path, ttl=60)
+    processor.blob_store = store
+    processor.prune_interval = 0.01
+    stale = tmp_path / "ab" / ("ab" + "0" * 62)
+
+    await processor.start()
+    stale.parent.mkdir()
+    stale.write_text("old")
+    os.utime(stale, (0, 0))
+    for _ in range(100):
+        if not stale.exists():
+            break
+        await asyncio.sleep(0.01)
+    await processor.stop()
+
+    assert not stale.exists()
@@ -0,0 +1,33 @@
+from {{cookiecutter.python_package_name}}.services.task_status import STATUS_KEY_PREFIX, TaskStatusCodec
+
+
+def test_entry_is_skipped_when_disabled() -> None:
+    statuses = TaskStatusCodec(enabled=False)
+
+    assert statuses.entry("t-1", "queued") is None
+
+
+def test_entry_and_decode_round_trip() -> None:
+    statuses = TaskStatusCodec(enabled=True, ttl=60)
+
+    status = statuses.entry("t-1", "succeeded", result={"n": 1}, attempts=1)
+
+    assert status is not None
+    key, fields, ttl = status
+    assert key == f"{STATUS_KEY_PREFIX}t-1"
+    assert ttl == 60
+    assert fields["state"] == "succeeded"
+    decoded = statuses.decode("t-1", dict(fields))
+    assert decoded is not None
+    assert decoded["result"] == {"n": 1}
+    assert decoded["attempts"] == 1
+    assert statuses.decode("t-2", {}) is None
+
+
+def test_large_results_are_not_stored() -> None:
+    statuses = TaskStatusCodec(enabled=True, max_result_size=8)
+
+    status = statuses.entry("t-1", "succeeded", result="x" * 100)
+
+    assert status is not None
+    assert "result" not in status[1]
@@ -0,0 +1,73 @@
+import pytest
+from pydantic import BaseModel, ValidationError
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+from {{cookiecutter.python_package_name}}.services.task_types import (
+    TaskTypeRegistry,
+    UnknownTaskTypeError,
+)
+
+needs_msgspec = pytest.mark.skipif(msgspec is None, reason="msgspec not installed")
+
+
+class Resize(BaseModel):
+    url: str
+    width: int
+
+
+def make_registry() -> TaskTypeRegistry:
+    registry = TaskTypeRegistry()
+    registry.register("resize")(Resize)
+    return registry
+
+
+def test_should_normalize_and_load_pydantic_model() -> None:
+    registry = make_registry()
+
+    stored = registry.normalize("resize", {"url": "a.png", "width": "10"})
+
+    assert stored == {"url": "a.png", "width": 10}
+    assert registry.load("resize", stored) == Resize(url="a.png", width=10)
+
+
+def test_should_report_errors_under_data() -> None:
+    registry = make_registry()
+
+    with pytest.raises(ValidationError) as exc_info:
+        registry.normalize("resize", {"url": "a.png", "width": "wide"})
+
+    assert exc_info.value.errors()[0]["loc"] == ("data", "width")
+
+
+@needs_msgspec
+def test_should_validate_msgspec_struct() -> None:
+    class Ping(msgspec.Struct):
+        host: str
+        count: int = 1
+
+    registry = TaskTypeRegistry()
+    registry.register("ping")(Ping)
+
+    stored = registry.normalize("ping", {"host": "h"})
+    with pytest.raises(ValidationError) as exc_info:
+        registry.normalize("ping", {"count": 2})
+
+    assert stored == {"host": "h", "count": 1}
+    assert registry.load("ping", stored) == Ping(host="h")
+    assert exc_info.value.errors()[0]["loc"] == ("data",)
+    assert "host" in exc_info.value.errors()[0]["msg"]
+
+
+def test_should_reject_unknown_and_duplicate_types() -> None:
+    registry = make_registry()
+
+    with pytest.raises(UnknownTaskTypeError):
+        registry.normalize("missing", {})
+    with pytest.raises(ValueError):
+        registry.register("resize")(Resize)
+    registry.unregister("resize")
+    assert "resize" not in registry
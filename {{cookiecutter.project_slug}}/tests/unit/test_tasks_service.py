@@ -3,9 +3,12 @@ from collections import defaultdict
 
 import pytest
 
+from {{cookiecutter.python_package_name}}.core.compression import PayloadCodec
 from {{cookiecutter.python_package_name}}.repository.redis_repo import RedisRepository
+from {{cookiecutter.python_package_name}}.services import tasks_service
 from {{cookiecutter.python_package_name}}.services.tasks_service import TasksService
 from {{cookiecutter.python_package_name}}.utils import (
+    PRIORITY_STREAMS,
     TASKS_STREAM_NAME,
     DEAD_LETTER_STREAM_NAME,
     tracer,
@@ -31,6 +34,37 @@ async def test_enqueue_task_formats_and_stores_message() -> None:
     assert tracer.spans and tracer.spans[0].name == "постановка_задачи"
 
 
+@pytest.mark.asyncio
+async def test_enqueue_task_once_returns_original_task_id() -> None:
+    fake = FakeRedis()
+    service = TasksService(RedisRepository(client=fake))
+
+    task_id, stream_id, created = await service.enqueue_task_once({"data": 1}, "k")
+    again = await service.enqueue_task_once({"data": 1}, "k")
+    other = TasksService(RedisRepository(client=fake))
+    from_redis = await other.enqueue_task_once({"data": 1}, "k")
+
+    assert created and stream_id
+    assert again == (task_id, "", False)
+    assert from_redis == (task_id, "", False)
+    assert len(fake.streams[TASKS_STREAM_NAME]) == 1
+
+
+@pytest.mark.asyncio
+async def test_enqueue_task_compresses_large_payloads(monkeypatch) -> None:
+    monkeypatch.setattr(
+        tasks_service, "payload_codec", PayloadCodec("zlib", min_size=10)
+    )
+    fake = FakeRedis()
+    payload = {"data": "x" * 2000, "metadata": {}}
+
+    await TasksService(RedisRepository(client=fake)).enqueue_task(payload)
+
+    stored = fake.streams[TASKS_STREAM_NAME][0]
+    assert stored["payload_encoding"] == "zlib+b64"
+    assert len(stored["payload"]) < 200
+
+
 def test_calculate_metrics() -> None:
     tracer.spans.clear()
     avg, mn, mx = TasksService._calculate_metrics([1.0, 2.0, 3.0])
@@ -58,7 +92,6 @@ async def test_should_report_average_min_max_metrics(monkeypatch) -> None:
         def __init__(self, percent: float) -> None:
             self.percent = percent
 
-
     monkeypatch.setattr(
         "{{cookiecutter.python_package_name}}.services.tasks_service.psutil.cpu_percent",
         lambda: next(cpu_values),
@@ -68,8 +101,7 @@ async def test_should_report_average_min_max_metrics(monkeypatch) -> None:
         lambda: Mem(next(mem_values)),
     )
     monkeypatch.setattr(
-        "{{cookiecutter.python_package_name}}.services.tasks_service.GPU_AVAILABLE",
-        False,
+        "{{cookiecutter.python_package_name}}.services.tasks_service.GPU_AVAILABLE", False
     )
 
     gauges: dict[str, float] = {}
@@ -78,8 +110,7 @@ async def test_should_report_average_min_max_metrics(monkeypatch) -> None:
         gauges[metric] = value
 
     monkeypatch.setattr(
-        "{{cookiecutter.python_package_name}}.services.tasks_service.statsd_client.gauge",
-        fake_gauge,
+        "{{cookiecutter.python_package_name}}.services.tasks_service.statsd_client.gauge", fake_gauge
     )
 
     fake = FakeRedis()
@@ -105,7 +136,9 @@ class FailingRepo:
         self.calls = 0
         self.streams: dict[str, list[dict]] = defaultdict(list)
 
-    async def add_to_stream(self, stream_name: str, message: dict) -> str:
+    async def add_to_stream(
+        self, stream_name: str, message: dict, status: tuple | None = None
+    ) -> str:
         self.calls += 1
         if self.calls <= self.fail_times:
             raise ConnectionError("down")
@@ -124,8 +157,7 @@ async def test_should_retry_before_success(monkeypatch) -> None:
         sleeps.append(delay)
 
     monkeypatch.setattr(
-        "{{cookiecutter.python_package_name}}.services.tasks_service.asyncio.sleep",
-        fake_sleep,
+        "{{cookiecutter.python_package_name}}.services.tasks_service.asyncio.sleep", fake_sleep
     )
 
     await service.enqueue_task({"data": 1})
@@ -145,8 +177,7 @@ async def test_should_send_to_dead_letter_after_retries(monkeypatch) -> None:
         return None
 
     monkeypatch.setattr(
-        "{{cookiecutter.python_package_name}}.services.tasks_service.asyncio.sleep",
-        fast_sleep,
+        "{{cookiecutter.python_package_name}}.services.tasks_service.asyncio.sleep", fast_sleep
     )
 
     await service.enqueue_task({"data": 2})
@@ -154,3 +185,72 @@ async def test_should_send_to_dead_letter_after_retries(monkeypatch) -> None:
     assert repo.calls == 4
     assert not repo.streams.get(TASKS_STREAM_NAME)
     assert repo.streams[DEAD_LETTER_STREAM_NAME]
+
+
+class FlakyBatchRepo(FailingRepo):
+    async def add_many_to_stream(
+        self, stream_name: str, messages: list[dict], statuses: list | None = None
+    ) -> list:
+        results: list = []
+        for message in messages:
+            try:
+                results.append(await self.add_to_stream(stream_name, message))
+            except ConnectionError as exc:
+                results.append(exc)
+        return results
+
+
+@pytest.mark.asyncio
+async def test_enqueue_tasks_retries_only_failed_items(monkeypatch) -> None:
+    repo = FlakyBatchRepo(fail_times=1)
+    service = TasksService(repo)  # type: ignore[arg-type]
+
+    async def fast_sleep(*_: float) -> None:
+        return None
+
+    monkeypatch.setattr(
+        "{{cookiecutter.python_package_name}}.services.tasks_service.asyncio.sleep", fast_sleep
+    )
+
+    results = await service.enqueue_tasks([{"data": 1}, {"data": 2}])
+
+    assert repo.calls == 3
+    assert all(stream_id for _, stream_id in results)
+    stored = repo.streams[TASKS_STREAM_NAME]
+    assert [json.loads(m["payload"])["data"] for m in stored] == [2, 1]
+    assert [m["task_id"] for m in stored] == [results[1][0], results[0][0]]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_tasks_dead_letters_after_retries(monkeypatch) -> None:
+    repo = FlakyBatchRepo(fail_times=3)
+    service = TasksService(repo)  # type: ignore[arg-type]
+
+    async def fast_sleep(*_: float) -> None:
+        return None
+
+    monkeypatch.setattr(
+        "{{cookiecutter.python_package_name}}.services.tasks_service.asyncio.sleep", fast_sleep
+    )
+
+    results = await service.enqueue_tasks([{"data": 1}])
+
+    assert results[0][1] == ""
+    assert not repo.streams.get(TASKS_STREAM_NAME)
+    assert repo.streams[DEAD_LETTER_STREAM_NAME]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_routes_tasks_to_priority_lanes() -> None:
+    fake = FakeRedis()
+    service = TasksService(RedisRepository(client=fake))
+
+    await service.enqueue_task({"data": "urgent"}, priority="high")
+    results = await service.enqueue_tasks(
+        [{"data": 1}, {"data": 2}, {"data": 3}], ["low", "normal", "low"]
+    )
+
+    assert all(stream_id for _, stream_id in results)
+    assert len(fake.streams[PRIORITY_STREAMS["high"]]) == 1
+    assert len(fake.streams[PRIORITY_STREAMS["low"]]) == 2
+    assert len(fake.streams[TASKS_STREAM_NAME]) == 1
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from {{cookiecutter.python_package_name}}.repository.redis_repo import RedisRepository
+from {{cookiecutter.python_package_name}}.services.task_processor import TaskProcessor
+from {{cookiecutter.python_package_name}}.services.thread_pool import (
+    TaskThreadPool,
+    blocking,
+    default_workers,
+    is_blocking,
+)
+from {{cookiecutter.python_package_name}}.utils import TASKS_STREAM_NAME, statsd_client
+from tests.conftest import FakeRedis
+
+pytestmark = pytest.mark.asyncio
+
+
+@blocking
+def lookup(payload: dict) -> dict:
+    time.sleep(0.01)
+    return {"thread": threading.current_thread().name, "v": payload["data"] + 1}
+
+
+async def test_should_size_pool_by_gil() -> None:
+    assert is_blocking(lookup)
+    with patch("os.cpu_count", return_value=64):
+        with patch("sys._is_gil_enabled", return_value=True, create=True):
+            assert default_workers() == 32
+        with patch("sys._is_gil_enabled", return_value=False, create=True):
+            assert default_workers() == 68
+
+
+async def test_should_bound_pending_calls_and_report_depth() -> None:
+    pool = TaskThreadPool(workers=1, max_pending=1)
+    with pytest.raises(RuntimeError):
+        await pool.run(time.sleep, 0)
+    statsd_client.reset()
+    pool.start()
+    release = threading.Event()
+    first = asyncio.create_task(pool.run(release.wait))
+    second = asyncio.create_task(pool.run(release.wait))
+    for _ in range(100):
+        if pool.active:
+            break
+        await asyncio.sleep(0.01)
+
+    assert pool.active == 1
+    assert pool.queue_depth == 1
+    assert statsd_client.gauges["thread_pool.active"] == 1
+
+    release.set()
+    assert await asyncio.gather(first, second) == [True, True]
+    await pool.stop()
+    assert (pool.queue_depth, pool.active) == (0, 0)
+    assert statsd_client.gauges["thread_pool.queue_depth"] == 0
+
+
+async def test_blocking_handler_runs_in_thread() -> None:
+    fake = FakeRedis()
+    repo = RedisRepository(client=fake)
+    await repo.add_to_stream(
+        TASKS_STREAM_NAME,
+        {"task_id": "t-1", "payload": json.dumps({"data": 41, "metadata": {}})},
+    )
+    processor = TaskProcessor(repo)
+    processor.statuses.enabled = True
+    processor.handle = lookup  # type: ignore[assignment]
+
+    status_key = processor.statuses.key("t-1")
+    await processor.start()
+    assert processor.threads.running
+    for _ in range(200):
+        if fake.hashes[status_key].get("state") == "succeeded":
+            break
+        await asyncio.sleep(0.01)
+    await processor.stop()
+
+    (status,) = await repo.get_statuses([status_key])
+    result = json.loads(status["result"])
+    assert result["v"] == 42
+    assert result["thread"].startswith("task-handler")
+    assert not processor.threads.running